@@ -0,0 +1,83 @@
+"""
+Benchmark of the cache backends
+
+Measures get and set latency of the in-process LRUCache and of the shared SQLiteCache for
+several value sizes, and the hit rate of the shared cache when several worker processes
+read and fill the same keys.
+
+Usage: python benchmarks/cache.py [--rounds N] [--workers N]
+"""
+
+import argparse
+import multiprocessing
+import random
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from vivid.utils.cache import Cache, LRUCache, SQLiteCache
+
+SIZES: tuple[int, ...] = (256, 4 * 1024, 64 * 1024, 512 * 1024)
+KEYS: int = 200
+
+
+def time_per_call(func: Callable[[], object], rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def latency(cache: Cache, size: int, rounds: int) -> tuple[float, float]:
+    value = random.randbytes(size)
+    cache.set("key", value)
+    get = time_per_call(lambda: cache.get("key"), rounds)
+    set = time_per_call(lambda: cache.set("key", value), rounds)
+    return get, set
+
+
+def worker(path: Path, rounds: int, seed: int) -> None:
+    cache = SQLiteCache(path)
+    rng = random.Random(seed)
+    value = b"x" * 4096
+    for _ in range(rounds):
+        key = f"page:/{rng.randrange(KEYS)}"
+        if cache.get(key) is None:
+            cache.set(key, value, 60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'cache':<10}{'size':>10}{'get':>12}{'set':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in SIZES:
+            caches: list[tuple[str, Cache]] = [("lru", LRUCache()), ("sqlite", SQLiteCache(Path(tmp) / f"{size}.db"))]
+            for name, cache in caches:
+                get, set = latency(cache, size, args.rounds)
+                print(f"{name:<10}{size:>10}{get * 1e6:>10.1f}us{set * 1e6:>10.1f}us")
+
+        path = Path(tmp) / "shared.db"
+        processes = [
+            multiprocessing.Process(target=worker, args=(path, args.rounds, seed)) for seed in range(args.workers)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+        stats = SQLiteCache(path).stats()
+        lookups = args.workers * args.rounds
+        print(
+            f"\n{args.workers} workers, {lookups} lookups of {KEYS} keys in {elapsed:.2f}s, "
+            f"{stats['entries']} entries, {1 - stats['entries'] / lookups:.1%} served from the shared cache"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Benchmark of the html minification stage
+
+Renders every page of a pages directory (or a generated page when none is given) and
+reports the bytes saved and the time minification adds to a render, uncached and cached.
+
+Usage: python benchmarks/minify.py [pages directory] [--rounds N]
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import jinja2
+
+from vivid.utils.cache import LRUCache
+from vivid.utils.minify import minify_html, minify_html_cached
+
+SAMPLE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <meta charset="UTF-8" />
+        <!-- page metadata -->
+        <title>{{ title }}</title>
+        <link rel="stylesheet" href="/styles/index.css" />
+        <style>
+            body { margin: 0; }
+        </style>
+    </head>
+    <body>
+        <nav>
+            <ul>
+                {% for link in links %}
+                <li>
+                    <a href="{{ link }}">{{ link }}</a>
+                </li>
+                {% endfor %}
+            </ul>
+        </nav>
+        <main>
+            {% for row in rows %}
+            <div class="row">
+                <span>{{ row }}</span> <b>item</b>
+            </div>
+            {% endfor %}
+            <pre>
+    preformatted   text
+            </pre>
+        </main>
+        <script src="/scripts/index.js"></script>
+    </body>
+</html>
+"""
+
+
+def time_per_call(func: object, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()  # type: ignore[operator]
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="?", type=Path)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    data = {"title": "Benchmark", "links": [f"/page/{i}" for i in range(50)], "rows": list(range(500))}
+    if args.pages:
+        env = jinja2.Environment(loader=jinja2.FileSystemLoader(args.pages))
+        templates = {name: env.get_template(name) for name in env.list_templates(extensions=["html"])}
+    else:
+        templates = {"sample.html": jinja2.Template(SAMPLE)}
+
+    print(f"{'page':<30}{'bytes':>10}{'minified':>10}{'saved':>8}{'render':>12}{'minify':>12}{'cached':>12}")
+    total, total_minified = 0, 0
+    for name, template in templates.items():
+        html = template.render(**data)
+        minified = minify_html(html)
+        cache = LRUCache()
+        minify_html_cached(html, cache)
+        render = time_per_call(lambda: template.render(**data), args.rounds)
+        minify = time_per_call(lambda: minify_html(html), args.rounds)
+        cached = time_per_call(lambda: minify_html_cached(html, cache), args.rounds)
+        size, minified_size = len(html.encode()), len(minified.encode())
+        total, total_minified = total + size, total_minified + minified_size
+        print(
+            f"{name:<30}{size:>10}{minified_size:>10}{1 - minified_size / size:>8.1%}"
+            f"{render * 1e6:>10.1f}us{minify * 1e6:>10.1f}us{cached * 1e6:>10.1f}us"
+        )
+    if total:
+        print(f"\ntotal: {total} -> {total_minified} bytes, {1 - total_minified / total:.1%} saved")
+
+
+if __name__ == "__main__":
+    main()
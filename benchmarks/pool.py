@@ -0,0 +1,120 @@
+"""
+Benchmark of the process pool
+
+Serves a generated app with a CPU bound route, crunching numbers in `load` and rendering
+a large table, next to a light route. While heavy requests run, light requests are sent
+one after the other and their latency is reported, with every route in the server
+process and with the heavy route in a process pool.
+
+Usage: python benchmarks/pool.py [--heavy N] [--processes N] [--rows N]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+from vivid import App
+
+HEAVY_PAGE = """<table>
+{% for row in rows %}<tr>{% for cell in row %}<td>{{ cell }}</td>{% endfor %}</tr>{% endfor %}
+</table>
+"""
+
+HEAVY_SERVER = """from vivid import Response
+
+cpu_bound = {cpu_bound}
+
+
+def load():
+    total = sum(i * i % 7 for i in range(300_000))
+    return Response(200, [[b"content-type", b"text/html"]], {{"rows": [[total + i, i, i * 2] for i in range({rows})]}})
+"""
+
+LIGHT_SERVER = """from vivid import Response
+
+
+def load():
+    return Response(200, [[b"content-type", b"text/html"]], {"title": "light"})
+"""
+
+
+def create_project(root: Path, cpu_bound: bool, rows: int) -> Path:
+    for name in ("pages", "server", "static", "scripts", "styles"):
+        (root / name).mkdir(parents=True, exist_ok=True)
+    (root / "pages" / "heavy.html").write_text(HEAVY_PAGE)
+    (root / "pages" / "index.html").write_text("<h1>{{ title }}</h1>")
+    (root / "server" / "heavy.py").write_text(HEAVY_SERVER.format(cpu_bound=cpu_bound, rows=rows))
+    (root / "server" / "index.py").write_text(LIGHT_SERVER)
+    return root
+
+
+async def request(app: Any, path: str) -> None:
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive() -> dict[str, Any]:
+        if messages:
+            return messages.pop()
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, Any]) -> None:
+        pass
+
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [],
+        "client": ("127.0.0.1", 0),
+    }
+    await app(scope, receive, send)
+
+
+async def measure(root: Path, processes: int | None, heavy: int) -> tuple[float, list[float]]:
+    app = App(root / "pages", root / "server", root / "static", root / "scripts", root / "styles", processes=processes)
+    app.init()
+    assert app.http is not None
+    http: Any = app.http
+    await http.startup()
+    try:
+        start = time.perf_counter()
+        tasks = [asyncio.ensure_future(request(http, "/heavy")) for _ in range(heavy)]
+        latencies: list[float] = []
+        while not all(task.done() for task in tasks):
+            sent = time.perf_counter()
+            await request(http, "/")
+            latencies.append(time.perf_counter() - sent)
+            await asyncio.sleep(0.001)
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - start, sorted(latencies)
+    finally:
+        await http.shutdown()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--heavy", type=int, default=8)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'mode':<16}{'heavy total':>12}{'light reqs':>12}{'p50':>10}{'p99':>10}")
+    for mode, processes in (("in-process", None), (f"pool x{args.processes}", args.processes)):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = create_project(Path(tmp), processes is not None, args.rows)
+            # the request logs are silenced, only the totals matter here
+            with contextlib.redirect_stdout(io.StringIO()):
+                total, latencies = asyncio.run(measure(root, processes, args.heavy))
+        p50 = latencies[len(latencies) // 2] if latencies else 0.0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0.0
+        print(f"{mode:<16}{total:>11.2f}s{len(latencies):>12}{p50 * 1e3:>8.2f}ms{p99 * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark of the server backends
+
+Serves a generated app with every server configuration in a subprocess and loads it with
+keep-alive HTTP/1.1 connections, reporting requests per second and latency percentiles.
+Configurations whose backend or event loop is not installed are skipped.
+
+Usage: python benchmarks/servers.py [--connections N] [--duration SECONDS] [--only NAME ...]
+
+HTTP/2 is not measured here, hypercorn also accepts h2c with prior knowledge so h2load can
+be pointed at a hypercorn configuration started with `--serve NAME --port PORT --root DIR`.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from vivid import App, ServerOptions
+
+CONFIGS: dict[str, tuple[str, ServerOptions, list[str]]] = {
+    "uvicorn-asyncio-h11": ("uvicorn", ServerOptions(loop="asyncio", http="h11"), []),
+    "uvicorn-asyncio-httptools": ("uvicorn", ServerOptions(loop="asyncio", http="httptools"), ["httptools"]),
+    "uvicorn-uvloop-httptools": ("uvicorn", ServerOptions(loop="uvloop", http="httptools"), ["uvloop", "httptools"]),
+    "uvicorn-uvloop-httptools-keepalive": (
+        "uvicorn",
+        ServerOptions(loop="uvloop", http="httptools", keep_alive=30, backlog=4096),
+        ["uvloop", "httptools"],
+    ),
+    "hypercorn-asyncio": ("hypercorn", ServerOptions(loop="asyncio"), ["hypercorn"]),
+    "hypercorn-uvloop": ("hypercorn", ServerOptions(loop="uvloop"), ["hypercorn", "uvloop"]),
+}
+
+PAGE = """<!DOCTYPE html>
+<html>
+    <body>
+        <h1>{{ title }}</h1>
+        <ul>{% for item in items %}<li>{{ item }}</li>{% endfor %}</ul>
+    </body>
+</html>
+"""
+
+SERVER = """from vivid import Response
+
+ITEMS = list(range(50))
+
+
+def load():
+    return Response(200, [[b"content-type", b"text/html"]], {"title": "Benchmark", "items": ITEMS})
+"""
+
+
+def create_project(root: Path) -> Path:
+    for name in ("pages", "server", "static", "scripts", "styles"):
+        (root / name).mkdir(parents=True, exist_ok=True)
+    (root / "pages" / "index.html").write_text(PAGE)
+    (root / "server" / "index.py").write_text(SERVER)
+    return root
+
+
+def serve(name: str, port: int, root: Path) -> None:
+    backend, options, _ = CONFIGS[name]
+    app = App(root / "pages", root / "server", root / "static", root / "scripts", root / "styles")
+    app.init()
+    app.run(host="127.0.0.1", port=port, backend=backend, options=options)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return int(sock.getsockname()[1])
+
+
+async def wait_for(port: int, timeout: float = 10.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+
+async def client(port: int, until: float, latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    request = b"GET / HTTP/1.1\r\nhost: localhost\r\n\r\n"
+    try:
+        while time.monotonic() < until:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load(port: int, connections: int, duration: float) -> list[float]:
+    await wait_for(port)
+    latencies: list[float] = []
+    until = time.monotonic() + duration
+    await asyncio.gather(*(client(port, until, latencies) for _ in range(connections)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--only", nargs="*", choices=list(CONFIGS))
+    parser.add_argument("--serve", choices=list(CONFIGS), help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--root", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.root)
+        return
+
+    print(f"{'config':<38}{'req/s':>10}{'p50':>10}{'p99':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        root = create_project(Path(tmp))
+        for name in args.only or CONFIGS:
+            missing = [module for module in CONFIGS[name][2] if importlib.util.find_spec(module) is None]
+            if missing:
+                print(f"{name:<38}skipped, {', '.join(missing)} not installed")
+                continue
+            port = free_port()
+            command = [sys.executable, __file__, "--serve", name, "--port", str(port), "--root", str(root)]
+            process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                latencies = sorted(asyncio.run(load(port, args.connections, args.duration)))
+            finally:
+                process.terminate()
+                process.wait()
+            if not latencies:
+                print(f"{name:<38}no response")
+                continue
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            print(f"{name:<38}{len(latencies) / args.duration:>10.0f}{p50 * 1e3:>8.2f}ms{p99 * 1e3:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+import typing as t
+from pathlib import Path
+
+from vivid import App
+
+DIRECTORIES: tuple[str, ...] = ("pages", "server", "static", "scripts", "styles")
+
+
+def create_project(root: Path, pages: dict[str, str], server: dict[str, str] | None = None) -> Path:
+    for name in DIRECTORIES:
+        (root / name).mkdir(parents=True, exist_ok=True)
+    for name, source in pages.items():
+        (root / "pages" / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / "pages" / name).write_text(source)
+    for name, source in (server or {}).items():
+        (root / "server" / name).parent.mkdir(parents=True, exist_ok=True)
+        (root / "server" / name).write_text(source)
+    return root
+
+
+def create_app(root: Path, **kwargs: t.Any) -> App:
+    app = App(root / "pages", root / "server", root / "static", root / "scripts", root / "styles", **kwargs)
+    app.init()
+    return app
+
+
+async def request(
+    http: t.Any,
+    path: str,
+    method: str = "GET",
+    headers: list[tuple[bytes, bytes]] | None = None,
+    body: bytes = b"",
+) -> list[dict[str, t.Any]]:
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent: list[dict[str, t.Any]] = []
+
+    async def receive() -> dict[str, t.Any]:
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, t.Any]) -> None:
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": b"",
+        "headers": headers or [],
+        "client": ("127.0.0.1", 0),
+    }
+    await http(scope, receive, send)
+    return sent
+
+
+def status_of(sent: list[dict[str, t.Any]]) -> int:
+    return int(next(message["status"] for message in sent if message["type"] == "http.response.start"))
+
+
+def body_of(sent: list[dict[str, t.Any]]) -> bytes:
+    return b"".join(message.get("body", b"") for message in sent if message["type"] == "http.response.body")
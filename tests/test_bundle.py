@@ -0,0 +1,19 @@
+from vivid.utils.bundle import minify_source
+
+
+def minify_css(source: str) -> str:
+    return "".join(segment.text for segment in minify_source(source, "css"))
+
+
+def test_css_declaration_colons_are_tight() -> None:
+    source = "a :hover , b > i {\n  color : red ;\n  margin :\n    0 auto;\n}\n"
+    assert minify_css(source) == "a :hover,b>i{color:red;margin:0 auto;}"
+
+
+def test_css_nested_selector_colons_keep_their_space() -> None:
+    source = ".card {\n  color : red;\n  & :focus { outline : none }\n}\n"
+    assert minify_css(source) == ".card{color:red;& :focus{outline:none}}"
+
+
+def test_css_at_rule_colons_are_kept() -> None:
+    assert minify_css("@media (min-width : 10px) { a { b : c } }") == "@media (min-width : 10px){a{b:c}}"
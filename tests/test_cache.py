@@ -0,0 +1,15 @@
+from vivid.utils.cache import LRUCache
+
+
+def test_lru_budget_counts_encoded_bytes() -> None:
+    cache = LRUCache(max_size=10)
+    cache.set("a", "éééé")
+    assert cache.stats()["size"] == 8
+    cache.set("b", "éé")
+    assert cache.get("a") is None
+    assert cache.get("b") == "éé"
+    assert cache.stats()["size"] == 4
+    cache.set("b", b"123")
+    assert cache.stats()["size"] == 3
+    cache.delete("b")
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from vivid.utils.cli import TemplateCache
+
+
+def put(cache: TemplateCache, url: str, content: bytes, sha256: str, etag: str) -> Path:
+    tmp = cache.root / "download.tmp"
+    tmp.write_bytes(content)
+    return cache.put(url, tmp, sha256, etag)
+
+
+def test_template_cache_removes_the_replaced_archive(tmp_path: Path) -> None:
+    cache = TemplateCache(tmp_path)
+    first = put(cache, "https://a", b"one", "1" * 64, '"1"')
+    shared = put(cache, "https://b", b"one", "1" * 64, '"1"')
+    assert first == shared
+    second = put(cache, "https://a", b"two", "2" * 64, '"2"')
+    assert first.is_file()  # still the archive of https://b
+    put(cache, "https://b", b"two", "2" * 64, '"2"')
+    assert not first.is_file()
+    assert sorted(path.name for path in tmp_path.iterdir()) == [second.name, "index.json"]
+    assert TemplateCache(tmp_path).etag("https://a") == '"2"'
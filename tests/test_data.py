@@ -0,0 +1,30 @@
+import datetime
+import math
+
+import pytest
+
+import vivid.utils.data
+from vivid.utils.data import dumps
+
+DATA = {
+    "name": "café ☕",
+    "values": [math.nan, math.inf, -math.inf, 1.5],
+    "nested": ({"score": math.nan},),
+    1: "int key",
+    None: "none key",
+    "when": datetime.datetime(2024, 1, 2, 3, 4, 5),
+}
+EXPECTED = (
+    '{"name":"café ☕","values":[null,null,null,1.5],"nested":[{"score":null}],'
+    '"1":"int key","null":"none key","when":"2024-01-02 03:04:05"}'
+).encode("utf-8")
+
+
+def test_json_fallback(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(vivid.utils.data, "orjson", None)
+    assert dumps(DATA) == EXPECTED
+
+
+def test_orjson() -> None:
+    pytest.importorskip("orjson")
+    assert dumps(DATA) == EXPECTED
@@ -0,0 +1,93 @@
+import asyncio
+from pathlib import Path
+
+from helpers import body_of, create_app, create_project, request, status_of
+from vivid.http import ISR
+
+SERVER = """from vivid import Response
+
+
+def load():
+    return Response(200, [[b"content-type", b"text/html"]], {"title": "home"})
+"""
+
+
+def test_revalidate_with_non_ascii_token(tmp_path: Path) -> None:
+    root = create_project(tmp_path, {"index.html": "<h1>{{ title }}</h1>"}, {"index.py": SERVER})
+    app = create_app(root, type="isr", dist=tmp_path / "dist", token="sécret")
+
+    async def main() -> None:
+        for token, status in ((b"s\xc3\xa9cret", 200), ("sécret".encode("latin-1"), 401), (b"\xff\xfe", 401)):
+            sent = await request(app.http, "/__revalidate/", "POST", [(b"x-vivid-token", token)])
+            assert status_of(sent) == status
+
+    asyncio.run(main())
+
+
+PRODUCT = """from vivid import Response
+
+
+def paths():
+    return [{"id": 1}, {"id": 2}]
+
+
+def load(params):
+    return Response(200, [[b"content-type", b"text/html"]], {"id": params["id"]})
+"""
+
+
+def test_param_route(tmp_path: Path) -> None:
+    root = create_project(tmp_path, {"products/[id].html": "<p>{{ id }}</p>"}, {"products/[id].py": PRODUCT})
+    dist = tmp_path / "dist"
+    asyncio.run(create_app(root, type="ssg").http.build(dist))  # type: ignore[union-attr]
+    app = create_app(root, type="isr", dist=dist, token="token", revalidate=None)
+
+    async def main() -> None:
+        sent = await request(app.http, "/products/1")
+        assert status_of(sent) == 200
+        assert body_of(sent) == b"<p>1</p>"
+        sent = await request(app.http, "/__data/products/2.json")
+        assert status_of(sent) == 200
+        assert body_of(sent) == b'{"id":2}'
+        assert status_of(await request(app.http, "/products/3")) == 404
+        assert status_of(await request(app.http, "/products/[id]")) == 404
+        sent = await request(app.http, "/__revalidate/products/3", "POST", [(b"x-vivid-token", b"token")])
+        assert status_of(sent) == 200
+        sent = await request(app.http, "/products/3")
+        assert status_of(sent) == 200
+        assert body_of(sent) == b"<p>3</p>"
+
+    asyncio.run(main())
+
+
+SLOW = """import asyncio
+from pathlib import Path
+
+from vivid import Response
+
+
+async def load():
+    value = Path(__file__).with_name("value.txt").read_text()
+    await asyncio.sleep(0.2)
+    return Response(200, [[b"content-type", b"text/html"]], {"value": value})
+"""
+
+
+def test_revalidate_waits_for_the_regeneration_in_flight(tmp_path: Path) -> None:
+    root = create_project(tmp_path, {"index.html": "<p>{{ value }}</p>"}, {"index.py": SLOW})
+    (root / "server" / "value.txt").write_text("old")
+    app = create_app(root, type="isr", dist=tmp_path / "dist", token="token")
+
+    async def main() -> None:
+        http = app.http
+        assert http is not None
+        assert isinstance(http, ISR)
+        stale = http.schedule("/")
+        await asyncio.sleep(0.05)
+        (root / "server" / "value.txt").write_text("new")
+        sent = await request(http, "/__revalidate/", "POST", [(b"x-vivid-token", b"token")])
+        assert status_of(sent) == 200
+        assert await stale == b"<p>old</p>"
+        assert body_of(await request(http, "/")) == b"<p>new</p>"
+
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+import asyncio
+
+import pytest
+
+from vivid.utils.limits import Limiter
+
+
+def test_cancel_after_release_dropped_the_waiter() -> None:
+    async def main() -> None:
+        limiter = Limiter(1)
+        assert await limiter.acquire()
+        task = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert len(limiter.waiters) == 1
+        # cancelled and released in the same tick, release drops the cancelled waiter
+        task.cancel()
+        limiter.release()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.stats()["active"] == 0
+        assert limiter.stats()["queued"] == 0
+        assert await limiter.acquire()
+
+    asyncio.run(main())
+
+
+def test_cancel_while_queued() -> None:
+    async def main() -> None:
+        limiter = Limiter(1)
+        assert await limiter.acquire()
+        task = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.stats()["queued"] == 0
+        limiter.release()
+        assert limiter.stats()["active"] == 0
+
+    asyncio.run(main())
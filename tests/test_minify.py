@@ -0,0 +1,31 @@
+import asyncio
+from pathlib import Path
+
+from helpers import body_of, create_app, create_project, request
+
+SERVER = """from vivid import Response
+
+
+def load():
+    return Response(200, [[b"content-type", b"text/html"]], {"title": "home"})
+"""
+
+
+def test_static_pages_are_minified_once(tmp_path: Path) -> None:
+    root = create_project(
+        tmp_path,
+        {"index.html": "<h1>  {{ title }}  </h1>", "about.html": "<div>\n  <p>about</p>\n</div>"},
+        {"index.py": SERVER},
+    )
+    app = create_app(root, minify=True)
+    assert app.http is not None
+
+    async def main() -> None:
+        for _ in range(3):
+            assert body_of(await request(app.http, "/about")) == b"<div><p>about</p></div>"
+            assert body_of(await request(app.http, "/")) == b"<h1>home</h1>"
+
+    asyncio.run(main())
+    stats = app.http.cache.stats()
+    assert stats["entries"] == 1
+    assert stats["hits"] == 2
@@ -0,0 +1,20 @@
+import pytest
+
+from vivid import page_params, paginate
+
+
+def test_page_params_and_paginate_agree() -> None:
+    pages = [paginate(45, 20, params["page"]) for params in page_params(45, 20)]
+    assert [(page["offset"], page["limit"]) for page in pages] == [(0, 20), (20, 20), (40, 5)]
+    assert (pages[0]["previous"], pages[0]["next"]) == (None, 2)
+    assert (pages[-1]["previous"], pages[-1]["next"]) == (2, None)
+
+
+def test_paginate_empty_list() -> None:
+    assert paginate(0, 20, "1")["limit"] == 0
+
+
+@pytest.mark.parametrize("number", [0, -1, 4, "4"])
+def test_paginate_out_of_range(number: int | str) -> None:
+    with pytest.raises(ValueError):
+        paginate(45, 20, number)
@@ -0,0 +1,49 @@
+import asyncio
+import typing as t
+from pathlib import Path
+
+import pytest
+
+from vivid.utils.serve import StaticServer, parse_accept_encoding, pick_encoding
+
+
+def test_parse_accept_encoding() -> None:
+    assert parse_accept_encoding("gzip;q=0, br;q=0.5, *;q=0.1, ") == {"gzip": 0.0, "br": 0.5, "*": 0.1}
+    assert parse_accept_encoding("GZIP; q=bad") == {"gzip": 0.0}
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, br", "br"),
+        ("gzip;q=0", None),
+        ("gzip;q=0, br", "br"),
+        ("gzip;q=1, br;q=0.5", "gzip"),
+        ("*", "br"),
+        ("*;q=0, gzip", "gzip"),
+        ("identity", None),
+        ("", None),
+    ],
+)
+def test_pick_encoding(header: str, expected: str | None) -> None:
+    assert pick_encoding(header, {"br", "gzip"}) == expected
+
+
+def test_extensions_none(tmp_path: Path) -> None:
+    (tmp_path / "big.txt").write_bytes(b"x" * 100)
+    server = StaticServer(tmp_path, memory_limit=0)
+    sent: list[dict[str, t.Any]] = []
+
+    async def main() -> None:
+        async def receive() -> dict[str, t.Any]:
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message: dict[str, t.Any]) -> None:
+            sent.append(message)
+
+        scope = {"type": "http", "method": "GET", "path": "/big.txt", "headers": [], "extensions": None}
+        await server(scope, receive, send)
+
+    asyncio.run(main())
+    assert sent[0]["status"] == 200
+    assert b"".join(message.get("body", b"") for message in sent[1:]) == b"x" * 100
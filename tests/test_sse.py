@@ -0,0 +1,52 @@
+import asyncio
+import math
+from pathlib import Path
+
+import pytest
+
+from helpers import body_of, create_app, create_project, request, status_of
+from vivid.utils.data import dumps
+from vivid.utils.sse import Event, stream_events
+
+EVENTS = """async def events():
+    yield {"n": 1}
+"""
+
+COROUTINE = """async def events():
+    return {"n": 1}
+"""
+
+GENERATOR = """def events():
+    yield {"n": 1}
+"""
+
+
+@pytest.mark.parametrize("source, status", [(EVENTS, 200), (COROUTINE, 500), (GENERATOR, 500)])
+def test_handler_kinds(tmp_path: Path, source: str, status: int) -> None:
+    root = create_project(tmp_path, {"index.html": "<p></p>"}, {"index.py": source})
+    app = create_app(root)
+    sent = asyncio.run(request(app.http, "/", headers=[(b"accept", b"text/event-stream")]))
+    assert status_of(sent) == status
+    assert sent[-1]["type"] == "http.response.body"
+    assert not sent[-1].get("more_body", False)
+    if status == 200:
+        assert body_of(sent) == b'data: {"n":1}\n\n'
+
+
+def test_not_an_async_generator_sends_nothing() -> None:
+    sent: list[dict[str, object]] = []
+
+    async def receive() -> dict[str, str]:
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        sent.append(message)
+
+    with pytest.raises(TypeError):
+        asyncio.run(stream_events(iter([]), receive, send))  # type: ignore[arg-type]
+    assert sent == []
+
+
+def test_event_data_matches_the_data_endpoints() -> None:
+    data = {"name": "café", "score": math.nan}
+    assert Event(data).encode() == b"data: " + dumps(data) + b"\n\n"
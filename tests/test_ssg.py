@@ -0,0 +1,33 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+import vivid.utils.templates
+from helpers import create_app, create_project
+from vivid.utils.http import return_template
+
+PRODUCT = """from vivid import Response
+
+
+def paths():
+    return [{"id": i} for i in range(5)]
+
+
+def load(params):
+    return Response(200, [[b"content-type", b"text/html"]], {"id": params["id"]})
+"""
+
+
+def test_param_route_reads_its_template_once(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = create_project(tmp_path, {"products/[id].html": "<p>{{ id }}</p>"}, {"products/[id].py": PRODUCT})
+    reads: list[Path] = []
+
+    def counting(template: Path) -> str | None:
+        reads.append(template)
+        return return_template(template)
+
+    monkeypatch.setattr(vivid.utils.templates, "return_template", counting)
+    asyncio.run(create_app(root, type="ssg").http.build(tmp_path / "dist"))  # type: ignore[union-attr]
+    assert len(reads) == 1
+    assert sorted(path.name for path in (tmp_path / "dist" / "products").iterdir()) == [f"{i}.html" for i in range(5)]
@@ -1,5 +1,8 @@
 from vivid.app import App, Response
-from vivid.http import SSG, SSR
+from vivid.http import ISR, SSG, SSR
+from vivid.utils.paginate import page_params, paginate
+from vivid.utils.server import ServerOptions
+from vivid.utils.sse import Event
 
 __version__ = "1.0.0-alpha2"
-__all__: tuple[str, ...] = ("App", "Response", "SSG", "SSR")
+__all__: tuple[str, ...] = ("App", "Event", "ISR", "Response", "SSG", "SSR", "ServerOptions", "page_params", "paginate")
@@ -1,11 +1,14 @@
 from pathlib import Path
 
 import rich_click as click
+import uvicorn
 from rich.console import Console
 from rich.prompt import Prompt
 
 from vivid import __version__
 from vivid.utils.cli import fetch_template
+from vivid.utils.serve import StaticServer, index_stats
+from vivid.utils.templates import compile_templates
 
 __all__: tuple[str, ...] = ()
 
@@ -47,7 +50,13 @@ def main() -> None:
     required=True,
     type=click.Path(exists=False, file_okay=False, dir_okay=True),
 )
-def init(_path: str | Path) -> None:
+@click.option("--offline", is_flag=True, help="Only use the local cache of templates.")
+@click.option(
+    "--source",
+    default=None,
+    help="Url with a {type} placeholder or directory holding ssr.zip and ssg.zip to fetch templates from.",
+)
+def init(_path: str | Path, offline: bool, source: str | None) -> None:
     """
     Initialize a new vivid project.
 
@@ -63,11 +72,67 @@ def init(_path: str | Path) -> None:
         "[bold #84CC16]Select a template to use:[/bold #84CC16]",
         console,
     )
-    fetch_template("SSR" if selected_template == "SSR" else "SSG", path)
+    fetch_template("SSR" if selected_template == "SSR" else "SSG", path, offline=offline, source=source)
     console.print(
         f"[bold #84CC16]Template downloaded successfully at:[/bold #84CC16] [bold #14B8A6]{path}[/bold #14B8A6]"
     )
 
 
+@main.command()
+@click.argument(
+    "dist",
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+)
+@click.option("--host", default="localhost", show_default=True, help="Host of the server.")
+@click.option("--port", default=8000, show_default=True, type=int, help="Port of the server.")
+@click.option(
+    "--memory-limit",
+    default=64,
+    show_default=True,
+    type=int,
+    help="Megabytes of small files kept in memory.",
+)
+def serve(dist: str, host: str, port: int, memory_limit: int) -> None:
+    """
+    Serve the output of an SSG build.
+
+    dist: The directory written by the build.
+    """
+    console = Console()
+    server = StaticServer(Path(dist), memory_limit * 1024 * 1024)
+    count, size = index_stats(server.files)
+    console.print(
+        f"[bold #84CC16]Indexed {count} files ({size / 1024 / 1024:.1f} MiB) from:[/bold #84CC16] [bold #14B8A6]{dist}[/bold #14B8A6]"
+    )
+    console.print(f"[#8B5CF6 bold]✅ Server running at http://{host}:{port}[/#8B5CF6 bold]")
+    uvicorn.run(server, host=host, port=port, log_level="critical", access_log=False)
+
+
+@main.command()
+@click.argument(
+    "pages",
+    required=True,
+    type=click.Path(exists=True, file_okay=False, dir_okay=True),
+)
+@click.option(
+    "--output",
+    "-o",
+    default="templates.zip",
+    show_default=True,
+    type=click.Path(dir_okay=False),
+    help="Archive to write the compiled templates to.",
+)
+def compile(pages: str, output: str) -> None:
+    """
+    Precompile the templates of a pages directory.
+
+    pages: The pages directory, pass the archive as `App(compiled=...)`.
+    """
+    console = Console()
+    count = compile_templates(Path(pages), Path(output))
+    console.print(f"[bold #84CC16]Compiled {count} templates to:[/bold #84CC16] [bold #14B8A6]{output}[/bold #14B8A6]")
+
+
 if __name__ == "__main__":
     main()
@@ -1,11 +1,23 @@
 import asyncio
 import typing as t
-from dataclasses import dataclass
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 
 from rich import print
 
-from vivid.http import SSG, SSR
+from vivid.http import ISR, SSG, SSR
+from vivid.utils.background import Background
+from vivid.utils.bundle import Bundler
+from vivid.utils.cache import SQLiteCache
+from vivid.utils.deadline import Deadlines
+from vivid.utils.fragments import SHARED_FRAGMENT_CACHE_SIZE
+from vivid.utils.limits import Limits
+from vivid.utils.pool import ProcessPool
+from vivid.utils.server import ServerOptions, setup_loop
+from vivid.utils.sink import Sink
+from vivid.utils.templates import TemplateStore
 
 __all__: tuple[str, ...] = ("App", "Response")
 
@@ -26,8 +38,46 @@ class App:
         Path to scripts directory
     styles: Path | str
         Path to styles directory
-    type: typing.Literal["ssr"] | typing.Literal["ssg"]
+    type: typing.Literal["ssr"] | typing.Literal["ssg"] | typing.Literal["isr"]
         Type of the app
+    dist: Path | str | None
+        Directory of the pre-rendered pages served by an ISR app
+    revalidate: float | None
+        Seconds after which an ISR app regenerates a page in the background
+    token: str | None
+        Token allowing on-demand regeneration of a page in an ISR app
+    compiled: Path | str | None
+        Archive of precompiled templates written by ``vivid compile``
+    minify: bool
+        Whether to minify the rendered html
+    bundles: dict[str, list[str]] | bool
+        Bundles of scripts and styles to build, names mapped to glob patterns of files,
+        True builds one ``main`` bundle of every file
+    concurrency: int | None
+        Number of page and data requests handled at the same time, None for no limit
+    limits: dict[str, int] | None
+        Number of requests handled at the same time for some routes
+    queue: int
+        Number of requests waiting at each limit before new ones get a 503
+    metrics: bool
+        Whether to serve the statistics of the limits and the cache at ``/__metrics``
+    timeout: float | None
+        Seconds a page or data request has to start its response before getting a 504,
+        a server module can override it by exporting ``timeout``
+    shared_cache: Path | str | None
+        SQLite database caching pages and data for every worker on the host, fragments are
+        kept next to it in ``<name>-fragments<suffix>`` with their own budget, None keeps
+        the caches in the memory of each worker
+    preload: bool
+        Whether SSR and ISR pages send their stylesheets and scripts as preload ``link``
+        headers, and as ``103 Early Hints`` while ``load`` runs when the server supports it
+    background: int
+        Number of background tasks added with ``Response.add_task`` running at the same time
+    drain_timeout: float | None
+        Seconds the server waits for background tasks when it stops before cancelling them
+    processes: int | None
+        Number of worker processes running ``load`` and the render of routes whose server
+        module exports ``cpu_bound``, None runs every route in the server process
 
     Attributes
     ----------
@@ -41,10 +91,46 @@ class App:
         Path to scripts directory
     styles: Path
         Path to styles directory
-    type: typing.Literal["ssr"] | typing.Literal["ssg"]
+    type: typing.Literal["ssr"] | typing.Literal["ssg"] | typing.Literal["isr"]
         Type of the app
+    dist: Path | None
+        Directory of the pre-rendered pages served by an ISR app
+    revalidate: float | None
+        Seconds after which an ISR app regenerates a page in the background
+    token: str | None
+        Token allowing on-demand regeneration of a page in an ISR app
+    compiled: Path | None
+        Archive of precompiled templates written by ``vivid compile``
+    minify: bool
+        Whether to minify the rendered html
+    bundles: dict[str, list[str]] | bool
+        Bundles of scripts and styles to build
+    concurrency: int | None
+        Number of page and data requests handled at the same time
+    limits: dict[str, int] | None
+        Number of requests handled at the same time for some routes
+    queue: int
+        Number of requests waiting at each limit
+    metrics: bool
+        Whether to serve the statistics at ``/__metrics``
+    timeout: float | None
+        Seconds a page or data request has to start its response
+    shared_cache: Path | None
+        SQLite database caching pages and data for every worker on the host, next to the fragments one
+    preload: bool
+        Whether pages send preload headers and early hints
+    background: int
+        Number of background tasks running at the same time
+    drain_timeout: float | None
+        Seconds the server waits for background tasks when it stops
+    processes: int | None
+        Number of worker processes of the CPU bound routes
     http: SSR | SSG | None
         HTTP instance of the app
+    startup_hooks: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state when the server starts or before a build
+    shutdown_hooks: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state when the server stops or after a build
     """
 
     def __init__(
@@ -54,7 +140,23 @@ class App:
         static: Path | str,
         scripts: Path | str,
         styles: Path | str,
-        type: t.Literal["ssr"] | t.Literal["ssg"] = "ssr",
+        type: t.Literal["ssr"] | t.Literal["ssg"] | t.Literal["isr"] = "ssr",
+        dist: Path | str | None = None,
+        revalidate: float | None = None,
+        token: str | None = None,
+        compiled: Path | str | None = None,
+        minify: bool = False,
+        bundles: dict[str, list[str]] | bool = False,
+        concurrency: int | None = None,
+        limits: dict[str, int] | None = None,
+        queue: int = 64,
+        metrics: bool = False,
+        timeout: float | None = None,
+        shared_cache: Path | str | None = None,
+        preload: bool = True,
+        background: int = 16,
+        drain_timeout: float | None = 30.0,
+        processes: int | None = None,
     ) -> None:
         self.pages = Path(pages) if isinstance(pages, str) else pages
         self.server = Path(server) if isinstance(server, str) else server
@@ -62,11 +164,64 @@ class App:
         self.scripts = Path(scripts) if isinstance(scripts, str) else scripts
         self.styles = Path(styles) if isinstance(styles, str) else styles
         self.type = type
+        self.dist = Path(dist) if isinstance(dist, str) else dist
+        self.revalidate = revalidate
+        self.token = token
+        self.compiled = Path(compiled) if isinstance(compiled, str) else compiled
+        self.minify = minify
+        self.bundles = bundles
+        self.concurrency = concurrency
+        self.limits = limits
+        self.queue = queue
+        self.metrics = metrics
+        self.timeout = timeout
+        self.shared_cache = Path(shared_cache) if isinstance(shared_cache, str) else shared_cache
+        self.preload = preload
+        self.background = background
+        self.drain_timeout = drain_timeout
+        self.processes = processes
         self.http: SSR | SSG | None = None
+        self.startup_hooks: list[Callable[..., t.Any]] = []
+        self.shutdown_hooks: list[Callable[..., t.Any]] = []
+
+    def on_startup(self, func: Callable[..., t.Any]) -> Callable[..., t.Any]:
+        """
+        Register a startup hook, can be used as a decorator
+
+        Arguments
+        ---------
+        func: collections.abc.Callable[..., typing.Any]
+            Sync or async function called with the app state dict, resources stored
+            on it are passed to ``load(state=...)``
+
+        Returns
+        -------
+        collections.abc.Callable[..., typing.Any]
+            The registered function
+        """
+        self.startup_hooks.append(func)
+        return func
+
+    def on_shutdown(self, func: Callable[..., t.Any]) -> Callable[..., t.Any]:
+        """
+        Register a shutdown hook, can be used as a decorator
+
+        Arguments
+        ---------
+        func: collections.abc.Callable[..., typing.Any]
+            Sync or async function called with the app state dict
+
+        Returns
+        -------
+        collections.abc.Callable[..., typing.Any]
+            The registered function
+        """
+        self.shutdown_hooks.append(func)
+        return func
 
     def init(self) -> None:
         """
-        Initialize the app by creating an SSR instance or an SSG instance
+        Initialize the app by creating an SSR, ISR or SSG instance
 
         Arguments
         ---------
@@ -76,57 +231,123 @@ class App:
         -------
         None
         """
-        if self.type == "ssr":
+        if self.type == "ssr" or self.type == "isr":
             pages = {}
-            for page in self.pages.rglob("*.html"):
+            for page in sorted(self.pages.rglob("*.html")):
                 if "index.html" in str(page.name):
                     pages["/"] = page
                 else:
                     pages["/" + str(page.relative_to(self.pages).as_posix()).replace(".html", "")] = page
             server = {}
-            for file in self.server.rglob("*.py"):
+            for file in sorted(self.server.rglob("*.py")):
                 if "index.py" in str(file.name):
                     server["/"] = file
                 else:
                     server["/" + str(file.relative_to(self.server).as_posix()).replace(".py", "")] = file
             static = {}
-            for file in self.static.rglob("*"):
+            for file in sorted(self.static.rglob("*")):
                 if file.is_file():
                     static["/" + str(file.relative_to(self.static).as_posix())] = file
             scripts = {}
-            for file in self.scripts.rglob("*.js"):
+            for file in sorted(self.scripts.rglob("*.js")):
                 if file.is_file():
                     scripts["/" + str(file.relative_to(self.scripts).as_posix())] = file
             styles = {}
-            for file in self.styles.rglob("*.css"):
+            for file in sorted(self.styles.rglob("*.css")):
                 if file.is_file():
                     styles["/" + str(file.relative_to(self.styles).as_posix())] = file
-            self.http = SSR(
-                pages=pages,
-                server=server,
-                static=static,
-                scripts=scripts,
-                styles=styles,
-            )
+            bundler = None
+            if self.bundles:
+                bundler = Bundler(scripts, styles, None if self.bundles is True else self.bundles)
+            limits = None
+            if self.concurrency is not None or self.limits:
+                limits = Limits(self.concurrency, self.limits, self.queue)
+            cache, fragments, fragments_path = None, None, None
+            if self.shared_cache:
+                cache = SQLiteCache(self.shared_cache)
+                fragments_path = self.shared_cache.with_name(
+                    f"{self.shared_cache.stem}-fragments{self.shared_cache.suffix}"
+                )
+                fragments = SQLiteCache(fragments_path, SHARED_FRAGMENT_CACHE_SIZE)
+            pool = None
+            if self.processes:
+                pool = ProcessPool(self.pages, pages, server, self.processes, self.compiled, fragments_path)
+            if self.type == "isr":
+                self.http = ISR(
+                    pages=pages,
+                    server=server,
+                    static=static,
+                    scripts=scripts,
+                    styles=styles,
+                    dist=self.dist or Path("dist"),
+                    revalidate=self.revalidate,
+                    token=self.token,
+                    on_startup=self.startup_hooks,
+                    on_shutdown=self.shutdown_hooks,
+                    templates=TemplateStore(self.pages, self.compiled, fragments),
+                    minify=self.minify,
+                    bundler=bundler,
+                    limits=limits,
+                    metrics=self.metrics,
+                    deadlines=Deadlines(self.timeout),
+                    cache=cache,
+                    preload=self.preload,
+                    background=Background(self.background),
+                    drain_timeout=self.drain_timeout,
+                    pool=pool,
+                )
+            else:
+                self.http = SSR(
+                    pages=pages,
+                    server=server,
+                    static=static,
+                    scripts=scripts,
+                    styles=styles,
+                    on_startup=self.startup_hooks,
+                    on_shutdown=self.shutdown_hooks,
+                    templates=TemplateStore(self.pages, self.compiled, fragments),
+                    minify=self.minify,
+                    bundler=bundler,
+                    limits=limits,
+                    metrics=self.metrics,
+                    deadlines=Deadlines(self.timeout),
+                    cache=cache,
+                    preload=self.preload,
+                    background=Background(self.background),
+                    drain_timeout=self.drain_timeout,
+                    pool=pool,
+                )
         elif self.type == "ssg":
             pages = {}
-            for page in self.pages.rglob("*.html"):
+            for page in sorted(self.pages.rglob("*.html")):
                 if "index.html" in str(page.name):
                     pages["/"] = page
                 else:
                     pages["/" + str(page.relative_to(self.pages).as_posix()).replace(".html", "")] = page
             server = {}
-            for file in self.server.rglob("*.py"):
+            for file in sorted(self.server.rglob("*.py")):
                 if "index.py" in str(file.name):
                     server["/"] = file
                 else:
                     server["/" + str(file.relative_to(self.server).as_posix()).replace(".py", "")] = file
+            bundler = None
+            if self.bundles:
+                bundler = Bundler(
+                    Bundler.files_of(self.scripts, ".js"),
+                    Bundler.files_of(self.styles, ".css"),
+                    None if self.bundles is True else self.bundles,
+                )
             self.http = SSG(
                 pages=pages,
                 static=self.static,
                 scripts=self.scripts,
                 styles=self.styles,
                 server=server,
+                on_startup=self.startup_hooks,
+                on_shutdown=self.shutdown_hooks,
+                templates=TemplateStore(self.pages, self.compiled),
+                minify=self.minify,
+                bundler=bundler,
             )
 
     def run(
@@ -135,9 +356,11 @@ class App:
         port: int = 8000,
         dev: bool = False,
         reload_dirs: list[Path] = [],
+        backend: str = "uvicorn",
+        options: ServerOptions | None = None,
     ) -> None:
         """
-        Run the app if it is an SSR instance
+        Run the app if it is an SSR or ISR instance
 
         Arguments
         ---------
@@ -149,27 +372,34 @@ class App:
             Whether to run in development mode
         reload_dirs: list[Path]
             Directories to reload on change
+        backend: str
+            ASGI server running the app, ``uvicorn`` or ``hypercorn`` for HTTP/2
+        options: ServerOptions | None
+            Event loop, parser, backlog, keep-alive, concurrency and TLS settings of the server
 
         Returns
         -------
         None
         """
-        if self.type == "ssr" and isinstance(self.http, SSR):
+        if (self.type == "ssr" or self.type == "isr") and isinstance(self.http, SSR):
+            options = options if options is not None else ServerOptions()
+            setup_loop(options.loop)
             asyncio.get_event_loop().run_until_complete(
-                self.http.run(host=host, port=port, dev=dev, reload_dirs=reload_dirs)
+                self.http.run(host=host, port=port, dev=dev, reload_dirs=reload_dirs, backend=backend, options=options)
             )
         else:
-            print("[#F43F5E bold]❌ Run method is only available for SSR instances[/#F43F5E bold]")
+            print("[#F43F5E bold]❌ Run method is only available for SSR and ISR instances[/#F43F5E bold]")
             exit(0)
 
-    def build(self, dest: Path) -> None:
+    def build(self, dest: Path | Sink) -> None:
         """
         Build the app if it is an SSG instance
 
         Arguments
         ---------
-        dest: Path
-            Destination to build the app
+        dest: Path | Sink
+            Destination to build the app, a ``.zip`` or ``.tar`` path (optionally ``.gz``,
+            ``.bz2`` or ``.xz``) is written as an archive
 
         Returns
         -------
@@ -195,11 +425,34 @@ class Response:
         Headers of the response
     body: dict[str, typing.Any]
         Body of the response
+    background: list[collections.abc.Callable[[], typing.Any]]
+        Tasks run after the response has been sent, added with ``add_task``
     """
 
     status: int
     headers: list[list[str | bytes]]
     body: dict[str, t.Any]
+    background: list[Callable[[], t.Any]] = field(default_factory=list)
+
+    def add_task(self, func: Callable[..., t.Any], *args: t.Any, **kwargs: t.Any) -> None:
+        """
+        Add a task run after the response has been sent
+
+        Arguments
+        ---------
+        func: collections.abc.Callable[..., typing.Any]
+            Sync or async function, for analytics, audit logs or cache warming the response
+            does not depend on
+        *args: typing.Any
+            Positional arguments for the function
+        **kwargs: typing.Any
+            Keyword arguments for the function
+
+        Returns
+        -------
+        None
+        """
+        self.background.append(partial(func, *args, **kwargs))
 
     def to_dict(self) -> dict[str, t.Any]:
         """
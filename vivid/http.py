@@ -1,25 +1,56 @@
+import asyncio
+import hmac
+import inspect
 import mimetypes
+import time
 import typing as t
 from collections.abc import AsyncGenerator, Callable
 from pathlib import Path
+from types import ModuleType
 
-import uvicorn
+import jinja2
 from rich.console import Console
 
-from vivid.utils.common import create_file_from_route, send_response, vlog
+from vivid.utils.background import Background
+from vivid.utils.bundle import BUNDLES_DIR, Bundler
+from vivid.utils.cache import Cache, LRUCache, pack_response, unpack_response
+from vivid.utils.common import (
+    check_if_accepts_arg,
+    fill_route,
+    get_header,
+    has_params,
+    is_html,
+    match_route,
+    path_of_route,
+    send_response,
+    vlog,
+    write_file_atomic,
+)
+from vivid.utils.data import DATA_PREFIX, data_path_of, dumps, etag_matches, etag_of, route_of_data_path
+from vivid.utils.deadline import Deadlines
 from vivid.utils.http import (
-    copy_static_files_to,
     get_load_data,
+    get_paths,
     get_static_load_data,
     load_server,
     render_template,
-    return_template,
+    run_lifespan_hooks,
 )
+from vivid.utils.limits import Limits
+from vivid.utils.minify import minify_html, minify_html_cached
+from vivid.utils.pool import ProcessPool
+from vivid.utils.server import ServerOptions, backend_of
+from vivid.utils.sink import Sink, sink_of
+from vivid.utils.sse import HEARTBEAT, stream_events
+from vivid.utils.templates import TemplateStore
 
-__all__: tuple[str, ...] = ("SSR", "SSG")
+__all__: tuple[str, ...] = ("SSR", "ISR", "SSG")
 
 console = Console()
 
+REVALIDATE_PREFIX: str = "/__revalidate"
+METRICS_PREFIX: str = "/__metrics"
+
 
 class SSR:
     """
@@ -37,6 +68,37 @@ class SSR:
         Dictionary of routes and their corresponding scripts
     styles: dict[str, Path]
         Dictionary of routes and their corresponding styles
+    on_startup: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state when the server starts
+    on_shutdown: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state when the server stops
+    templates: TemplateStore | None
+        Store compiling the pages, created from the pages when not given
+    minify: bool
+        Whether to minify the rendered html
+    bundler: Bundler | None
+        Bundler of the scripts and styles, bundles are built once at startup
+    cache: Cache | None
+        Cache of the rendered output, an in-process ``LRUCache`` when not given, a
+        ``SQLiteCache`` shares it between the workers of a host
+    limits: Limits | None
+        Concurrency limits of the pages and data endpoints, static assets are never limited
+    metrics: bool
+        Whether to serve the statistics of the limits and the cache as json at ``/__metrics``
+    deadlines: Deadlines | None
+        Deadline of the pages and data endpoints, a server module can override it by
+        exporting ``timeout``, the requests of disconnected clients are always cancelled
+    preload: bool
+        Whether to send the stylesheets and scripts of a page as ``link`` preload headers,
+        in a ``103 Early Hints`` before ``load`` runs when the server supports it
+    background: Background | None
+        Runner of the tasks added with ``Response.add_task``, started once the response has
+        been sent
+    drain_timeout: float | None
+        Seconds the shutdown waits for background tasks before cancelling them
+    pool: ProcessPool | None
+        Process pool running ``load`` and the render of routes whose server module exports
+        ``cpu_bound``, started with the server
 
     Attributes
     ----------
@@ -50,6 +112,37 @@ class SSR:
         Dictionary of routes and their corresponding scripts
     styles: dict[str, Path]
         Dictionary of routes and their corresponding styles
+    on_startup: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state when the server starts
+    on_shutdown: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state when the server stops
+    state: dict[str, typing.Any]
+        App scoped resources created by the startup hooks, passed to ``load(state=...)``
+    modules: dict[str, ModuleType]
+        Server modules loaded once at startup, keyed by route
+    templates: TemplateStore
+        Store compiling the pages
+    minify: bool
+        Whether to minify the rendered html
+    cache: Cache
+        Cache of the rendered output, holds the minified pages and the pages and data of
+        routes whose server module exports ``cache_ttl`` seconds
+    bundler: Bundler | None
+        Bundler of the scripts and styles
+    limits: Limits | None
+        Concurrency limits of the pages and data endpoints
+    metrics: bool
+        Whether to serve the statistics at ``/__metrics``
+    deadlines: Deadlines
+        Deadline of the pages and data endpoints and counts of the cancelled requests
+    preload: bool
+        Whether to send preload headers and early hints
+    background: Background
+        Runner of the background tasks
+    drain_timeout: float | None
+        Seconds the shutdown waits for background tasks
+    pool: ProcessPool | None
+        Process pool of the CPU bound routes
     """
 
     def __init__(
@@ -59,12 +152,44 @@ class SSR:
         static: dict[str, Path],
         scripts: dict[str, Path],
         styles: dict[str, Path],
+        on_startup: list[Callable[..., t.Any]] | None = None,
+        on_shutdown: list[Callable[..., t.Any]] | None = None,
+        templates: TemplateStore | None = None,
+        minify: bool = False,
+        bundler: Bundler | None = None,
+        limits: Limits | None = None,
+        metrics: bool = False,
+        deadlines: Deadlines | None = None,
+        cache: Cache | None = None,
+        preload: bool = True,
+        background: Background | None = None,
+        drain_timeout: float | None = 30.0,
+        pool: ProcessPool | None = None,
     ) -> None:
         self.pages = pages
         self.server = server
         self.static = static
         self.scripts = scripts
         self.styles = styles
+        self.on_startup = on_startup if on_startup is not None else []
+        self.on_shutdown = on_shutdown if on_shutdown is not None else []
+        self.state: dict[str, t.Any] = {}
+        self.modules: dict[str, ModuleType] = {}
+        self.templates = templates if templates is not None else TemplateStore.for_pages(pages)
+        self.minify = minify
+        self.cache: Cache = cache if cache is not None else LRUCache()
+        self.bundler = bundler
+        if bundler is not None:
+            bundler.build()
+            self.templates.env.globals["bundle_url"] = bundler.url
+        self.limits = limits
+        self.metrics = metrics
+        self.deadlines = deadlines if deadlines is not None else Deadlines()
+        self.preload = preload
+        self.background = background if background is not None else Background()
+        self.drain_timeout = drain_timeout
+        self.pool = pool
+        self.dev = False
 
     async def __call__(
         self, scope: dict[str, t.Any], receive: Callable[..., t.Any], send: Callable[..., t.Any]
@@ -94,6 +219,9 @@ class SSR:
         -----
         This function is called by uvicorn
         """
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
         assert scope["type"] == "http"
         console.print(
             f"[#0EA5E9]🔗 {scope['client'][0]}:{scope['client'][1]} {scope['method']} {scope['path']}[/#0EA5E9]",
@@ -131,6 +259,10 @@ class SSR:
                 else:
                     await self.render_not_found(send)
                     vlog("fail", scope, 404)
+            elif self.bundler and (
+                route.startswith(f"/scripts/{BUNDLES_DIR}/") or route.startswith(f"/styles/{BUNDLES_DIR}/")
+            ):
+                await self.serve_bundle(route, scope, send)
             elif route.startswith("/scripts"):
                 body = await self.serve_script(route)  # type: ignore[assignment]
                 if body:
@@ -147,48 +279,461 @@ class SSR:
                 else:
                     await self.render_not_found(send)
                     vlog("fail", scope, 404)
-            else:
-                try:
-                    body = return_template(self.pages[route])  # type: ignore[assignment]
-                    status = 200
-                    headers: list[list[str | bytes]] = [[b"content-type", b"text/html"]]
-                    if self.server.get(route):
-                        mod = await load_server(self.server[route])
-                        if mod:
-                            data = await get_load_data(mod, await receive())
-                            if data and body and isinstance(body, str):
-                                body = render_template(body, data.body)
-                                if isinstance(body, Exception):
-                                    await self.render_error(send)
-                                    raise body
-                                status = data.status
-                                headers: list[list[str | bytes]] = data.headers  # type: ignore[no-redef]
-                            else:
-                                await self.render_error(send)
-                                vlog("fail", scope, 500)
-                        else:
-                            await self.render_error(send)
-                            vlog("fail", scope, 500)
-                    if body:
-                        await send_response(status, body, headers, send)
-                        vlog("success", scope, status)
-                    else:
-                        await self.render_not_found(send)
-                        vlog("fail", scope, 404)
-                except KeyError:
+            elif route == METRICS_PREFIX and self.metrics:
+                await send_response(200, dumps(self.stats()), [[b"content-type", b"application/json"]], send)
+                vlog("success", scope, 200)
+            elif route.startswith(DATA_PREFIX):
+                await self.serve_limited(self.serve_data, route_of_data_path(route) or route, scope, receive, send)
+            elif "text/event-stream" in (get_header(scope, "accept") or "") and self.server.get(route):
+                mod = self.modules.get(route) or await load_server(self.server[route])
+                if mod and hasattr(mod, "events"):
+                    await self.serve_events(mod, scope, receive, send)
+                else:
                     await self.render_not_found(send)
                     vlog("fail", scope, 404)
+            else:
+                await self.serve_limited(self.serve_page, route, scope, receive, send)
         except Exception:
             await self.render_error(send)
             vlog("fail", scope, 500)
             console.print_exception()
 
+    async def serve_limited(
+        self,
+        handler: Callable[..., t.Awaitable[None]],
+        page: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Call a handler once the request is admitted by the concurrency limits
+
+        Arguments
+        ---------
+        handler: collections.abc.Callable[..., typing.Awaitable[None]]
+            The handler, called with the path, scope, receive and send
+        page: str
+            The route of the page the request belongs to, used to pick its limit
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        A request over the limits while their queues are full gets a 503 with a
+        ``retry-after`` header right away instead of waiting.
+        """
+        if self.limits is None:
+            await self.serve_guarded(handler, page, scope, receive, send)
+            return
+        async with self.limits.admit(page) as admitted:
+            if admitted:
+                await self.serve_guarded(handler, page, scope, receive, send)
+                return
+        await send_response(
+            503,
+            b"Service Unavailable",
+            [[b"content-type", b"text/plain"], [b"retry-after", str(self.limits.retry_after).encode()]],
+            send,
+        )
+        vlog("fail", scope, 503)
+
+    async def serve_guarded(
+        self,
+        handler: Callable[..., t.Awaitable[None]],
+        page: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Call a handler under the deadline of its route, cancelling it if the client disconnects
+
+        Arguments
+        ---------
+        handler: collections.abc.Callable[..., typing.Awaitable[None]]
+            The handler, called with the path, scope, receive and send
+        page: str
+            The route of the page the request belongs to
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        Only routes with a server module are guarded, the others do not run ``load``
+        or render anything. A handler missing its deadline is answered with a 504.
+        """
+        if not self.server.get(page):
+            await handler(scope["path"], scope, receive, send)
+            return
+        outcome = await self.deadlines.run(
+            lambda receive, send: handler(scope["path"], scope, receive, send),
+            receive,
+            send,
+            getattr(self.modules.get(page), "timeout", self.deadlines.timeout),
+        )
+        if outcome == "timeout":
+            await send_response(504, b"Gateway Timeout", [[b"content-type", b"text/plain"]], send)
+            vlog("fail", scope, 504)
+        elif outcome == "cancelled":
+            vlog("fail", scope, 499)
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of the limits, the deadlines, the caches, the background tasks and the pool
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Statistics of the limits, None without limits, of the deadlines, of the cache, of
+            the fragment cache, of the background tasks and of the process pool, None
+            without a pool
+        """
+        return {
+            "limits": self.limits.stats() if self.limits is not None else None,
+            "deadlines": self.deadlines.stats(),
+            "cache": self.cache.stats(),
+            "fragments": self.templates.fragments.stats(),
+            "background": self.background.stats(),
+            "pool": self.pool.stats() if self.pool is not None else None,
+        }
+
+    def cache_ttl_of(self, mod: ModuleType | None, scope: dict[str, t.Any]) -> float | None:
+        """
+        Get the seconds the response of a route can be cached
+
+        Arguments
+        ---------
+        mod: ModuleType | None
+            The server module of the route
+        scope: dict[str, typing.Any]
+            The scope of the request
+
+        Returns
+        -------
+        float | None
+            The ``cache_ttl`` exported by the module for a GET request, None otherwise
+        """
+        ttl = getattr(mod, "cache_ttl", None)
+        if scope["method"] != "GET" or isinstance(ttl, bool) or not isinstance(ttl, (int, float)):
+            return None
+        return float(ttl)
+
+    def preloads_of(self, route: str) -> list[bytes]:
+        """
+        Get the links preloading the assets of a page
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        list[bytes]
+            The links found in the template of the page, empty when preloading is off or
+            the template does not compile
+        """
+        if not self.preload or route not in self.pages:
+            return []
+        try:
+            return self.templates.preload(self.pages[route])
+        except jinja2.TemplateError:
+            return []
+
+    async def load_data(self, route: str, mod: ModuleType, message: dict[str, t.Any] | None) -> t.Any | None:
+        """
+        Run the ``load`` of a route, in the process pool when it is CPU bound
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+        mod: ModuleType
+            The server module of the route
+        message: dict[str, typing.Any] | None
+            The message received from the client, None for a static load
+
+        Returns
+        -------
+        typing.Any | None
+            The data from the load function
+        """
+        if self.pool is not None and self.pool.runs(route, "load"):
+            return await self.pool.load(route, message)
+        if message is None:
+            return await get_static_load_data(mod, self.state)
+        return await get_load_data(mod, message, self.state)
+
+    async def load_and_render(
+        self, route: str, mod: ModuleType, message: dict[str, t.Any] | None, keep_data: bool = False
+    ) -> tuple[t.Any, str] | None:
+        """
+        Run the ``load`` of a route and render its page, in the process pool when it is CPU bound
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+        mod: ModuleType
+            The server module of the route
+        message: dict[str, typing.Any] | None
+            The message received from the client, None for a static load
+        keep_data: bool
+            Whether the data has to be kept when both stages run in a worker
+
+        Returns
+        -------
+        tuple[typing.Any, str] | None
+            The response of ``load`` and the rendered page, None when ``load`` returned nothing
+
+        Raises
+        ------
+        Exception
+            If rendering the template fails
+        """
+        if self.pool is not None and self.pool.runs(route, "load") and self.pool.runs(route, "render"):
+            return await self.pool.page(route, message, keep_data)
+        data = await self.load_data(route, mod, message)
+        if not data:
+            return None
+        if self.pool is not None and self.pool.runs(route, "render"):
+            return data, await self.pool.render(route, data.body)
+        rendered = render_template(self.templates.get(self.pages[route]), data.body)
+        if isinstance(rendered, Exception):
+            raise rendered
+        return data, rendered
+
+    def schedule_background(self, data: t.Any) -> None:
+        """
+        Schedule the tasks added to a response by ``load``
+
+        Arguments
+        ---------
+        data: typing.Any
+            The response returned by ``load``
+
+        Returns
+        -------
+        None
+        """
+        for task in getattr(data, "background", None) or []:
+            self.background.schedule(task)
+
+    async def send_early_hints(self, links: list[bytes], scope: dict[str, t.Any], send: Callable[..., t.Any]) -> None:
+        """
+        Send a ``103 Early Hints`` response when the server supports it
+
+        Arguments
+        ---------
+        links: list[bytes]
+            The links preloading the assets of the page
+        scope: dict[str, typing.Any]
+            The scope of the request
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        Early hints are an ASGI extension, servers supporting them advertise
+        ``http.response.early_hint`` in the scope, the others only get the links on the
+        final response.
+        """
+        if links and "http.response.early_hint" in (scope.get("extensions") or {}):
+            await send({"type": "http.response.early_hint", "links": links})
+
+    async def serve_page(
+        self,
+        route: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Render and serve a page
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Raises
+        ------
+        Exception
+            If rendering the template fails
+
+        Notes
+        -----
+        The rendered page of a route whose server module exports ``cache_ttl`` is kept in
+        the cache for that many seconds, so ``load`` runs once per ttl for every worker
+        sharing the cache. The assets of the page are hinted before ``load`` runs so the
+        browser fetches them while the data is loaded.
+        """
+        if route not in self.pages:
+            await self.render_not_found(send)
+            vlog("fail", scope, 404)
+            return
+        mod = None
+        if self.server.get(route):
+            mod = self.modules.get(route) or await load_server(self.server[route])
+        ttl = self.cache_ttl_of(mod, scope)
+        cached = self.cache.get(f"page:{route}") if ttl is not None else None
+        if cached is not None:
+            status, cached_headers, cached_body = unpack_response(cached)
+            await send_response(status, cached_body, cached_headers + [[b"x-vivid-cache", b"hit"]], send)
+            vlog("success", scope, status)
+            return
+        links = self.preloads_of(route)
+        body = self.templates.source(self.pages[route])
+        status = 200
+        headers: list[list[str | bytes]] = [[b"content-type", b"text/html"]]
+        data = None
+        if self.server.get(route):
+            await self.send_early_hints(links, scope, send)
+            loaded = await self.load_and_render(route, mod, await receive()) if mod and body else None
+            if not loaded:
+                await self.render_error(send)
+                vlog("fail", scope, 500)
+                return
+            data, body = loaded
+            status = data.status
+            headers = data.headers
+        if body:
+            if self.minify and is_html(headers) and data is None:
+                # pages without load render the same html every time, it is minified once
+                body = minify_html_cached(body, self.cache, ttl)
+            elif self.minify and is_html(headers):
+                body = minify_html(body)
+            if links and is_html(headers):
+                headers = headers + [[b"link", b", ".join(links)]]
+            if ttl is not None:
+                if status == 200:
+                    self.cache.set(f"page:{route}", pack_response(status, headers, body), ttl)
+                headers = headers + [[b"x-vivid-cache", b"miss"]]
+            await send_response(status, body, headers, send)
+            vlog("success", scope, status)
+            self.schedule_background(data)
+        else:
+            await self.render_not_found(send)
+            vlog("fail", scope, 404)
+
+    async def lifespan(self, receive: Callable[..., t.Any], send: Callable[..., t.Any]) -> None:
+        """
+        Handle the ASGI lifespan protocol
+
+        Arguments
+        ---------
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.startup()
+                except Exception as e:
+                    console.print_exception()
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                try:
+                    await self.shutdown()
+                except Exception as e:
+                    console.print_exception()
+                    await send({"type": "lifespan.shutdown.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def startup(self) -> None:
+        """
+        Load the server modules, run the startup hooks and start the process pool
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        for route, path in self.server.items():
+            mod = await load_server(path)
+            if mod:
+                self.modules[route] = mod
+        await run_lifespan_hooks(self.on_startup, list(self.modules.values()), "startup", self.state)
+        if self.pool is not None:
+            globals = {
+                name: self.templates.env.globals[name] for name in ("bundle_url",) if name in self.templates.env.globals
+            }
+            await self.pool.start(self.modules, globals)
+
+    async def shutdown(self) -> None:
+        """
+        Wait for the background tasks, stop the process pool and run the shutdown hooks
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        await self.background.drain(self.drain_timeout)
+        if self.pool is not None:
+            await self.pool.close()
+        await run_lifespan_hooks(self.on_shutdown, list(self.modules.values()), "shutdown", self.state)
+
     async def run(
         self,
         host: str = "localhost",
         port: int = 8000,
         dev: bool = False,
         reload_dirs: list[Path] = [],
+        backend: str = "uvicorn",
+        options: ServerOptions | None = None,
     ) -> None:
         """
         Run the app
@@ -203,31 +748,160 @@ class SSR:
             Whether to run in development mode
         reload_dirs: list[Path]
             The directories to reload
+        backend: str
+            The ASGI server, ``uvicorn`` or ``hypercorn`` for HTTP/2
+        options: ServerOptions | None
+            The tuning of the server
 
         Returns
         -------
         None
         """
-        config = uvicorn.Config(
-            self,
-            host=host,
-            port=port,
-            reload=dev,
-            log_level="critical",
-            reload_dirs=[path.as_posix() for path in reload_dirs],
-        )
-        server = uvicorn.Server(config)
+        self.dev = dev
+        options = options if options is not None else ServerOptions()
+        scheme = "https" if options.certfile else "http"
         try:
+            server = backend_of(backend)
             console.print(
-                f"[#8B5CF6 bold]✅ Server running at http://{host}:{port}[/#8B5CF6 bold]",
+                f"[#8B5CF6 bold]✅ Server running at {scheme}://{host}:{port} with {server.name}[/#8B5CF6 bold]",
                 (f"[#D97706 bold]🚀 dev mode: {dev}[/#D97706 bold]\n"),
             )
-            await server.serve()
+            await server.serve(self, host, port, options, dev, reload_dirs)
         except KeyboardInterrupt:
             console.print("[#8B5CF6 bold]\n🛑 Server stopped[/#8B5CF6 bold]\n")
         except Exception as e:
             console.print(f"[#FF0000 bold]🚨 {e}[/#FF0000 bold]\n")
 
+    async def serve_data(
+        self,
+        route: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Serve the data returned by the load function of a route as json
+
+        Arguments
+        ---------
+        route: str
+            The path of the data endpoint, for example ``/__data/blog.json``
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        The headers returned by ``load`` are kept so the data follows the same caching
+        rules as the page, an etag is added and ``if-none-match`` is answered with 304.
+        """
+        page = route_of_data_path(route)
+        mod = None
+        if page and self.server.get(page):
+            mod = self.modules.get(page) or await load_server(self.server[page])
+        if not page or not mod or not hasattr(mod, "load"):
+            await send_response(404, b'{"error":"not found"}', [[b"content-type", b"application/json"]], send)
+            vlog("fail", scope, 404)
+            return
+        ttl = self.cache_ttl_of(mod, scope)
+        cached = self.cache.get(f"data:{page}") if ttl is not None else None
+        data = None
+        if cached is not None:
+            status, headers, body = unpack_response(cached)
+        else:
+            data = await self.load_data(page, mod, await receive())
+            if not data:
+                await send_response(500, b'{"error":"no data"}', [[b"content-type", b"application/json"]], send)
+                vlog("fail", scope, 500)
+                return
+            body = dumps(data.body)
+            status = data.status
+            headers = [
+                header
+                for header in data.headers
+                if (header[0].lower() if isinstance(header[0], bytes) else header[0].lower().encode())
+                not in (b"content-type", b"content-length", b"etag")
+            ]
+            if ttl is not None and status == 200:
+                self.cache.set(f"data:{page}", pack_response(status, headers, body), ttl)
+        if ttl is not None:
+            headers.append([b"x-vivid-cache", b"hit" if cached is not None else b"miss"])
+        etag = etag_of(body)
+        headers.append([b"etag", etag.encode()])
+        if status == 200 and etag_matches(etag, get_header(scope, "if-none-match")):
+            await send_response(304, b"", headers, send)
+            vlog("success", scope, 304)
+            return
+        headers.append([b"content-type", b"application/json"])
+        await send_response(status, body, headers, send)
+        vlog("success", scope, status)
+        self.schedule_background(data)
+
+    async def serve_events(
+        self,
+        mod: ModuleType,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Serve the async generator exported as ``events`` by a server module as server-sent events
+
+        Arguments
+        ---------
+        mod: ModuleType
+            The loaded server module
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        The handler can accept ``state`` and ``last_event_id`` arguments, the heartbeat
+        interval can be changed by exporting ``heartbeat`` seconds from the module. A
+        handler that is not an async generator function gets a 500 before the stream
+        starts. The request is logged once the stream ends, as failed when the handler raised.
+        """
+        kwargs: dict[str, t.Any] = {}
+        if check_if_accepts_arg(mod.events, "state"):
+            kwargs["state"] = self.state
+        if check_if_accepts_arg(mod.events, "last_event_id"):
+            kwargs["last_event_id"] = get_header(scope, "last-event-id")
+        try:
+            events = mod.events(**kwargs)
+        except Exception:
+            console.print_exception()
+            events = None
+        if not inspect.isasyncgen(events):
+            if inspect.iscoroutine(events) or inspect.isgenerator(events):
+                events.close()
+            if events is not None:
+                console.print("[#FF0000 bold]🚨 events must be an async generator function[/#FF0000 bold]")
+            await self.render_error(send)
+            vlog("fail", scope, 500)
+            return
+        try:
+            await stream_events(events, receive, send, getattr(mod, "heartbeat", HEARTBEAT))
+        except Exception:
+            console.print_exception()
+            vlog("fail", scope, 200)
+            return
+        vlog("success", scope, 200)
+
     def serve_static(self, route: str) -> tuple[bytes, str] | tuple[bytes, t.Literal["text/plain"]] | None:
         """
         Serve the static files
@@ -265,7 +939,7 @@ class SSR:
         None
         """
         try:
-            body = return_template(self.pages["/404"])
+            body = self.templates.source(self.pages["/404"])
             await send_response(
                 404,
                 body if body else "404 Not Found",
@@ -289,7 +963,7 @@ class SSR:
         None
         """
         try:
-            body = return_template(self.pages.get("/500") or self.pages["/500"])
+            body = self.templates.source(self.pages["/500"])
             await send_response(
                 500,
                 body if body else "500 Internal Server Error",
@@ -304,9 +978,47 @@ class SSR:
                 send,
             )
 
-    async def serve_script(self, route: str) -> str | None:
+    async def serve_bundle(self, route: str, scope: dict[str, t.Any], send: Callable[..., t.Any]) -> None:
         """
-        Serve the scripts
+        Serve a bundle or its source map
+
+        Arguments
+        ---------
+        route: str
+            The route to the bundle
+        scope: dict[str, typing.Any]
+            The scope of the request
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        Bundles are rebuilt when a file changed in dev mode. A request carrying the
+        current hash as ``v`` query parameter, as emitted by ``bundle_url``, is cached forever.
+        """
+        assert self.bundler is not None
+        if self.dev:
+            self.bundler.refresh()
+        bundle = self.bundler.get(route)
+        if bundle is None:
+            await self.render_not_found(send)
+            vlog("fail", scope, 404)
+            return
+        body, content_type, digest = bundle
+        immutable = not self.dev and scope.get("query_string", b"") == f"v={digest}".encode()
+        cache_control = b"public, max-age=31536000, immutable" if immutable else b"no-cache"
+        await send_response(
+            200, body, [[b"content-type", content_type.encode()], [b"cache-control", cache_control]], send
+        )
+        vlog("success", scope, 200)
+
+    async def serve_script(self, route: str) -> str | None:
+        """
+        Serve the scripts
 
         Arguments
         ---------
@@ -345,6 +1057,577 @@ class SSR:
             return None
 
 
+class ISR(SSR):
+    """
+    ISR class to serve pre-rendered pages and regenerate them in the background
+
+    Arguments
+    ---------
+    pages: dict[str, Path]
+        Dictionary of routes and their corresponding pages
+    server: dict[str, Path]
+        Dictionary of routes and their corresponding server files
+    static: dict[str, Path]
+        Dictionary of routes and their corresponding static files
+    scripts: dict[str, Path]
+        Dictionary of routes and their corresponding scripts
+    styles: dict[str, Path]
+        Dictionary of routes and their corresponding styles
+    dist: Path
+        Directory of the pre-rendered pages, usually the output of ``SSG.build``
+    revalidate: float | None
+        Seconds after which a page is regenerated, a server module can override it by
+        exporting ``revalidate``, None never regenerates in the background
+    token: str | None
+        Token allowing on-demand regeneration with ``POST /__revalidate/<route>``
+    on_startup: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state when the server starts
+    on_shutdown: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state when the server stops
+    templates: TemplateStore | None
+        Store compiling the pages, created from the pages when not given
+    minify: bool
+        Whether to minify the rendered html
+    bundler: Bundler | None
+        Bundler of the scripts and styles, bundles are built once at startup
+    cache: Cache | None
+        Cache of the rendered output, an in-process ``LRUCache`` when not given, a
+        ``SQLiteCache`` shares it between the workers of a host
+    limits: Limits | None
+        Concurrency limits of the pages and data endpoints, static assets are never limited
+    metrics: bool
+        Whether to serve the statistics of the limits and the cache as json at ``/__metrics``
+    deadlines: Deadlines | None
+        Deadline of the pages and data endpoints, a server module can override it by
+        exporting ``timeout``, the requests of disconnected clients are always cancelled
+    preload: bool
+        Whether to send the stylesheets and scripts of a page as ``link`` preload headers,
+        in a ``103 Early Hints`` before ``load`` runs when the server supports it
+    background: Background | None
+        Runner of the tasks added with ``Response.add_task``, started once the response has
+        been sent
+    drain_timeout: float | None
+        Seconds the shutdown waits for background tasks before cancelling them
+    pool: ProcessPool | None
+        Process pool running ``load`` and the render of routes whose server module exports
+        ``cpu_bound``, started with the server
+
+    Attributes
+    ----------
+    dist: Path
+        Directory of the pre-rendered pages
+    revalidate: float | None
+        Default seconds after which a page is regenerated
+    token: str | None
+        Token allowing on-demand regeneration
+    files: dict[str, tuple[bytes, float]]
+        Pre-rendered pages kept in memory with the time they were generated
+    snapshots: dict[str, tuple[bytes, float]]
+        Json data of the pre-rendered pages kept in memory with the time it was generated
+    tasks: dict[str, asyncio.Task[bytes | None]]
+        Regenerations in progress, keyed by route
+
+    Notes
+    -----
+    Pages are served from memory or from ``dist`` without rendering. The first request
+    after the revalidate interval still gets the stale page while ``load`` and the render
+    run in the background, the new page atomically replaces the file on disk. Data
+    endpoints serve the json written next to the page by the same regeneration. A page
+    with params, like ``/products/[id]``, serves the paths built by ``SSG.build`` or
+    revalidated on demand, and regenerates them with ``load(params)``.
+    """
+
+    def __init__(
+        self,
+        pages: dict[str, Path],
+        server: dict[str, Path],
+        static: dict[str, Path],
+        scripts: dict[str, Path],
+        styles: dict[str, Path],
+        dist: Path,
+        revalidate: float | None = None,
+        token: str | None = None,
+        on_startup: list[Callable[..., t.Any]] | None = None,
+        on_shutdown: list[Callable[..., t.Any]] | None = None,
+        templates: TemplateStore | None = None,
+        minify: bool = False,
+        bundler: Bundler | None = None,
+        limits: Limits | None = None,
+        metrics: bool = False,
+        deadlines: Deadlines | None = None,
+        cache: Cache | None = None,
+        preload: bool = True,
+        background: Background | None = None,
+        drain_timeout: float | None = 30.0,
+        pool: ProcessPool | None = None,
+    ) -> None:
+        super().__init__(
+            pages,
+            server,
+            static,
+            scripts,
+            styles,
+            on_startup,
+            on_shutdown,
+            templates,
+            minify,
+            bundler,
+            limits,
+            metrics,
+            deadlines,
+            cache,
+            preload,
+            background,
+            drain_timeout,
+            pool,
+        )
+        self.dist = dist
+        self.revalidate = revalidate
+        self.token = token
+        self.files: dict[str, tuple[bytes, float]] = {}
+        self.snapshots: dict[str, tuple[bytes, float]] = {}
+        self.tasks: dict[str, asyncio.Task[bytes | None]] = {}
+
+    async def serve_page(
+        self,
+        route: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Serve a pre-rendered page, regenerating it when it is stale or missing
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        if route.startswith(REVALIDATE_PREFIX + "/") and scope["method"] == "POST":
+            await self.serve_revalidate(route[len(REVALIDATE_PREFIX) :], scope, send)
+            return
+        resolved = self.page_of(route)
+        if resolved is None or resolved[0] in ("/404", "/500"):
+            await self.render_not_found(send)
+            vlog("fail", scope, 404)
+            return
+        page, params = resolved
+        links = self.preloads_of(page)
+        entry = self.files.get(route) or self.read(route)
+        if entry is None and params is not None:
+            # only the paths built by SSG or revalidated on demand exist
+            await self.render_not_found(send)
+            vlog("fail", scope, 404)
+            return
+        if entry is None:
+            await self.send_early_hints(links, scope, send)
+            body = await self.regenerate(route)
+            if body is None:
+                await self.render_error(send)
+                vlog("fail", scope, 500)
+                return
+            cache = b"miss"
+        else:
+            body, generated = entry
+            cache = b"hit"
+            interval = await self.interval_of(page)
+            if interval is not None and time.time() - generated >= interval:
+                self.schedule(route)
+                cache = b"stale"
+        headers: list[list[str | bytes]] = [[b"content-type", b"text/html"], [b"x-vivid-cache", cache]]
+        if links:
+            headers.append([b"link", b", ".join(links)])
+        await send_response(200, body, headers, send)
+        vlog("success", scope, 200)
+
+    async def serve_data(
+        self,
+        route: str,
+        scope: dict[str, t.Any],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+    ) -> None:
+        """
+        Serve the json data of a pre-rendered page, regenerating it when it is stale or missing
+
+        Arguments
+        ---------
+        route: str
+            The path of the data endpoint, for example ``/__data/blog.json``
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        page = route_of_data_path(route)
+        resolved = self.page_of(page) if page else None
+        if not page or resolved is None or not self.server.get(resolved[0]):
+            await send_response(404, b'{"error":"not found"}', [[b"content-type", b"application/json"]], send)
+            vlog("fail", scope, 404)
+            return
+        entry = self.snapshots.get(page) or self.read_data(page)
+        if entry is None and resolved[1] is not None:
+            await send_response(404, b'{"error":"not found"}', [[b"content-type", b"application/json"]], send)
+            vlog("fail", scope, 404)
+            return
+        if entry is None:
+            await self.regenerate(page)
+            entry = self.snapshots.get(page)
+            if entry is None:
+                await send_response(500, b'{"error":"no data"}', [[b"content-type", b"application/json"]], send)
+                vlog("fail", scope, 500)
+                return
+            body, _ = entry
+            cache = b"miss"
+        else:
+            body, generated = entry
+            cache = b"hit"
+            interval = await self.interval_of(resolved[0])
+            if interval is not None and time.time() - generated >= interval:
+                self.schedule(page)
+                cache = b"stale"
+        etag = etag_of(body)
+        headers: list[list[str | bytes]] = [[b"x-vivid-cache", cache], [b"etag", etag.encode()]]
+        if etag_matches(etag, get_header(scope, "if-none-match")):
+            await send_response(304, b"", headers, send)
+            vlog("success", scope, 304)
+            return
+        headers.append([b"content-type", b"application/json"])
+        await send_response(200, body, headers, send)
+        vlog("success", scope, 200)
+
+    async def serve_revalidate(self, route: str, scope: dict[str, t.Any], send: Callable[..., t.Any]) -> None:
+        """
+        Regenerate a page on demand
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+        scope: dict[str, typing.Any]
+            The scope of the request
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        # compared as bytes, compare_digest rejects str with non-ascii characters
+        token = (get_header(scope, "x-vivid-token") or "").encode("latin-1")
+        if not self.token or not hmac.compare_digest(token, self.token.encode("utf-8")):
+            await send_response(401, b'{"revalidated":false}', [[b"content-type", b"application/json"]], send)
+            vlog("fail", scope, 401)
+            return
+        if self.page_of(route) is None:
+            await send_response(404, b'{"revalidated":false}', [[b"content-type", b"application/json"]], send)
+            vlog("fail", scope, 404)
+            return
+        body = await self.refresh(route)
+        status = 200 if body is not None else 500
+        await send_response(
+            status,
+            dumps({"revalidated": body is not None}),
+            [[b"content-type", b"application/json"]],
+            send,
+        )
+        vlog("success" if body is not None else "fail", scope, status)
+
+    def page_of(self, route: str) -> tuple[str, dict[str, str] | None] | None:
+        """
+        Find the page serving a route
+
+        Arguments
+        ---------
+        route: str
+            The requested route, like ``/products/42``
+
+        Returns
+        -------
+        tuple[str, dict[str, str] | None] | None
+            The route of the page, like ``/products/[id]``, with the values of its params
+            or None for a page without params, None if no page serves the route
+        """
+        if has_params(route):
+            return None
+        if route in self.pages:
+            return route, None
+        for page in self.pages:
+            if has_params(page):
+                params = match_route(page, route)
+                if params is not None:
+                    return page, params
+        return None
+
+    def read(self, route: str) -> tuple[bytes, float] | None:
+        """
+        Read a pre-rendered page from the dist directory into memory
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        tuple[bytes, float] | None
+            The page and the time it was generated or None
+        """
+        path = self.dist / path_of_route(route)
+        try:
+            entry = (path.read_bytes(), path.stat().st_mtime)
+        except FileNotFoundError:
+            return None
+        self.files[route] = entry
+        return entry
+
+    def read_data(self, route: str) -> tuple[bytes, float] | None:
+        """
+        Read the json data of a pre-rendered page from the dist directory into memory
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        tuple[bytes, float] | None
+            The data and the time it was generated or None
+        """
+        path = self.dist / data_path_of(route).lstrip("/")
+        try:
+            entry = (path.read_bytes(), path.stat().st_mtime)
+        except FileNotFoundError:
+            return None
+        self.snapshots[route] = entry
+        return entry
+
+    async def interval_of(self, route: str) -> float | None:
+        """
+        Get the revalidate interval of a route
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        float | None
+            Seconds after which the page is stale or None
+        """
+        mod = await self.module_of(route)
+        return getattr(mod, "revalidate", self.revalidate) if mod else self.revalidate
+
+    async def module_of(self, route: str) -> ModuleType | None:
+        """
+        Get the server module of a route, loading it once
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        ModuleType | None
+            The loaded module or None
+        """
+        if route not in self.modules and self.server.get(route):
+            mod = await load_server(self.server[route])
+            if mod:
+                self.modules[route] = mod
+        return self.modules.get(route)
+
+    async def shutdown(self) -> None:
+        """
+        Wait for the regenerations in progress, then shut down like SSR
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        Regenerations still running after ``drain_timeout`` are cancelled, the page they
+        were replacing stays on disk.
+        """
+        if self.tasks:
+            _, pending = await asyncio.wait(set(self.tasks.values()), timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await super().shutdown()
+
+    def schedule(self, route: str) -> "asyncio.Task[bytes | None]":
+        """
+        Start regenerating a page in the background unless it is already regenerating
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        asyncio.Task[bytes | None]
+            The task rendering the page
+        """
+        task = self.tasks.get(route)
+        if task is None:
+            task = asyncio.create_task(self.render(route))
+            self.tasks[route] = task
+            task.add_done_callback(lambda _: self.tasks.pop(route, None))
+        return task
+
+    async def regenerate(self, route: str) -> bytes | None:
+        """
+        Regenerate a single page and wait for it, without a full build
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        bytes | None
+            The new page or None if it could not be rendered
+        """
+        return await asyncio.shield(self.schedule(route))
+
+    async def load_and_render_params(
+        self, page: str, mod: ModuleType, params: dict[str, str]
+    ) -> tuple[t.Any, str] | None:
+        """
+        Run the ``load`` of a page with params and render it, like ``SSG.build`` does
+
+        Arguments
+        ---------
+        page: str
+            The route of the page, like ``/products/[id]``
+        mod: ModuleType
+            The server module of the page
+        params: dict[str, str]
+            The values of the params, taken from the requested route
+
+        Returns
+        -------
+        tuple[typing.Any, str] | None
+            The response of ``load`` and the rendered page, None when ``load`` returned nothing
+
+        Raises
+        ------
+        Exception
+            If rendering the template fails
+
+        Notes
+        -----
+        Pages with params always run in the server process, the process pool has no way
+        to pass them the params.
+        """
+        data = await get_static_load_data(mod, self.state, params)
+        if not data:
+            return None
+        rendered = render_template(self.templates.get(self.pages[page]), data.body)
+        if isinstance(rendered, Exception):
+            raise rendered
+        return data, rendered
+
+    async def refresh(self, route: str) -> bytes | None:
+        """
+        Regenerate a page with data loaded after this call, for on-demand revalidation
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        bytes | None
+            The new page or None if it could not be rendered
+
+        Notes
+        -----
+        A regeneration already in flight may have loaded its data before the caller
+        updated it, so it is waited for and a new one is started after it. Callers
+        arriving together share that new regeneration.
+        """
+        task = self.tasks.get(route)
+        if task is not None:
+            await asyncio.wait({task})
+        return await self.regenerate(route)
+
+    async def render(self, route: str) -> bytes | None:
+        """
+        Run ``load``, render the page and atomically replace it in the dist directory
+
+        Arguments
+        ---------
+        route: str
+            The route of the page
+
+        Returns
+        -------
+        bytes | None
+            The new page or None if it could not be rendered, the stale page keeps being served
+        """
+        try:
+            resolved = self.page_of(route)
+            if resolved is None:
+                return None
+            page, params = resolved
+            body = self.templates.source(self.pages[page])
+            if body is None:
+                return None
+            if self.server.get(page):
+                mod = await self.module_of(page)
+                if params is not None:
+                    loaded = await self.load_and_render_params(page, mod, params) if mod else None
+                else:
+                    loaded = await self.load_and_render(page, mod, None, keep_data=True) if mod else None
+                if not loaded:
+                    return None
+                data, body = loaded
+                snapshot = dumps(data.body)
+                await asyncio.to_thread(write_file_atomic, self.dist / data_path_of(route).lstrip("/"), snapshot)
+                self.snapshots[route] = (snapshot, time.time())
+            if self.minify:
+                body = minify_html_cached(body, self.cache, await self.interval_of(page))
+            content = body.encode("utf-8")
+            await asyncio.to_thread(write_file_atomic, self.dist / path_of_route(route), content)
+            self.files[route] = (content, time.time())
+            console.print(f"[#0EA5E9]✅ {route} regenerated[/#0EA5E9]")
+            if self.server.get(page):
+                self.schedule_background(data)
+            return content
+        except Exception:
+            console.print_exception()
+            return None
+
+
 class SSG:
     """
     SSG class to create a static site generator
@@ -361,6 +1644,16 @@ class SSG:
         The styles directory
     server: dict[str, Path]
         Dictionary of routes and their corresponding server files
+    on_startup: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state before the build
+    on_shutdown: list[collections.abc.Callable[..., typing.Any]] | None
+        Hooks called with the app state after the build
+    templates: TemplateStore | None
+        Store compiling the pages, created from the pages when not given
+    minify: bool
+        Whether to minify the rendered html
+    bundler: Bundler | None
+        Bundler of the scripts and styles, bundles are built once at startup
 
     Attributes
     ----------
@@ -374,6 +1667,22 @@ class SSG:
         The styles directory
     server: dict[str, Path]
         Dictionary of routes and their corresponding server files
+    on_startup: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state before the build
+    on_shutdown: list[collections.abc.Callable[..., typing.Any]]
+        Hooks called with the app state after the build
+    state: dict[str, typing.Any]
+        App scoped resources created by the startup hooks, passed to ``load(state=...)``
+    modules: dict[str, ModuleType]
+        Server modules loaded once per build, keyed by route
+    templates: TemplateStore
+        Store compiling the pages
+    minify: bool
+        Whether to minify the rendered html
+    cache: LRUCache
+        In-memory cache of rendered output, holds the minified pages
+    bundler: Bundler | None
+        Bundler of the scripts and styles
     """
 
     def __init__(
@@ -383,12 +1692,27 @@ class SSG:
         scripts: Path,
         styles: Path,
         server: dict[str, Path],
+        on_startup: list[Callable[..., t.Any]] | None = None,
+        on_shutdown: list[Callable[..., t.Any]] | None = None,
+        templates: TemplateStore | None = None,
+        minify: bool = False,
+        bundler: Bundler | None = None,
     ) -> None:
         self.pages = pages
         self.static = static
         self.scripts = scripts
         self.styles = styles
         self.server = server
+        self.on_startup = on_startup if on_startup is not None else []
+        self.on_shutdown = on_shutdown if on_shutdown is not None else []
+        self.state: dict[str, t.Any] = {}
+        self.modules: dict[str, ModuleType] = {}
+        self.templates = templates if templates is not None else TemplateStore.for_pages(pages)
+        self.minify = minify
+        self.cache = LRUCache()
+        self.bundler = bundler
+        if bundler is not None:
+            self.templates.env.globals["bundle_url"] = bundler.url
 
     async def get_templates_with_data(
         self,
@@ -404,15 +1728,31 @@ class SSG:
         ------
         dict[str, tuple[Path, dict[str, typing.Any] | None]]
             The templates with their corresponding data
+
+        Notes
+        -----
+        A route with params, like ``/products/[id]``, yields one page for every params
+        yielded by the ``paths`` function of its server module, loaded with ``load(params)``.
+        Pages are yielded one at a time so the build never holds the data of every page.
         """
         for page in self.pages:
             if page == "/404" or page == "/500":
                 yield {page: (self.pages[page], None)}
+            elif has_params(page):
+                mod = None
+                if self.server.get(page):
+                    mod = self.modules.get(page) or await load_server(self.server[page])
+                if not mod or not hasattr(mod, "paths"):
+                    console.print(f"[#FACC15 bold]⚠ {page} has params but no paths function, skipped[/#FACC15 bold]")
+                    continue
+                async for params in get_paths(mod, self.state):
+                    data = await get_static_load_data(mod, self.state, params)
+                    yield {fill_route(page, params): (self.pages[page], data.body if data else None)}
             else:
                 if self.server.get(page):
-                    mod = await load_server(self.server[page])
+                    mod = self.modules.get(page) or await load_server(self.server[page])
                     if mod:
-                        data = await get_static_load_data(mod)
+                        data = await get_static_load_data(mod, self.state)
                         if data:
                             yield {page: (self.pages[page], data.body)}
                         else:
@@ -422,59 +1762,113 @@ class SSG:
                 else:
                     yield {page: (self.pages[page], None)}
 
-    async def build(self, dest: Path) -> None:
+    async def build(self, dest: Path | Sink) -> None:
         """
         Build the static site
 
         Arguments
         ---------
-        dest: Path
-            The destination directory
+        dest: Path | Sink
+            The destination directory or archive, or a sink receiving the files
 
         Returns
         -------
         None
+
+        Notes
+        -----
+        A path ending in ``.zip``, ``.tar``, ``.tar.gz``, ``.tgz``, ``.tar.bz2`` or ``.tar.xz``
+        is written as an archive without going through the disk, a sink passed in is left
+        open for the caller to close.
         """
+        if isinstance(dest, Sink):
+            await self.build_into(dest)
+            return
         console.print(f"[#8B5CF6 bold]🔨 Building to {dest.as_posix()}[/#8B5CF6 bold]\n")
-        async for pageAndData in self.get_templates_with_data():
-            for page, (template, data) in pageAndData.items():
-                body = return_template(template)
-                if body:
-                    if data:
-                        _body = render_template(body, data)
-                        if isinstance(_body, Exception):
-                            raise _body
-                        try:
-                            create_file_from_route(page, _body, dest)
-                            console.print(f"[#0EA5E9]✅ {page} created[/#0EA5E9]")
-                        except Exception:
-                            console.print_exception()
-                    else:
-                        try:
-                            console.print(f"[#0EA5E9]✅ {page} created[/#0EA5E9]")
-                            create_file_from_route(page, body, dest)
-                        except Exception:
-                            console.print_exception()
+        with sink_of(dest) as sink:
+            await self.build_into(sink)
+
+    async def build_into(self, sink: Sink) -> None:
+        """
+        Build the static site into a sink
+
+        Arguments
+        ---------
+        sink: Sink
+            The sink receiving the files
+
+        Returns
+        -------
+        None
+        """
+        if self.bundler is not None:
+            self.bundler.build()
+        for route, path in self.server.items():
+            mod = await load_server(path)
+            if mod:
+                self.modules[route] = mod
+        await run_lifespan_hooks(self.on_startup, list(self.modules.values()), "startup", self.state)
+        try:
+            async for pageAndData in self.get_templates_with_data():
+                for page, (template, data) in pageAndData.items():
+                    body = self.templates.source(template)
+                    if body:
+                        if data:
+                            _body = render_template(self.templates.get(template), data)
+                            if isinstance(_body, Exception):
+                                raise _body
+                            if self.minify:
+                                _body = minify_html_cached(_body, self.cache)
+                            try:
+                                sink.write(path_of_route(page), _body.encode("utf-8"))
+                                sink.write(data_path_of(page).lstrip("/"), dumps(data))
+                                console.print(f"[#0EA5E9]✅ {page} created[/#0EA5E9]")
+                            except Exception:
+                                console.print_exception()
+                        else:
+                            if self.minify:
+                                body = minify_html_cached(body, self.cache)
+                            try:
+                                console.print(f"[#0EA5E9]✅ {page} created[/#0EA5E9]")
+                                sink.write(path_of_route(page), body.encode("utf-8"))
+                            except Exception:
+                                console.print_exception()
+        finally:
+            await run_lifespan_hooks(self.on_shutdown, list(self.modules.values()), "shutdown", self.state)
         try:
             console.print("[#8B5CF6 bold]🔨 Copying static files[/#8B5CF6 bold]")
-            copy_static_files_to(self.static, dest / "static")
+            sink.copy_tree(self.static, "static")
         except Exception:
             console.print_exception()
         finally:
             console.print("[#0EA5E9 bold]✅ Copied static[/#0EA5E9 bold]")
         try:
             console.print("[#8B5CF6 bold]🔨 Copying scripts[/#8B5CF6 bold]")
-            copy_static_files_to(self.scripts, dest / "scripts")
+            sink.copy_tree(self.scripts, "scripts")
         except Exception:
             console.print_exception()
         finally:
             console.print("[#0EA5E9 bold]✅ Copied scripts[/#0EA5E9 bold]")
         try:
             console.print("[#8B5CF6 bold]🔨 Copying styles[/#8B5CF6 bold]")
-            copy_static_files_to(self.styles, dest / "styles")
+            sink.copy_tree(self.styles, "styles")
         except Exception:
             console.print_exception()
         finally:
             console.print("[#0EA5E9 bold]✅ Copied styles[/#0EA5E9 bold]")
+        if self.bundler is not None:
+            try:
+                console.print("[#8B5CF6 bold]🔨 Writing bundles[/#8B5CF6 bold]")
+                self.bundler.write(sink)
+            except Exception:
+                console.print_exception()
+            finally:
+                console.print("[#0EA5E9 bold]✅ Wrote bundles[/#0EA5E9 bold]")
+        fragments = self.templates.fragments.stats()
+        if fragments["hits"] or fragments["misses"]:
+            console.print(
+                f"[#0EA5E9]✅ Fragment cache: {fragments['hits']} hits, {fragments['misses']} misses, "
+                f"{fragments['hit_rate']:.0%} hit rate[/#0EA5E9]"
+            )
         console.print("[#8B5CF6 bold]\n✅ Build complete\n[/#8B5CF6 bold]")
         console.print("[#FACC15 bold]⚠ Make sure to fix the srcs and hrefs of scripts and stlyes[/#FACC15 bold]")
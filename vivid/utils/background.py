@@ -0,0 +1,169 @@
+import asyncio
+import inspect
+import typing as t
+from collections.abc import Callable
+from functools import partial
+
+from rich.console import Console
+
+__all__: tuple[str, ...] = ("Background",)
+
+console = Console()
+
+
+class Background:
+    """
+    Background class to run tasks after the response has been sent
+
+    Arguments
+    ---------
+    limit: int
+        Number of tasks running at the same time
+    queue: int
+        Number of tasks allowed to wait for a slot, tasks scheduled when it is full are dropped
+
+    Attributes
+    ----------
+    limit: int
+        Number of tasks running at the same time
+    queue: int
+        Number of tasks allowed to wait for a slot
+    tasks: set[asyncio.Task[None]]
+        Tasks running or waiting for a slot
+    semaphore: asyncio.Semaphore | None
+        Slots of the running tasks, created in the event loop of the first task
+    closed: bool
+        Whether the tasks are being drained, new tasks are dropped
+    running: int
+        Number of tasks holding a slot
+    completed: int
+        Number of tasks that finished
+    failed: int
+        Number of tasks that raised an exception
+    dropped: int
+        Number of tasks dropped because the queue was full or the server was stopping
+    cancelled: int
+        Number of tasks cancelled because they did not finish while draining
+
+    Notes
+    -----
+    Async functions run in the event loop, sync functions in a thread so they never block
+    the requests being served. Exceptions are printed and counted, they never reach the
+    request that scheduled the task.
+    """
+
+    def __init__(self, limit: int = 16, queue: int = 1024) -> None:
+        self.limit = limit
+        self.queue = queue
+        self.tasks: set[asyncio.Task[None]] = set()
+        self.semaphore: asyncio.Semaphore | None = None
+        self.closed = False
+        self.running = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.cancelled = 0
+
+    def schedule(self, func: Callable[..., t.Any], *args: t.Any, **kwargs: t.Any) -> bool:
+        """
+        Schedule a task
+
+        Arguments
+        ---------
+        func: collections.abc.Callable[..., typing.Any]
+            The sync or async function to call
+        *args: typing.Any
+            Positional arguments for the function
+        **kwargs: typing.Any
+            Keyword arguments for the function
+
+        Returns
+        -------
+        bool
+            Whether the task was scheduled, False when it was dropped
+        """
+        if self.closed or len(self.tasks) >= self.limit + self.queue:
+            self.dropped += 1
+            console.print(f"[bold yellow]⚠ background task {getattr(func, '__name__', func)!r} dropped[/bold yellow]")
+            return False
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.limit)
+        task = asyncio.ensure_future(self.run(partial(func, *args, **kwargs)))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return True
+
+    async def run(self, func: Callable[[], t.Any]) -> None:
+        """
+        Run a task once a slot is free
+
+        Arguments
+        ---------
+        func: collections.abc.Callable[[], typing.Any]
+            The task with its arguments bound
+
+        Returns
+        -------
+        None
+        """
+        assert self.semaphore is not None
+        async with self.semaphore:
+            self.running += 1
+            try:
+                if inspect.iscoroutinefunction(func):
+                    await func()
+                else:
+                    result = await asyncio.to_thread(func)
+                    if inspect.isawaitable(result):
+                        await result
+                self.completed += 1
+            except Exception:
+                self.failed += 1
+                console.print_exception()
+            finally:
+                self.running -= 1
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """
+        Stop accepting tasks and wait for the scheduled ones
+
+        Arguments
+        ---------
+        timeout: float | None
+            Seconds to wait before cancelling the tasks left, None to wait for all of them
+
+        Returns
+        -------
+        None
+        """
+        self.closed = True
+        if not self.tasks:
+            return
+        _, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        self.cancelled += len(pending)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the statistics of the background tasks
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, int]
+            Limit, running and waiting tasks, completed, failed, dropped and cancelled counts
+        """
+        return {
+            "limit": self.limit,
+            "running": self.running,
+            "queued": len(self.tasks) - self.running,
+            "completed": self.completed,
+            "failed": self.failed,
+            "dropped": self.dropped,
+            "cancelled": self.cancelled,
+        }
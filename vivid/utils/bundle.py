@@ -0,0 +1,555 @@
+import fnmatch
+import hashlib
+import json
+import re
+import typing as t
+from dataclasses import dataclass
+from pathlib import Path
+
+from vivid.utils.sink import Sink
+
+__all__: tuple[str, ...] = ("DEFAULT_BUNDLES", "BUNDLES_DIR", "Segment", "minify_source", "Bundle", "Bundler")
+
+DEFAULT_BUNDLES: dict[str, list[str]] = {"main": ["*.js", "*.css"]}
+BUNDLES_DIR: str = "__bundles"
+KINDS: dict[str, tuple[str, str]] = {"js": ("/scripts", "text/javascript"), "css": ("/styles", "text/css")}
+REGEX_AFTER = set("(,=:[!&|?{};+-*%<>~^")
+REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "instanceof", "new", "delete", "void", "throw"}
+JS_PUNCTUATION = set("{}()[];,:=<>+-*/%&|^!~?.\"'`")
+CSS_PUNCTUATION = set("{};,>")
+CSS_STATEMENT_END = re.compile(r"[{};]")
+
+
+@dataclass()
+class Segment:
+    """
+    Segment class describing minified code and where it comes from
+
+    Arguments
+    ---------
+    line: int
+        Zero based line of the source the segment starts at
+    column: int
+        Zero based column of the source the segment starts at
+    text: str
+        The minified code
+    """
+
+    line: int
+    column: int
+    text: str
+
+
+def is_word(char: str) -> bool:
+    """
+    Check if a character can be part of a javascript identifier or number
+
+    Arguments
+    ---------
+    char: str
+        The character
+
+    Returns
+    -------
+    bool
+        Whether the character is part of a word
+    """
+    return char.isalnum() or char in "_$#" or ord(char) > 127
+
+
+def is_declaration(source: str, index: int) -> bool:
+    """
+    Check if a colon inside a css block separates a property from its value
+
+    Arguments
+    ---------
+    source: str
+        The source code
+    index: int
+        The index of the colon
+
+    Returns
+    -------
+    bool
+        Whether the colon ends before a ``;`` or ``}``, a nested selector is followed by ``{``
+    """
+    end = CSS_STATEMENT_END.search(source, index)
+    return end is None or end.group() != "{"
+
+
+def minify_source(source: str, kind: t.Literal["js"] | t.Literal["css"]) -> list[Segment]:
+    """
+    Remove comments and insignificant whitespace from javascript or css
+
+    Arguments
+    ---------
+    source: str
+        The source code
+    kind: typing.Literal["js"] | typing.Literal["css"]
+        The language of the source
+
+    Returns
+    -------
+    list[Segment]
+        The minified code split where the source has a line break
+
+    Notes
+    -----
+    Line breaks are kept in javascript, where automatic semicolon insertion makes them
+    significant, and removed from css. Whitespace around a css colon is only removed in
+    declarations, in a selector ``a :hover`` and ``a:hover`` differ. Strings, template
+    literals and regex literals are copied as they are.
+    """
+    segments: list[Segment] = []
+    buffer: list[str] = []
+    start: tuple[int, int] | None = None
+    line, column = 0, 0
+    last, last_word, pending_space, tight = "", "", False, False
+    depth = 0
+    punctuation = JS_PUNCTUATION if kind == "js" else CSS_PUNCTUATION
+    length = len(source)
+    index = 0
+
+    def emit(text: str, position: tuple[int, int]) -> None:
+        nonlocal start, pending_space, tight
+        if pending_space and last and text and not tight:
+            first = text[0]
+            keep = is_word(last) and is_word(first)
+            if kind == "js":
+                keep = keep or (last in "+-" and first in "+-") or (last == "/" and first == "/")
+                keep = keep or (last.isdigit() and first == ".")
+            else:
+                keep = keep or (last not in punctuation and first not in punctuation)
+            if keep:
+                buffer.append(" ")
+        pending_space, tight = False, False
+        if start is None:
+            start = position
+        buffer.append(text)
+
+    def flush() -> None:
+        nonlocal start
+        if buffer and start is not None:
+            segments.append(Segment(start[0], start[1], "".join(buffer)))
+        buffer.clear()
+        start = None
+
+    def advance(count: int) -> str:
+        nonlocal index, line, column
+        text = source[index : index + count]
+        for char in text:
+            if char == "\n":
+                line += 1
+                column = 0
+            else:
+                column += 1
+        index += count
+        return text
+
+    while index < length:
+        position = (line, column)
+        char = source[index]
+        following = source[index + 1] if index + 1 < length else ""
+        if char == "\n":
+            advance(1)
+            if kind == "js":
+                flush()
+                pending_space = False
+            else:
+                flush()
+                pending_space = True
+        elif char in " \t\r\f\v":
+            advance(1)
+            pending_space = True
+        elif char == "/" and following == "*":
+            end = source.find("*/", index + 2)
+            end = length if end == -1 else end + 2
+            had_newline = "\n" in source[index:end]
+            advance(end - index)
+            if had_newline and kind == "js":
+                flush()
+            pending_space = True
+        elif char == "/" and following == "/" and kind == "js":
+            end = source.find("\n", index)
+            advance((length if end == -1 else end) - index)
+        elif char in "\"'" or (char == "`" and kind == "js"):
+            end = index + 1
+            while end < length and source[end] != char:
+                if source[end] == "\\":
+                    end += 1
+                elif source[end] == "\n" and char != "`":
+                    break
+                end += 1
+            text = source[index : end + 1]
+            pieces = text.split("\n")
+            for number, piece in enumerate(pieces):
+                if number:
+                    advance(1)
+                    flush()
+                emit(piece, (line, column))
+                advance(len(piece))
+            last, last_word = char, ""
+        elif (
+            char == "/"
+            and kind == "js"
+            and (last == "" or last in REGEX_AFTER or last == "}" or last_word in REGEX_KEYWORDS)
+        ):
+            end, in_class = index + 1, False
+            while end < length and source[end] != "\n":
+                if source[end] == "\\":
+                    end += 1
+                elif source[end] == "[":
+                    in_class = True
+                elif source[end] == "]":
+                    in_class = False
+                elif source[end] == "/" and not in_class:
+                    break
+                end += 1
+            emit(advance(end + 1 - index), position)
+            last, last_word = "/", ""
+        elif is_word(char):
+            end = index + 1
+            while end < length and is_word(source[end]):
+                end += 1
+            word = advance(end - index)
+            emit(word, position)
+            last, last_word = word[-1], word
+        elif kind == "css" and char == ":" and depth and is_declaration(source, index):
+            pending_space = False
+            emit(advance(1), position)
+            last, last_word, tight = char, "", True
+        else:
+            if kind == "css" and char in "{}":
+                depth = depth + 1 if char == "{" else max(0, depth - 1)
+            emit(advance(1), position)
+            last, last_word = char, ""
+    flush()
+    return segments
+
+
+def vlq(value: int) -> str:
+    """
+    Encode a number as a base64 vlq used by source maps
+
+    Arguments
+    ---------
+    value: int
+        The number
+
+    Returns
+    -------
+    str
+        The encoded number
+    """
+    alphabet = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+    value = (-value << 1) | 1 if value < 0 else value << 1
+    encoded = ""
+    while True:
+        digit = value & 31
+        value >>= 5
+        encoded += alphabet[digit | 32 if value else digit]
+        if not value:
+            return encoded
+
+
+@dataclass()
+class Bundle:
+    """
+    Bundle class holding a built bundle
+
+    Arguments
+    ---------
+    name: str
+        Name of the bundle
+    kind: typing.Literal["js"] | typing.Literal["css"]
+        Language of the bundle
+    body: bytes
+        The bundled code
+    map: bytes
+        The source map of the bundle
+    hash: str
+        Hash of the bundled code, used to bust caches
+    """
+
+    name: str
+    kind: t.Literal["js"] | t.Literal["css"]
+    body: bytes
+    map: bytes
+    hash: str
+
+    @property
+    def path(self) -> str:
+        """
+        The url path of the bundle
+        """
+        return f"{KINDS[self.kind][0]}/{BUNDLES_DIR}/{self.name}.{self.kind}"
+
+    @property
+    def url(self) -> str:
+        """
+        The url of the bundle with its hash as version
+        """
+        return f"{self.path}?v={self.hash}"
+
+
+class Bundler:
+    """
+    Bundler class to concatenate and minify scripts and styles
+
+    Arguments
+    ---------
+    scripts: dict[str, Path]
+        Dictionary of routes and their corresponding scripts
+    styles: dict[str, Path]
+        Dictionary of routes and their corresponding styles
+    bundles: dict[str, list[str]] | None
+        Names of the bundles and glob patterns of the files they contain, matched against
+        the routes without their leading slash, ``.js`` patterns select scripts and ``.css``
+        patterns select styles, defaults to one shared ``main`` bundle of every file
+    minify: bool
+        Whether to minify the bundled code
+
+    Attributes
+    ----------
+    bundles: dict[str, list[str]]
+        Names of the bundles and the patterns of the files they contain
+    built: dict[str, Bundle]
+        Built bundles keyed by their url path, source maps are keyed by ``<path>.map``
+
+    Notes
+    -----
+    A bundle is served at ``/scripts/__bundles/<name>.js`` or
+    ``/styles/__bundles/<name>.css`` with a source map next to it. Templates get a
+    ``bundle_url(name, kind)`` helper returning the url with the hash of the bundle.
+    """
+
+    def __init__(
+        self,
+        scripts: dict[str, Path],
+        styles: dict[str, Path],
+        bundles: dict[str, list[str]] | None = None,
+        minify: bool = True,
+    ) -> None:
+        self.scripts = scripts
+        self.styles = styles
+        self.bundles = bundles if bundles is not None else DEFAULT_BUNDLES
+        self.minify = minify
+        self.built: dict[str, Bundle] = {}
+        self.signature: tuple[tuple[str, float], ...] = ()
+
+    @staticmethod
+    def files_of(directory: Path, suffix: str) -> dict[str, Path]:
+        """
+        Collect the files of a directory keyed by route
+
+        Arguments
+        ---------
+        directory: Path
+            The scripts or styles directory
+        suffix: str
+            The suffix of the files
+
+        Returns
+        -------
+        dict[str, Path]
+            Dictionary of routes and their corresponding files
+        """
+        if not directory.is_dir():
+            return {}
+        return {"/" + file.relative_to(directory).as_posix(): file for file in sorted(directory.rglob(f"*{suffix}"))}
+
+    def current_signature(self) -> tuple[tuple[str, float], ...]:
+        """
+        Get the modification times of every input file
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        tuple[tuple[str, float], ...]
+            Paths and modification times of the files
+        """
+        files = sorted({**self.scripts, **self.styles}.values())
+        return tuple((str(file), file.stat().st_mtime) for file in files if file.exists())
+
+    def build(self) -> dict[str, Bundle]:
+        """
+        Build every bundle
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, Bundle]
+            Built bundles keyed by their url path
+        """
+        built: dict[str, Bundle] = {}
+        for name, patterns in self.bundles.items():
+            for kind, files in (("js", self.scripts), ("css", self.styles)):
+                selected: list[str] = []
+                for pattern in patterns:
+                    if not pattern.endswith("." + kind):
+                        continue
+                    for route in sorted(files):
+                        if route not in selected and fnmatch.fnmatch(route.lstrip("/"), pattern):
+                            selected.append(route)
+                if selected:
+                    bundle = self.bundle(name, t.cast(t.Literal["js", "css"], kind), {r: files[r] for r in selected})
+                    built[bundle.path] = bundle
+        self.built = built
+        self.signature = self.current_signature()
+        return built
+
+    def refresh(self) -> None:
+        """
+        Rebuild the bundles when an input file changed
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.current_signature() != self.signature:
+            self.build()
+
+    def bundle(self, name: str, kind: t.Literal["js"] | t.Literal["css"], files: dict[str, Path]) -> Bundle:
+        """
+        Concatenate files into a bundle with its source map
+
+        Arguments
+        ---------
+        name: str
+            Name of the bundle
+        kind: typing.Literal["js"] | typing.Literal["css"]
+            Language of the bundle
+        files: dict[str, Path]
+            Routes and paths of the files in bundle order
+
+        Returns
+        -------
+        Bundle
+            The bundle
+
+        Notes
+        -----
+        Javascript files are always separated by a ``;`` line, so a file ending without a
+        semicolon never runs into the expression the next one starts with.
+        """
+        prefix = KINDS[kind][0]
+        lines: list[str] = [""]
+        mappings: list[list[str]] = [[]]
+        column = 0
+        previous = (0, 0, 0)
+        sources, contents = [], []
+        started = False
+        for source_index, (route, path) in enumerate(files.items()):
+            source = path.read_text(encoding="utf-8")
+            sources.append(prefix + route)
+            contents.append(source)
+            if self.minify:
+                segments = minify_source(source, kind)
+            else:
+                segments = [Segment(number, 0, text) for number, text in enumerate(source.split("\n"))]
+            for segment in segments:
+                # every segment starts at a line break of its source, even an empty one
+                # inside a template literal, so it gets a line of its own
+                if (kind == "js" or not self.minify) and started:
+                    lines.append("")
+                    mappings.append([])
+                    column = 0
+                started = True
+                generated = len(lines[-1])
+                mappings[-1].append(
+                    vlq(generated - column)
+                    + vlq(source_index - previous[0])
+                    + vlq(segment.line - previous[1])
+                    + vlq(segment.column - previous[2])
+                )
+                column = generated
+                previous = (source_index, segment.line, segment.column)
+                lines[-1] += segment.text
+            if kind == "js" and started:
+                # a line of its own so a trailing line comment can not swallow it
+                lines.append(";")
+                mappings.append([])
+                column = 0
+        body = "\n".join(lines)
+        digest = hashlib.blake2b(body.encode("utf-8"), digest_size=8).hexdigest()
+        filename = f"{name}.{kind}"
+        if kind == "js":
+            body += f"\n//# sourceMappingURL={filename}.map\n"
+        else:
+            body += f"\n/*# sourceMappingURL={filename}.map */\n"
+        source_map = {
+            "version": 3,
+            "file": filename,
+            "sources": sources,
+            "sourcesContent": contents,
+            "names": [],
+            "mappings": ";".join(",".join(line) for line in mappings),
+        }
+        return Bundle(name, kind, body.encode("utf-8"), json.dumps(source_map).encode("utf-8"), digest)
+
+    def url(self, name: str, kind: t.Literal["js"] | t.Literal["css"]) -> str:
+        """
+        Get the versioned url of a bundle, registered as ``bundle_url`` in templates
+
+        Arguments
+        ---------
+        name: str
+            Name of the bundle
+        kind: typing.Literal["js"] | typing.Literal["css"]
+            Language of the bundle
+
+        Returns
+        -------
+        str
+            The url of the bundle
+        """
+        path = f"{KINDS[kind][0]}/{BUNDLES_DIR}/{name}.{kind}"
+        bundle = self.built.get(path)
+        return bundle.url if bundle else path
+
+    def get(self, route: str) -> tuple[bytes, str, str] | None:
+        """
+        Get a bundle or a source map by its url path
+
+        Arguments
+        ---------
+        route: str
+            The url path
+
+        Returns
+        -------
+        tuple[bytes, str, str] | None
+            The content, its content type and the hash of the bundle or None
+        """
+        if route.endswith(".map"):
+            bundle = self.built.get(route[: -len(".map")])
+            return (bundle.map, "application/json", bundle.hash) if bundle else None
+        bundle = self.built.get(route)
+        return (bundle.body, KINDS[bundle.kind][1], bundle.hash) if bundle else None
+
+    def write(self, sink: Sink) -> None:
+        """
+        Write every bundle and its source map
+
+        Arguments
+        ---------
+        sink: Sink
+            The sink receiving the output of the build
+
+        Returns
+        -------
+        None
+        """
+        for path, bundle in self.built.items():
+            sink.write(path.lstrip("/"), bundle.body)
+            sink.write(path.lstrip("/") + ".map", bundle.map)
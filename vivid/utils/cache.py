@@ -0,0 +1,438 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import typing as t
+from collections import OrderedDict
+from pathlib import Path
+
+__all__: tuple[str, ...] = ("Cache", "LRUCache", "SQLiteCache", "pack_response", "unpack_response")
+
+
+class Cache(t.Protocol):
+    """
+    Cache protocol implemented by the in-process and the shared caches
+    """
+
+    def get(self, key: str) -> str | bytes | None: ...
+
+    def set(self, key: str, value: str | bytes, ttl: float | None = None) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def stats(self) -> dict[str, t.Any]: ...
+
+
+class LRUCache:
+    """
+    LRUCache class to keep rendered output in memory
+
+    Arguments
+    ---------
+    max_size: int
+        Memory budget in bytes, least recently used entries are evicted above it
+
+    Attributes
+    ----------
+    max_size: int
+        Memory budget in bytes
+    size: int
+        Bytes used by the cached values, str values count as their utf-8 encoding
+    hits: int
+        Number of lookups that found a fresh value
+    misses: int
+        Number of lookups that found nothing or an expired value
+    """
+
+    def __init__(self, max_size: int = 32 * 1024 * 1024) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries: OrderedDict[str, tuple[str | bytes, float | None, int]] = OrderedDict()
+
+    def get(self, key: str) -> str | bytes | None:
+        """
+        Get a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+
+        Returns
+        -------
+        str | bytes | None
+            The value or None if it is missing or expired
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires, _ = entry
+        if expires is not None and expires <= time.monotonic():
+            self.delete(key)
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str | bytes, ttl: float | None = None) -> None:
+        """
+        Set a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+        value: str | bytes
+            The value
+        ttl: float | None
+            Seconds after which the value expires, None keeps it until it is evicted
+
+        Returns
+        -------
+        None
+        """
+        size = len(value.encode("utf-8")) if isinstance(value, str) else len(value)
+        if size > self.max_size:
+            return
+        self.delete(key)
+        self.entries[key] = (value, time.monotonic() + ttl if ttl is not None else None, size)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.size -= evicted
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+
+        Returns
+        -------
+        None
+        """
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of the cache
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Entries, used bytes, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "size": self.size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SQLiteCache:
+    """
+    SQLiteCache class to share rendered output between the workers of a host
+
+    Arguments
+    ---------
+    path: Path
+        The database file, created when it does not exist
+    max_size: int
+        Memory budget in bytes, least recently used entries are evicted above it
+    busy_timeout: float
+        Seconds to wait for a lock held by another process before giving up
+
+    Attributes
+    ----------
+    path: Path
+        The database file
+    max_size: int
+        Memory budget in bytes
+    busy_timeout: float
+        Seconds to wait for a lock held by another process
+    hits: int
+        Number of lookups of this process that found a fresh value
+    misses: int
+        Number of lookups of this process that found nothing or an expired value
+    contended: int
+        Number of operations of this process given up because the database was locked
+
+    Notes
+    -----
+    The database runs in WAL mode so readers never wait for a writer, every update is a
+    transaction and triggers keep the total size up to date for every process. The time
+    of the last access is only written once per second per entry to keep hits read only.
+    Each process opens its own connection on first use, so the cache can be created
+    before the workers fork. The cache is used from the event loop, so a lock held by
+    another process is only waited for a few milliseconds, a lookup that times out is a
+    miss and a write that times out is skipped.
+    """
+
+    ACCESS_RESOLUTION: float = 1.0
+
+    def __init__(self, path: Path, max_size: int = 256 * 1024 * 1024, busy_timeout: float = 0.005) -> None:
+        self.path = path
+        self.max_size = max_size
+        self.busy_timeout = busy_timeout
+        self.hits = 0
+        self.misses = 0
+        self.contended = 0
+        self.lock = threading.Lock()
+        self.pid: int | None = None
+        self.conn: sqlite3.Connection | None = None
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get the connection of the current process, creating the schema on first use
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        sqlite3.Connection
+            The connection
+        """
+        if self.conn is not None and self.pid == os.getpid():
+            return self.conn
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                text INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                expires REAL,
+                accessed REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+            CREATE TABLE IF NOT EXISTS meta (id INTEGER PRIMARY KEY CHECK (id = 0), size INTEGER NOT NULL);
+            INSERT OR IGNORE INTO meta VALUES (0, 0);
+            CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries
+                BEGIN UPDATE meta SET size = size + new.size; END;
+            CREATE TRIGGER IF NOT EXISTS entries_update AFTER UPDATE OF size ON entries
+                BEGIN UPDATE meta SET size = size + new.size - old.size; END;
+            CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries
+                BEGIN UPDATE meta SET size = size - old.size; END;
+            """
+        )
+        conn.execute(f"PRAGMA busy_timeout = {max(1, int(self.busy_timeout * 1000))}")
+        self.conn, self.pid = conn, os.getpid()
+        return conn
+
+    def get(self, key: str) -> str | bytes | None:
+        """
+        Get a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+
+        Returns
+        -------
+        str | bytes | None
+            The value or None if it is missing, expired or the database is locked
+        """
+        now = time.time()
+        with self.lock:
+            try:
+                conn = self.connection()
+                row = conn.execute(
+                    "SELECT value, text, expires, accessed FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None or (row[2] is not None and row[2] <= now):
+                    if row is not None:
+                        conn.execute("DELETE FROM entries WHERE key = ? AND expires <= ?", (key, now))
+                    self.misses += 1
+                    return None
+                if now - row[3] > self.ACCESS_RESOLUTION:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError:
+                self.contended += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+        value: bytes = row[0]
+        return value.decode("utf-8") if row[1] else value
+
+    def set(self, key: str, value: str | bytes, ttl: float | None = None) -> None:
+        """
+        Set a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+        value: str | bytes
+            The value
+        ttl: float | None
+            Seconds after which the value expires, None keeps it until it is evicted
+
+        Returns
+        -------
+        None
+        """
+        data = value.encode("utf-8") if isinstance(value, str) else value
+        if len(data) > self.max_size:
+            return
+        now = time.time()
+        with self.lock:
+            try:
+                conn = self.connection()
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError:
+                self.contended += 1
+                return
+            try:
+                conn.execute(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "value = excluded.value, text = excluded.text, size = excluded.size, "
+                    "expires = excluded.expires, accessed = excluded.accessed",
+                    (key, data, isinstance(value, str), len(data), now + ttl if ttl is not None else None, now),
+                )
+                if conn.execute("SELECT size FROM meta").fetchone()[0] > self.max_size:
+                    self.evict(conn, now)
+                conn.execute("COMMIT")
+            except sqlite3.OperationalError:
+                conn.execute("ROLLBACK")
+                self.contended += 1
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """
+        Evict the expired entries, then the least recently used ones until the budget is met
+
+        Arguments
+        ---------
+        conn: sqlite3.Connection
+            The connection, inside a transaction
+        now: float
+            The current time
+
+        Returns
+        -------
+        None
+        """
+        conn.execute("DELETE FROM entries WHERE expires <= ?", (now,))
+        while conn.execute("SELECT size FROM meta").fetchone()[0] > self.max_size:
+            conn.execute("DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT 16)")
+
+    def delete(self, key: str) -> None:
+        """
+        Delete a value
+
+        Arguments
+        ---------
+        key: str
+            The key of the value
+
+        Returns
+        -------
+        None
+        """
+        with self.lock:
+            try:
+                self.connection().execute("DELETE FROM entries WHERE key = ?", (key,))
+            except sqlite3.OperationalError:
+                self.contended += 1
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of the cache
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Entries and used bytes shared by every process, hits, misses, hit rate and
+            contended operations of this one
+        """
+        with self.lock:
+            conn = self.connection()
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = conn.execute("SELECT size FROM meta").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "contended": self.contended,
+        }
+
+
+def pack_response(status: int, headers: list[list[str | bytes]], body: str | bytes) -> bytes:
+    """
+    Serialize a response to store it in a cache
+
+    Arguments
+    ---------
+    status: int
+        The status code
+    headers: list[list[str | bytes]]
+        The headers
+    body: str | bytes
+        The body
+
+    Returns
+    -------
+    bytes
+        A json line with the status and headers followed by the body
+    """
+    head = {
+        "status": status,
+        "headers": [
+            [part.decode("latin-1") if isinstance(part, bytes) else part for part in header] for header in headers
+        ],
+    }
+    return json.dumps(head).encode("utf-8") + b"\n" + (body.encode("utf-8") if isinstance(body, str) else body)
+
+
+def unpack_response(data: str | bytes) -> tuple[int, list[list[str | bytes]], bytes]:
+    """
+    Deserialize a response stored by ``pack_response``
+
+    Arguments
+    ---------
+    data: str | bytes
+        The stored response
+
+    Returns
+    -------
+    tuple[int, list[list[str | bytes]], bytes]
+        The status code, headers and body
+    """
+    raw = data.encode("utf-8") if isinstance(data, str) else data
+    head, _, body = raw.partition(b"\n")
+    meta = json.loads(head)
+    headers: list[list[str | bytes]] = [[part.encode("latin-1") for part in header] for header in meta["headers"]]
+    return meta["status"], headers, body
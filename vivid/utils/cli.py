@@ -1,16 +1,265 @@
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
 import typing as t
+import urllib.error
 import urllib.request
 import zipfile
-from io import BytesIO
 from pathlib import Path
 
 from rich import print
-from rich.progress import wrap_file
+from rich.progress import Progress
 
-__all__: tuple[str, ...] = ("fetch_template",)
+__all__: tuple[str, ...] = ("TEMPLATE_SOURCE", "cache_dir", "fetch_template")
 
+TEMPLATE_SOURCE: str = "https://github.com/navithecoderboi/vivid-templates/archive/refs/heads/{type}.zip"
+CHUNK_SIZE: int = 64 * 1024
 
-def fetch_template(type: t.Literal["SSR"] | t.Literal["SSG"], dest: Path) -> None:
+
+def cache_dir() -> Path:
+    """
+    Get the directory caching the template archives
+
+    Arguments
+    ---------
+    None
+
+    Returns
+    -------
+    Path
+        ``$VIVID_CACHE_DIR`` when it is set, otherwise ``vivid/templates`` in the user cache directory
+    """
+    if os.environ.get("VIVID_CACHE_DIR"):
+        return Path(os.environ["VIVID_CACHE_DIR"])
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "vivid" / "templates"
+
+
+def file_hash(path: Path) -> str:
+    """
+    Hash a file without reading it in memory at once
+
+    Arguments
+    ---------
+    path: Path
+        The path to the file
+
+    Returns
+    -------
+    str
+        The sha256 of the file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def url_of(type: t.Literal["SSR"] | t.Literal["SSG"], source: str | None = None) -> str:
+    """
+    Get the url of a template archive
+
+    Arguments
+    ---------
+    type: Literal["SSR", "SSG"]
+        The type of template
+    source: str | None
+        Url with a ``{type}`` placeholder or a local directory holding ``ssr.zip`` and
+        ``ssg.zip``, defaults to ``$VIVID_TEMPLATE_SOURCE`` and then the vivid-templates repository
+
+    Returns
+    -------
+    str
+        The url of the archive
+    """
+    source = source or os.environ.get("VIVID_TEMPLATE_SOURCE") or TEMPLATE_SOURCE
+    if Path(source).is_dir():
+        return (Path(source).resolve() / f"{type.lower()}.zip").as_uri()
+    return source.format(type=type.lower())
+
+
+class TemplateCache:
+    """
+    TemplateCache class to keep downloaded template archives on disk
+
+    Arguments
+    ---------
+    root: Path
+        The cache directory
+
+    Attributes
+    ----------
+    root: Path
+        The cache directory
+    index: dict[str, dict[str, typing.Any]]
+        Archive file, sha256, etag and fetch time of every cached url
+
+    Notes
+    -----
+    Archives are stored under their sha256 so a new version of a template never replaces
+    a file being read, the index points every url to its latest version and the version
+    it replaces is deleted once no url points to it.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = root
+        try:
+            self.index: dict[str, dict[str, t.Any]] = json.loads((root / "index.json").read_text())
+        except (OSError, ValueError):
+            self.index = {}
+
+    def get(self, url: str) -> Path | None:
+        """
+        Get the cached archive of a url, checking its integrity
+
+        Arguments
+        ---------
+        url: str
+            The url of the archive
+
+        Returns
+        -------
+        Path | None
+            The archive or None if it is missing or corrupted
+        """
+        entry = self.index.get(url)
+        if not entry:
+            return None
+        path: Path = self.root / entry["file"]
+        if not path.is_file() or file_hash(path) != entry["sha256"]:
+            return None
+        return path
+
+    def etag(self, url: str) -> str | None:
+        """
+        Get the etag of the cached archive of a url
+
+        Arguments
+        ---------
+        url: str
+            The url of the archive
+
+        Returns
+        -------
+        str | None
+            The etag or None
+        """
+        etag: str | None = self.index.get(url, {}).get("etag")
+        return etag
+
+    def put(self, url: str, tmp: Path, sha256: str, etag: str | None) -> Path:
+        """
+        Move a downloaded archive into the cache
+
+        Arguments
+        ---------
+        url: str
+            The url of the archive
+        tmp: Path
+            The downloaded file, in the cache directory
+        sha256: str
+            The sha256 of the file
+        etag: str | None
+            The etag sent by the server
+
+        Returns
+        -------
+        Path
+            The cached archive
+        """
+        path = self.root / f"{sha256}.zip"
+        os.replace(tmp, path)
+        old = self.index.get(url, {}).get("file")
+        self.index[url] = {"file": path.name, "sha256": sha256, "etag": etag, "fetched": int(time.time())}
+        self.save()
+        if old and all(entry["file"] != old for entry in self.index.values()):
+            # an archive still open elsewhere keeps its data until it is closed
+            with contextlib.suppress(OSError):
+                (self.root / old).unlink()
+        return path
+
+    def save(self) -> None:
+        """
+        Write the index atomically
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.index, f, indent=2)
+        os.replace(tmp, self.root / "index.json")
+
+
+def download(url: str, cache: TemplateCache, type: str) -> Path | None:
+    """
+    Download an archive into the cache, streaming it to disk
+
+    Arguments
+    ---------
+    url: str
+        The url of the archive
+    cache: TemplateCache
+        The cache
+    type: str
+        The type of template, shown in the progress bar
+
+    Returns
+    -------
+    Path | None
+        The cached archive, None when the cached archive is still current
+
+    Raises
+    ------
+    urllib.error.URLError
+        If the archive can not be downloaded
+    """
+    req = urllib.request.Request(url)
+    req.add_header("Accept", "application/vnd.github.v3+json")
+    etag = cache.etag(url)
+    if etag and cache.get(url):
+        req.add_header("If-None-Match", etag)
+    cache.root.mkdir(parents=True, exist_ok=True)
+    try:
+        with urllib.request.urlopen(req) as response:
+            size = response.headers.get("Content-Length")
+            digest = hashlib.sha256()
+            fd, tmp = tempfile.mkstemp(dir=cache.root, suffix=".zip.tmp")
+            try:
+                with os.fdopen(fd, "wb") as f, Progress() as progress:
+                    task = progress.add_task(
+                        f"[rgb(6,182,212)]Downloading {type} template...[rgb(6,182,212)]",
+                        total=int(size) if size else None,
+                    )
+                    while chunk := response.read(CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+                        progress.advance(task, len(chunk))
+                return cache.put(url, Path(tmp), digest.hexdigest(), response.headers.get("ETag"))
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None
+        raise
+
+
+def fetch_template(
+    type: t.Literal["SSR"] | t.Literal["SSG"],
+    dest: Path,
+    offline: bool = False,
+    source: str | None = None,
+) -> None:
     """
     Fetches the template from the vivid-templates repository.
 
@@ -20,6 +269,10 @@ def fetch_template(type: t.Literal["SSR"] | t.Literal["SSG"], dest: Path) -> Non
         The type of template to fetch.
     dest : Path
         The destination where the template should be extracted.
+    offline : bool
+        Whether to only use the local cache of templates.
+    source : str | None
+        Url with a ``{type}`` placeholder or local directory to fetch the template from.
 
     Raises
     ------
@@ -29,23 +282,30 @@ def fetch_template(type: t.Literal["SSR"] | t.Literal["SSG"], dest: Path) -> Non
         If the zip file is corrupted.
     Exception
         If any other error occurs.
+
+    Notes
+    -----
+    Downloads are cached in ``cache_dir()`` with their sha256 and revalidated with their
+    etag. When the network is unavailable the cached archive is used.
     """
     try:
-        username = "navithecoderboi"
-        repository = "vivid-templates"
-        url = f"https://github.com/{username}/{repository}/archive/refs/heads/{type.lower()}.zip"
-        req = urllib.request.Request(url)
-        req.add_header("Accept", "application/vnd.github.v3+json")
-        with urllib.request.urlopen(req) as response:
-            size = int(response.headers["Content-Length"])
-            with wrap_file(
-                response,
-                size,
-                description=f"[rgb(6,182,212)]Downloading {type} template...[rgb(6,182,212)]",
-            ) as file:
-                data = file.read()
-                with zipfile.ZipFile(BytesIO(data)) as zip_ref:
-                    zip_ref.extractall(dest)
+        url = url_of(type, source)
+        cache = TemplateCache(cache_dir())
+        archive = cache.get(url)
+        if offline:
+            if archive is None:
+                raise FileNotFoundError(f"no cached {type} template for {url}, run once without --offline")
+        else:
+            try:
+                archive = download(url, cache, type) or archive
+            except (urllib.error.URLError, OSError) as e:
+                if archive is None:
+                    raise
+                print(f"[bold yellow]Warning:[/bold yellow] {e}, using the cached template")
+        assert archive is not None
+        # members are streamed from the archive on disk
+        with zipfile.ZipFile(archive) as zip_ref:
+            zip_ref.extractall(dest)
     except Exception as e:
         print(f"[bold red]Error:[/bold red] {e}")
         print("[bold magenta italic]Try running the '--help' flag for more information.")
@@ -1,3 +1,7 @@
+import inspect
+import os
+import re
+import tempfile
 import typing as t
 from collections.abc import Callable
 from importlib import util
@@ -9,8 +13,15 @@ from rich import print
 __all__: tuple[str, ...] = (
     "send_response",
     "check_if_accepts_arg",
+    "run_callable",
     "load_mod",
-    "create_file_from_route",
+    "path_of_route",
+    "has_params",
+    "fill_route",
+    "match_route",
+    "write_file_atomic",
+    "get_header",
+    "is_html",
     "vlog",
 )
 
@@ -61,6 +72,30 @@ def check_if_accepts_arg(func: Callable[..., t.Any], arg: str) -> bool:
     return arg in func.__code__.co_varnames
 
 
+async def run_callable(func: Callable[..., t.Any], *args: t.Any, **kwargs: t.Any) -> t.Any:
+    """
+    Call a function and await its result if it is awaitable
+
+    Arguments
+    ---------
+    func: typing.Callable[..., typing.Any]
+        The sync or async function to call
+    *args: typing.Any
+        Positional arguments for the function
+    **kwargs: typing.Any
+        Keyword arguments for the function
+
+    Returns
+    -------
+    typing.Any
+        The result of the function
+    """
+    result = func(*args, **kwargs)
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
 def load_mod(path: Path) -> ModuleType | None:
     """
     Load a module from a path
@@ -84,31 +119,178 @@ def load_mod(path: Path) -> ModuleType | None:
         return None
 
 
-def create_file_from_route(route: str, template: str, dest: Path) -> None:
+def path_of_route(route: str) -> str:
     """
-    Create a file from a route
+    Get the relative path of the html file of a route
 
     Arguments
     ---------
     route: str
-        The route of the file
-    template: str
-        The template of the file
-    dest: Path
-        The destination to create the file
+        The route of the page
 
     Returns
     -------
-    None
+    str
+        The relative path of the file, ``/`` maps to ``index.html``
     """
-    parts = route.split("/")[1:]
-    filename = "/".join(parts) + ".html"
     if route == "/":
-        filename = "index.html"
-    (dest / filename).parent.mkdir(parents=True, exist_ok=True)
-    (dest / filename).touch(exist_ok=True)
-    with open(dest / filename, "w") as f:
-        f.write(template)
+        return "index.html"
+    return "/".join(route.split("/")[1:]) + ".html"
+
+
+ROUTE_PARAM = re.compile(r"\[(\w+)\]")
+
+
+def has_params(route: str) -> bool:
+    """
+    Check if a route has params, like ``/products/[id]``
+
+    Arguments
+    ---------
+    route: str
+        The route of the page
+
+    Returns
+    -------
+    bool
+        Whether the route has params
+    """
+    return ROUTE_PARAM.search(route) is not None
+
+
+def fill_route(route: str, params: dict[str, t.Any]) -> str:
+    """
+    Replace the params of a route by their values
+
+    Arguments
+    ---------
+    route: str
+        The route of the page, like ``/products/[id]``
+    params: dict[str, typing.Any]
+        The value of every param of the route
+
+    Returns
+    -------
+    str
+        The route with the values, like ``/products/42``
+
+    Raises
+    ------
+    KeyError
+        If a param of the route has no value
+    ValueError
+        If a value is empty, a dot segment or contains a slash
+    """
+
+    def value_of(match: re.Match[str]) -> str:
+        value = str(params[match.group(1)])
+        if "/" in value or value in ("", ".", ".."):
+            raise ValueError(f"invalid value {value!r} for param {match.group(1)} of {route}")
+        return value
+
+    return ROUTE_PARAM.sub(value_of, route)
+
+
+def match_route(route: str, path: str) -> dict[str, str] | None:
+    """
+    Match a path against a route with params, the reverse of ``fill_route``
+
+    Arguments
+    ---------
+    route: str
+        The route of the page, like ``/products/[id]``
+    path: str
+        The requested path, like ``/products/42``
+
+    Returns
+    -------
+    dict[str, str] | None
+        The value of every param of the route, None if the path does not match it
+    """
+    parts: list[str] = []
+    last = 0
+    for param in ROUTE_PARAM.finditer(route):
+        parts.append(re.escape(route[last : param.start()]))
+        parts.append(f"(?P<{param.group(1)}>[^/]+)")
+        last = param.end()
+    parts.append(re.escape(route[last:]))
+    match = re.fullmatch("".join(parts), path)
+    if match is None:
+        return None
+    params = match.groupdict()
+    if any(value in (".", "..") for value in params.values()):
+        return None
+    return params
+
+
+def write_file_atomic(path: Path, data: bytes) -> None:
+    """
+    Write a file atomically, readers either see the old or the new content
+
+    Arguments
+    ---------
+    path: Path
+        The path of the file
+    data: bytes
+        The content of the file
+
+    Returns
+    -------
+    None
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def get_header(scope: dict[str, t.Any], name: str) -> str | None:
+    """
+    Get a request header from the scope
+
+    Arguments
+    ---------
+    scope: dict[str, typing.Any]
+        The scope of the request
+    name: str
+        The lowercase name of the header
+
+    Returns
+    -------
+    str | None
+        The value of the header or None
+    """
+    key = name.encode("latin-1")
+    for header, value in scope.get("headers", []):
+        if header == key:
+            return value.decode("latin-1")  # type: ignore[no-any-return]
+    return None
+
+
+def is_html(headers: list[list[str | bytes]]) -> bool:
+    """
+    Check if response headers describe an html body
+
+    Arguments
+    ---------
+    headers: list[list[str | bytes]]
+        The headers of the response
+
+    Returns
+    -------
+    bool
+        Whether the content type is html, a response without content type counts as html
+    """
+    for name, value in headers:
+        if (name.encode() if isinstance(name, str) else name).lower() == b"content-type":
+            return b"html" in (value.encode() if isinstance(value, str) else value).lower()
+    return True
 
 
 def vlog(type: t.Literal["fail"] | t.Literal["success"], scope: t.Any, code: int) -> None:
@@ -131,7 +313,5 @@ def vlog(type: t.Literal["fail"] | t.Literal["success"], scope: t.Any, code: int
     print(
         ("[#2DD4BF]" if type == "success" else "[#F43F5E]")
         + f"{'✅' if type == 'success' else '❌'} {scope['client'][0]}:{scope['client'][1]} code: {code} {scope['method']} {scope['path']}"
-        + "[/#2DD4BF]"
-        if type == "success"
-        else "[/#F43F5E]"
+        + ("[/#2DD4BF]" if type == "success" else "[/#F43F5E]")
     )
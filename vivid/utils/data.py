@@ -0,0 +1,152 @@
+import hashlib
+import json
+import math
+import typing as t
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
+__all__: tuple[str, ...] = (
+    "DATA_PREFIX",
+    "dumps",
+    "etag_of",
+    "etag_matches",
+    "data_path_of",
+    "route_of_data_path",
+)
+
+DATA_PREFIX: str = "/__data"
+# keys and values orjson would encode on its own go through ``default=str`` like with json
+ORJSON_OPTIONS: int = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS if orjson else 0
+)
+
+
+def dumps(data: t.Any) -> bytes:
+    """
+    Serialize data to json bytes, using orjson when the ``json`` extra is installed
+
+    Arguments
+    ---------
+    data: typing.Any
+        The data to serialize
+
+    Returns
+    -------
+    bytes
+        The serialized data, utf-8 without escapes and with ``null`` for NaN and infinities
+
+    Notes
+    -----
+    Both encoders give the same bytes for the same data, so etags do not depend on
+    whether orjson is installed.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str, option=ORJSON_OPTIONS)
+    try:
+        encoded = json.dumps(data, separators=(",", ":"), default=str, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        encoded = json.dumps(finite(data), separators=(",", ":"), default=str, ensure_ascii=False)
+    return encoded.encode("utf-8")
+
+
+def finite(data: t.Any) -> t.Any:
+    """
+    Replace NaN and infinities by None, like orjson encodes them
+
+    Arguments
+    ---------
+    data: typing.Any
+        The data to serialize
+
+    Returns
+    -------
+    typing.Any
+        The data with every non-finite float of its dicts, lists and tuples replaced
+    """
+    if isinstance(data, float) and not math.isfinite(data):
+        return None
+    if isinstance(data, dict):
+        return {key: finite(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [finite(value) for value in data]
+    return data
+
+
+def etag_of(body: bytes) -> str:
+    """
+    Create a strong etag for a body
+
+    Arguments
+    ---------
+    body: bytes
+        The body of the response
+
+    Returns
+    -------
+    str
+        The quoted etag
+    """
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(etag: str, if_none_match: str | None) -> bool:
+    """
+    Check if an etag matches an ``if-none-match`` header
+
+    Arguments
+    ---------
+    etag: str
+        The quoted etag of the current response
+    if_none_match: str | None
+        The value of the ``if-none-match`` request header
+
+    Returns
+    -------
+    bool
+        Whether the client already has the current response
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+def data_path_of(route: str) -> str:
+    """
+    Get the path of the data endpoint of a route
+
+    Arguments
+    ---------
+    route: str
+        The route of the page
+
+    Returns
+    -------
+    str
+        The path of the data endpoint, ``/`` maps to ``/__data/index.json``
+    """
+    return f"{DATA_PREFIX}/index.json" if route == "/" else f"{DATA_PREFIX}{route}.json"
+
+
+def route_of_data_path(path: str) -> str | None:
+    """
+    Get the route of a data endpoint path
+
+    Arguments
+    ---------
+    path: str
+        The path of the data endpoint
+
+    Returns
+    -------
+    str | None
+        The route of the page or None if the path is not a data endpoint
+    """
+    if not path.startswith(DATA_PREFIX + "/") or not path.endswith(".json"):
+        return None
+    route = path[len(DATA_PREFIX) : -len(".json")]
+    return "/" if route == "/index" else route
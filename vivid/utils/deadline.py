@@ -0,0 +1,117 @@
+import asyncio
+import typing as t
+from collections.abc import Awaitable, Callable
+
+__all__: tuple[str, ...] = ("Deadlines",)
+
+
+class Deadlines:
+    """
+    Deadlines class to stop the work of requests that took too long or whose client left
+
+    Arguments
+    ---------
+    timeout: float | None
+        Seconds a request has to start its response, None for no deadline
+
+    Attributes
+    ----------
+    timeout: float | None
+        Seconds a request has to start its response
+    cancelled: int
+        Number of requests cancelled because the client disconnected
+    timed_out: int
+        Number of requests cancelled because they missed their deadline
+    """
+
+    def __init__(self, timeout: float | None = None) -> None:
+        self.timeout = timeout
+        self.cancelled = 0
+        self.timed_out = 0
+
+    async def run(
+        self,
+        handler: Callable[[Callable[..., t.Any], Callable[..., t.Any]], Awaitable[None]],
+        receive: Callable[..., t.Any],
+        send: Callable[..., t.Any],
+        timeout: float | None = None,
+    ) -> t.Literal["done", "cancelled", "timeout"]:
+        """
+        Run a handler until it finishes, misses its deadline or the client disconnects
+
+        Arguments
+        ---------
+        handler: collections.abc.Callable[..., collections.abc.Awaitable[None]]
+            The handler, called with the receive and send functions it has to use
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+        timeout: float | None
+            Seconds the handler has to start its response, None for no deadline
+
+        Returns
+        -------
+        typing.Literal["done", "cancelled", "timeout"]
+            How the handler ended, the caller has to answer a timeout itself
+
+        Notes
+        -----
+        Once the handler has read the request body, ``receive`` is watched for
+        ``http.disconnect``. The deadline stops applying when the response has started,
+        after that only a disconnect cancels the handler. Early hints do not start the response.
+        """
+        received = asyncio.Event()
+        started = False
+
+        async def guarded_receive() -> t.Any:
+            message = await receive()
+            if not message.get("more_body", False):
+                received.set()
+            return message
+
+        async def guarded_send(message: dict[str, t.Any]) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        async def watch() -> None:
+            await received.wait()
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        task = asyncio.ensure_future(handler(guarded_receive, guarded_send))
+        watcher = asyncio.ensure_future(watch())
+        try:
+            while True:
+                done, _ = await asyncio.wait({task, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if task in done:
+                    task.result()
+                    return "done"
+                if watcher in done:
+                    self.cancelled += 1
+                    return "cancelled"
+                if not started:
+                    self.timed_out += 1
+                    return "timeout"
+                timeout = None
+        finally:
+            for pending in (task, watcher):
+                pending.cancel()
+            await asyncio.gather(task, watcher, return_exceptions=True)
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of the deadlines
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Default deadline, cancelled and timed out counts
+        """
+        return {"timeout": self.timeout, "cancelled": self.cancelled, "timed_out": self.timed_out}
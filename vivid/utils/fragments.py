@@ -0,0 +1,77 @@
+import hashlib
+import typing as t
+from collections.abc import Callable
+
+import jinja2
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from vivid.utils.cache import Cache, LRUCache
+
+__all__: tuple[str, ...] = ("FragmentCacheExtension",)
+
+FRAGMENT_CACHE_SIZE: int = 8 * 1024 * 1024
+SHARED_FRAGMENT_CACHE_SIZE: int = 64 * 1024 * 1024
+
+
+class FragmentCacheExtension(Extension):
+    """
+    FragmentCacheExtension class to cache the output of parts of a template
+
+    Arguments
+    ---------
+    environment: jinja2.Environment
+        The environment the extension is added to
+
+    Notes
+    -----
+    ``{% cache key %}...{% endcache %}`` renders its body once and reuses the output for
+    every render with the same key, ``{% cache key, ttl %}`` expires it after ``ttl``
+    seconds. Fragments are kept in ``environment.fragment_cache``, an ``LRUCache`` with a
+    memory budget unless another cache is set. The cache key includes the template, the
+    line and a hash of the body, so editing a block never serves its old output.
+    """
+
+    tags = {"cache"}
+
+    def __init__(self, environment: jinja2.Environment) -> None:
+        super().__init__(environment)
+        environment.extend(fragment_cache=LRUCache(FRAGMENT_CACHE_SIZE))
+
+    def parse(self, parser: t.Any) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        key = parser.parse_expression()
+        ttl = parser.parse_expression() if parser.stream.skip_if("comma") else nodes.Const(None)
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        version = hashlib.blake2b(repr(body).encode("utf-8"), digest_size=8).hexdigest()
+        prefix = nodes.Const(f"fragment:{parser.name}:{lineno}:{version}:")
+        return nodes.CallBlock(self.call_method("cached", [prefix, key, ttl]), [], [], body).set_lineno(lineno)
+
+    def cached(self, prefix: str, key: t.Any, ttl: float | None, caller: Callable[[], str]) -> Markup:
+        """
+        Get the output of a block from the cache or render it
+
+        Arguments
+        ---------
+        prefix: str
+            The part of the cache key identifying the block
+        key: typing.Any
+            The key given to the block
+        ttl: float | None
+            Seconds after which the output expires, None keeps it until it is evicted
+        caller: collections.abc.Callable[[], str]
+            Renders the body of the block
+
+        Returns
+        -------
+        markupsafe.Markup
+            The output, already escaped when the environment escapes
+        """
+        cache: Cache = self.environment.fragment_cache  # type: ignore[attr-defined]
+        name = prefix + str(key)
+        output = cache.get(name)
+        if not isinstance(output, str):
+            output = str(caller())
+            cache.set(name, output, ttl)
+        return Markup(output)
@@ -0,0 +1,194 @@
+import re
+import typing as t
+from collections.abc import Iterator
+
+import jinja2
+from jinja2 import meta, nodes
+
+__all__: tuple[str, ...] = ("ASSET_PREFIXES", "find_preloads", "link_of")
+
+ASSET_PREFIXES: tuple[str, ...] = ("/styles/", "/scripts/", "/static/")
+DYNAMIC: str = "\x00"
+TAG = re.compile(r"<(link|script)\b([^>]*)>", re.IGNORECASE)
+ATTR = re.compile(r"""([\w-]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?""")
+FONTS: tuple[str, ...] = (".woff2", ".woff", ".ttf", ".otf")
+
+
+def link_of(url: str, kind: str, rel: str = "preload") -> bytes:
+    """
+    Format the value of a ``link`` header preloading an asset
+
+    Arguments
+    ---------
+    url: str
+        The url of the asset
+    kind: str
+        The ``as`` of the preload, ignored for ``modulepreload``
+    rel: str
+        ``preload`` or ``modulepreload``
+
+    Returns
+    -------
+    bytes
+        The link, for example ``</styles/main.css>; rel=preload; as=style``
+    """
+    if rel == "modulepreload":
+        return f"<{url}>; rel=modulepreload".encode()
+    link = f"<{url}>; rel=preload; as={kind}"
+    if kind == "font":
+        link += "; crossorigin"
+    return link.encode()
+
+
+def attributes_of(tag: str) -> dict[str, str]:
+    """
+    Parse the attributes of an html tag
+
+    Arguments
+    ---------
+    tag: str
+        The attributes part of the tag
+
+    Returns
+    -------
+    dict[str, str]
+        Lowercased names mapped to their values, an empty value for bare attributes
+    """
+    return {match[1].lower(): match[2] or match[3] or match[4] or "" for match in ATTR.finditer(tag)}
+
+
+def is_asset(url: str) -> bool:
+    """
+    Check if a url is a static reference to a local asset
+
+    Arguments
+    ---------
+    url: str
+        The url
+
+    Returns
+    -------
+    bool
+        Whether the url starts with an asset prefix and has no template expression in it
+    """
+    return url.startswith(ASSET_PREFIXES) and DYNAMIC not in url and not any(c.isspace() for c in url)
+
+
+def skeleton_of(ast: nodes.Template, globals: dict[str, t.Any]) -> str:
+    """
+    Get the markup of a template without rendering it
+
+    Arguments
+    ---------
+    ast: jinja2.nodes.Template
+        The parsed template
+    globals: dict[str, typing.Any]
+        The globals of the environment, used to resolve ``bundle_url`` with constant arguments
+
+    Returns
+    -------
+    str
+        The template data of every output, expressions replaced by a marker so urls built
+        at render time are never preloaded
+    """
+    parts: list[str] = []
+    bundle_url = globals.get("bundle_url")
+    for output in ast.find_all(nodes.Output):
+        for node in output.nodes:
+            if isinstance(node, nodes.TemplateData):
+                parts.append(node.data)
+            elif (
+                callable(bundle_url)
+                and isinstance(node, nodes.Call)
+                and isinstance(node.node, nodes.Name)
+                and node.node.name == "bundle_url"
+                and not node.kwargs
+                and all(isinstance(arg, nodes.Const) for arg in node.args)
+            ):
+                parts.append(str(bundle_url(*(t.cast(nodes.Const, arg).value for arg in node.args))))
+            else:
+                parts.append(DYNAMIC)
+        parts.append(DYNAMIC)
+    return "".join(parts)
+
+
+def preloads_of(markup: str) -> Iterator[bytes]:
+    """
+    Find the stylesheets, scripts and preloads of some markup
+
+    Arguments
+    ---------
+    markup: str
+        The markup of a template
+
+    Yields
+    ------
+    bytes
+        The link preloading every asset
+    """
+    for match in TAG.finditer(markup):
+        attrs = attributes_of(match[2])
+        if match[1].lower() == "script":
+            url = attrs.get("src", "")
+            if is_asset(url):
+                if attrs.get("type", "").lower() == "module":
+                    yield link_of(url, "script", "modulepreload")
+                else:
+                    yield link_of(url, "script")
+            continue
+        url = attrs.get("href", "")
+        rel = attrs.get("rel", "").lower().split()
+        if not is_asset(url):
+            continue
+        if "stylesheet" in rel:
+            yield link_of(url, "style")
+        elif "modulepreload" in rel:
+            yield link_of(url, "script", "modulepreload")
+        elif "preload" in rel and attrs.get("as"):
+            yield link_of(url, attrs["as"])
+        elif "preload" in rel and url.lower().endswith(FONTS):
+            yield link_of(url, "font")
+
+
+def find_preloads(env: jinja2.Environment, name: str) -> list[bytes]:
+    """
+    Find the assets a page references by analysing its template and the ones it uses
+
+    Arguments
+    ---------
+    env: jinja2.Environment
+        The environment of the template
+    name: str
+        The name of the template
+
+    Returns
+    -------
+    list[bytes]
+        The links preloading the assets, without duplicates, in document order with the
+        assets of extended and included templates first
+
+    Notes
+    -----
+    Only urls under ``/styles``, ``/scripts`` and ``/static`` written in the template,
+    or bundles referenced with ``bundle_url`` and constant arguments, are found. Images
+    are left out so the preloads never compete with the stylesheets for bandwidth.
+    """
+    links: list[bytes] = []
+    seen: set[str] = set()
+
+    def visit(name: str) -> None:
+        seen.add(name)
+        try:
+            source = env.loader.get_source(env, name)[0] if env.loader else ""
+            ast = env.parse(source, name)
+        except (jinja2.TemplateError, OSError):
+            return
+        for ref in meta.find_referenced_templates(ast):
+            if ref is not None and ref not in seen:
+                visit(ref)
+        for link in preloads_of(skeleton_of(ast, env.globals)):
+            if link not in links:
+                links.append(link)
+
+    visit(name)
+    return links
@@ -1,19 +1,22 @@
-import shutil
+import inspect
 import typing as t
+from collections.abc import AsyncGenerator, Callable
 from pathlib import Path
 from types import ModuleType
 
 import jinja2
 
-from vivid.utils.common import check_if_accepts_arg, load_mod
+from vivid.utils.common import check_if_accepts_arg, load_mod, run_callable
+from vivid.utils.fragments import FragmentCacheExtension
 
 __all__: tuple[str, ...] = (
     "return_template",
     "render_template",
-    "copy_static_files_to",
     "load_server",
     "get_load_data",
     "get_static_load_data",
+    "get_paths",
+    "run_lifespan_hooks",
 )
 
 
@@ -38,14 +41,14 @@ def return_template(template: Path) -> str | None:
         return None
 
 
-def render_template(template: str, data: dict[str, t.Any]) -> str | Exception:
+def render_template(template: str | jinja2.Template, data: dict[str, t.Any]) -> str | Exception:
     """
     Render the template
 
     Arguments
     ---------
-    template: str
-        The template
+    template: str | jinja2.Template
+        The source of the template or a compiled template
     data: dict[str, typing.Any]
         The data to render the template
 
@@ -55,32 +58,12 @@ def render_template(template: str, data: dict[str, t.Any]) -> str | Exception:
         The rendered template or an exception
     """
     try:
-        env = jinja2.Template(template)
+        env = jinja2.Template(template, extensions=[FragmentCacheExtension]) if isinstance(template, str) else template
         return env.render(**data)
     except Exception as e:
         return e
 
 
-def copy_static_files_to(path: Path, dest: Path) -> None:
-    """
-    Copy the static files to the destination
-
-    Arguments
-    ---------
-    path: Path
-        The path to the static files
-    dest: Path
-        The destination to copy the files to
-
-    Returns
-    -------
-    None
-    """
-    if path.exists() and path.is_dir():
-        shutil.copytree(path, dest, dirs_exist_ok=True)
-        return
-
-
 async def load_server(page: Path) -> ModuleType | None:
     """
     Load the server file
@@ -102,7 +85,9 @@ async def load_server(page: Path) -> ModuleType | None:
         return None
 
 
-async def get_load_data(mod: ModuleType, receive: dict[str, t.Any]) -> t.Any | None:
+async def get_load_data(
+    mod: ModuleType, receive: dict[str, t.Any], state: dict[str, t.Any] | None = None
+) -> t.Any | None:
     """
     Get the data from the load function
 
@@ -110,6 +95,10 @@ async def get_load_data(mod: ModuleType, receive: dict[str, t.Any]) -> t.Any | N
     ---------
     mod: ModuleType
         The loaded module
+    receive: dict[str, typing.Any]
+        The message received from the client
+    state: dict[str, typing.Any] | None
+        The app scoped state created by the startup hooks
 
     Returns
     -------
@@ -117,21 +106,19 @@ async def get_load_data(mod: ModuleType, receive: dict[str, t.Any]) -> t.Any | N
         The data from the load function
     """
     if hasattr(mod, "load"):
+        kwargs: dict[str, t.Any] = {}
         if check_if_accepts_arg(mod.load, "receive"):
-            try:
-                return await mod.load(receive=receive)
-            except TypeError:
-                return mod.load(receive=receive)
-        else:
-            try:
-                return await mod.load()
-            except TypeError:
-                return mod.load()
+            kwargs["receive"] = receive
+        if state is not None and check_if_accepts_arg(mod.load, "state"):
+            kwargs["state"] = state
+        return await run_callable(mod.load, **kwargs)
     else:
         return None
 
 
-async def get_static_load_data(mod: ModuleType) -> t.Any | None:
+async def get_static_load_data(
+    mod: ModuleType, state: dict[str, t.Any] | None = None, params: dict[str, t.Any] | None = None
+) -> t.Any | None:
     """
     Get the data from the load function
 
@@ -139,6 +126,10 @@ async def get_static_load_data(mod: ModuleType) -> t.Any | None:
     ---------
     mod: ModuleType
         The loaded module
+    state: dict[str, typing.Any] | None
+        The app scoped state created by the startup hooks
+    params: dict[str, typing.Any] | None
+        The params of the page, yielded by the ``paths`` function of the module
 
     Returns
     -------
@@ -146,9 +137,79 @@ async def get_static_load_data(mod: ModuleType) -> t.Any | None:
         The data from the load function
     """
     if hasattr(mod, "load"):
-        try:
-            return await mod.load()
-        except TypeError:
-            return mod.load()
+        kwargs: dict[str, t.Any] = {}
+        if state is not None and check_if_accepts_arg(mod.load, "state"):
+            kwargs["state"] = state
+        if params is not None and check_if_accepts_arg(mod.load, "params"):
+            kwargs["params"] = params
+        return await run_callable(mod.load, **kwargs)
     else:
         return None
+
+
+async def get_paths(mod: ModuleType, state: dict[str, t.Any] | None = None) -> AsyncGenerator[dict[str, t.Any], None]:
+    """
+    Get the params of every page generated from a parameterised route
+
+    Arguments
+    ---------
+    mod: ModuleType
+        The loaded module exporting ``paths``
+    state: dict[str, typing.Any] | None
+        The app scoped state created by the startup hooks
+
+    Yields
+    ------
+    dict[str, typing.Any]
+        The params of a page
+
+    Notes
+    -----
+    ``paths`` can be an async generator, a generator or return any iterable, the params
+    are pulled one at a time so a generator never has to hold every page in memory.
+    """
+    kwargs: dict[str, t.Any] = {}
+    if state is not None and check_if_accepts_arg(mod.paths, "state"):
+        kwargs["state"] = state
+    paths = mod.paths(**kwargs)
+    if inspect.isawaitable(paths):
+        paths = await paths
+    if hasattr(paths, "__aiter__"):
+        async for params in paths:
+            yield params
+    else:
+        for params in paths:
+            yield params
+
+
+async def run_lifespan_hooks(
+    hooks: list[Callable[..., t.Any]], mods: list[ModuleType], name: str, state: dict[str, t.Any]
+) -> None:
+    """
+    Run the app hooks and the hooks exported by the server modules
+
+    Arguments
+    ---------
+    hooks: list[typing.Callable[..., typing.Any]]
+        The hooks registered on the app
+    mods: list[ModuleType]
+        The loaded server modules
+    name: str
+        The name of the hook exported by the server modules, ``startup`` or ``shutdown``
+    state: dict[str, typing.Any]
+        The app scoped state passed to every hook
+
+    Returns
+    -------
+    None
+
+    Notes
+    -----
+    Startup runs the app hooks before the module hooks, shutdown runs them in reverse order
+    so resources are closed after everything depending on them.
+    """
+    funcs = list(hooks) + [getattr(mod, name) for mod in mods if callable(getattr(mod, name, None))]
+    if name == "shutdown":
+        funcs.reverse()
+    for func in funcs:
+        await run_callable(func, state)
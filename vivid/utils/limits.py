@@ -0,0 +1,210 @@
+import asyncio
+import typing as t
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+__all__: tuple[str, ...] = ("Limiter", "Limits")
+
+
+class Limiter:
+    """
+    Limiter class to bound the number of requests in flight
+
+    Arguments
+    ---------
+    limit: int
+        Number of requests handled at the same time
+    queue: int
+        Number of requests allowed to wait for a slot, the others are shed
+
+    Attributes
+    ----------
+    limit: int
+        Number of requests handled at the same time
+    queue: int
+        Number of requests allowed to wait for a slot
+    active: int
+        Number of requests in flight
+    waiters: collections.deque[asyncio.Future[None]]
+        Requests waiting for a slot, in arrival order
+    admitted: int
+        Number of requests that got a slot
+    shed: int
+        Number of requests rejected because the queue was full
+    peak: int
+        Highest number of waiting requests seen
+    """
+
+    def __init__(self, limit: int, queue: int = 64) -> None:
+        self.limit = limit
+        self.queue = queue
+        self.active = 0
+        self.waiters: deque[asyncio.Future[None]] = deque()
+        self.admitted = 0
+        self.shed = 0
+        self.peak = 0
+
+    async def acquire(self) -> bool:
+        """
+        Wait for a slot
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        bool
+            Whether a slot was acquired, False when the queue is full
+        """
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+        if len(self.waiters) >= self.queue:
+            self.shed += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters.append(waiter)
+        self.peak = max(self.peak, len(self.waiters))
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right before the cancellation
+                self.release()
+            elif waiter in self.waiters:
+                # release may already have dropped the cancelled waiter
+                self.waiters.remove(waiter)
+            raise
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        """
+        Release a slot, handing it over to the oldest waiting request
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get the statistics of the limiter
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, int]
+            Limit, requests in flight and waiting, admitted and shed counts
+        """
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self.waiters),
+            "peak_queued": self.peak,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
+
+
+class Limits:
+    """
+    Limits class to apply a global and per route concurrency limit to dynamic requests
+
+    Arguments
+    ---------
+    concurrency: int | None
+        Number of dynamic requests handled at the same time, None for no global limit
+    routes: dict[str, int] | None
+        Number of requests handled at the same time for some routes
+    queue: int
+        Number of requests allowed to wait for a slot at each limit
+    retry_after: int
+        Seconds sent in the ``retry-after`` header of a shed request
+
+    Attributes
+    ----------
+    limiter: Limiter | None
+        The global limiter
+    routes: dict[str, Limiter]
+        The limiter of every limited route
+    retry_after: int
+        Seconds sent in the ``retry-after`` header of a shed request
+
+    Notes
+    -----
+    A request first waits for its route, then for the global limit, so a slow route
+    queues on its own limit without holding global slots needed by the other routes.
+    """
+
+    def __init__(
+        self,
+        concurrency: int | None = None,
+        routes: dict[str, int] | None = None,
+        queue: int = 64,
+        retry_after: int = 1,
+    ) -> None:
+        self.limiter = Limiter(concurrency, queue) if concurrency is not None else None
+        self.routes = {route: Limiter(limit, queue) for route, limit in (routes or {}).items()}
+        self.retry_after = retry_after
+
+    @asynccontextmanager
+    async def admit(self, route: str) -> AsyncIterator[bool]:
+        """
+        Hold a slot of the route and global limits while handling a request
+
+        Arguments
+        ---------
+        route: str
+            The route of the request
+
+        Returns
+        -------
+        collections.abc.AsyncIterator[bool]
+            Whether the request was admitted, False when it has to be shed
+        """
+        limiters = [limiter for limiter in (self.routes.get(route), self.limiter) if limiter is not None]
+        acquired: list[Limiter] = []
+        try:
+            for limiter in limiters:
+                if not await limiter.acquire():
+                    break
+                acquired.append(limiter)
+            yield len(acquired) == len(limiters)
+        finally:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of every limiter
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Statistics of the global limiter and of every route
+        """
+        return {
+            "global": self.limiter.stats() if self.limiter is not None else None,
+            "routes": {route: limiter.stats() for route, limiter in self.routes.items()},
+        }
@@ -0,0 +1,135 @@
+import hashlib
+import re
+
+from vivid.utils.cache import Cache
+
+__all__: tuple[str, ...] = ("minify_html", "minify_html_cached")
+
+RAW_BLOCKS = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>.*?</\2\s*>)", re.IGNORECASE | re.DOTALL)
+COMMENTS = re.compile(r"<!--(?!\[if|<!|>).*?-->", re.DOTALL)
+# fmt: off
+BLOCK_TAGS: tuple[str, ...] = (
+    "!doctype", "address", "article", "aside", "base", "blockquote", "body", "br", "caption", "col",
+    "colgroup", "dd", "details", "dialog", "div", "dl", "dt", "fieldset", "figcaption", "figure", "footer",
+    "form", "h1", "h2", "h3", "h4", "h5", "h6", "head", "header", "hr", "html", "li", "link", "legend", "main",
+    "meta", "nav", "noscript", "ol", "optgroup", "option", "p", "section", "summary", "table", "tbody", "td",
+    "template", "tfoot", "th", "thead", "title", "tr", "ul",
+)
+# fmt: on
+# ascii only, a non-breaking space is significant
+WHITESPACE = "[ \\t\\n\\r\\f]"
+
+
+def trie_pattern(words: list[str]) -> str:
+    """
+    Build a regex alternation shaped like a trie, much faster to match than a flat one
+
+    Arguments
+    ---------
+    words: list[str]
+        The words to match
+
+    Returns
+    -------
+    str
+        The regex
+    """
+    groups: dict[str, list[str]] = {}
+    for word in words:
+        if word:
+            groups.setdefault(word[0], []).append(word[1:])
+    alternatives = [re.escape(char) + trie_pattern(rest) for char, rest in sorted(groups.items())]
+    if not alternatives:
+        return ""
+    pattern = alternatives[0] if len(alternatives) == 1 else "(?:" + "|".join(alternatives) + ")"
+    return f"(?:{pattern})?" if "" in words else pattern
+
+
+BLOCK = trie_pattern(list(BLOCK_TAGS))
+BETWEEN_TAGS = re.compile(rf">{WHITESPACE}+<")
+TEXT_WHITESPACE = re.compile(rf"(?:{WHITESPACE}{{2,}}|[\t\n\r\f])(?=[^<>]*(?:<|\Z))")
+BEFORE_BLOCK = re.compile(rf" (?=</?{BLOCK}[\s/>])")
+AFTER_BLOCK = re.compile(rf"(<(?=/?{BLOCK}[\s/>])[^>]*>) ")
+
+
+def minify_segment(html: str) -> str:
+    """
+    Minify html without raw text blocks
+
+    Arguments
+    ---------
+    html: str
+        The html
+
+    Returns
+    -------
+    str
+        The minified html
+    """
+    html = COMMENTS.sub("", html)
+    html = BETWEEN_TAGS.sub("> <", html)
+    html = TEXT_WHITESPACE.sub(" ", html)
+    html = BEFORE_BLOCK.sub("", html)
+    return AFTER_BLOCK.sub(r"\1", html)
+
+
+def minify_html(html: str) -> str:
+    """
+    Minify html by removing comments and insignificant whitespace
+
+    Arguments
+    ---------
+    html: str
+        The html
+
+    Returns
+    -------
+    str
+        The minified html
+
+    Notes
+    -----
+    The content of ``<pre>``, ``<textarea>``, ``<script>`` and ``<style>`` blocks is kept
+    as it is. Whitespace is collapsed to a single space and only removed around block
+    level tags, where the browser ignores it too, so inline spacing renders the same.
+    """
+    parts = RAW_BLOCKS.split(html)
+    out: list[str] = []
+    # split yields text, block, tag name, text, block, tag name, ...
+    for index in range(0, len(parts), 3):
+        out.append(minify_segment(parts[index]))
+        if index + 1 < len(parts):
+            out.append(parts[index + 1])
+    return "".join(out).strip()
+
+
+def minify_html_cached(html: str, cache: Cache, ttl: float | None = None) -> str:
+    """
+    Minify html, reusing the result for html that was already minified
+
+    Arguments
+    ---------
+    html: str
+        The html
+    cache: Cache
+        The cache of minified html, keyed by a hash of the input
+    ttl: float | None
+        Seconds the result is kept, None keeps it until it is evicted
+
+    Returns
+    -------
+    str
+        The minified html
+
+    Notes
+    -----
+    Only worth it for pages that render the same html again, like static or regenerated
+    pages, html that changes on every request should go through ``minify_html``.
+    """
+    key = "minify:" + hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+    cached = cache.get(key)
+    if isinstance(cached, str):
+        return cached
+    minified = minify_html(html)
+    cache.set(key, minified, ttl)
+    return minified
@@ -0,0 +1,86 @@
+import typing as t
+from collections.abc import Iterator
+
+__all__: tuple[str, ...] = ("page_params", "paginate")
+
+
+def page_count(total: int, size: int) -> int:
+    """
+    Get the number of pages needed for some items
+
+    Arguments
+    ---------
+    total: int
+        The number of items
+    size: int
+        The number of items per page
+
+    Returns
+    -------
+    int
+        The number of pages, at least one so an empty list still gets a page
+    """
+    return max(1, -(-total // size))
+
+
+def page_params(total: int, size: int, name: str = "page") -> Iterator[dict[str, int]]:
+    """
+    Generate the params of every page of a list, meant to be yielded by ``paths``
+
+    Arguments
+    ---------
+    total: int
+        The number of items
+    size: int
+        The number of items per page
+    name: str
+        The name of the route param, ``page`` for a ``[page].html`` file
+
+    Yields
+    ------
+    dict[str, int]
+        The params of a page, numbered from 1
+    """
+    for number in range(1, page_count(total, size) + 1):
+        yield {name: number}
+
+
+def paginate(total: int, size: int, number: int | str) -> dict[str, t.Any]:
+    """
+    Describe a page of a list, meant to be used by ``load(params)`` and the template
+
+    Arguments
+    ---------
+    total: int
+        The number of items
+    size: int
+        The number of items per page
+    number: int | str
+        The number of the page, numbered from 1, as found in the params
+
+    Returns
+    -------
+    dict[str, typing.Any]
+        The page number, size, total, page count, offset and limit of its items and the
+        numbers of the previous and next pages, None at the edges
+
+    Raises
+    ------
+    ValueError
+        If the number is not between 1 and the page count
+    """
+    number = int(number)
+    pages = page_count(total, size)
+    if not 1 <= number <= pages:
+        raise ValueError(f"page {number} is out of range, there are {pages} pages")
+    offset = (number - 1) * size
+    return {
+        "number": number,
+        "size": size,
+        "total": total,
+        "pages": pages,
+        "offset": offset,
+        "limit": min(size, total - offset),
+        "previous": number - 1 if number > 1 else None,
+        "next": number + 1 if number < pages else None,
+    }
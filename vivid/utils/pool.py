@@ -0,0 +1,609 @@
+import asyncio
+import multiprocessing
+import os
+import pickle
+import typing as t
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from types import ModuleType
+
+from rich.console import Console
+
+from vivid.utils.cache import SQLiteCache
+from vivid.utils.fragments import SHARED_FRAGMENT_CACHE_SIZE
+from vivid.utils.http import get_load_data, get_static_load_data, load_server, render_template, run_lifespan_hooks
+from vivid.utils.templates import TemplateStore
+
+__all__: tuple[str, ...] = ("ProcessPool", "pack", "stages_of", "unpack")
+
+STAGES: tuple[str, ...] = ("load", "render")
+OUT_OF_BAND: int = 1024 * 1024
+
+Packed = tuple[bytes, str | None, list[tuple[int, int]]]
+
+console = Console()
+worker: dict[str, t.Any] = {}
+
+
+def stages_of(mod: ModuleType | None) -> frozenset[str]:
+    """
+    Get the stages of a route that run in the process pool
+
+    Arguments
+    ---------
+    mod: ModuleType | None
+        The server module of the route
+
+    Returns
+    -------
+    frozenset[str]
+        ``load`` and ``render`` when the module exports ``cpu_bound = True``, the stages
+        it lists when it exports a list of them, none otherwise
+    """
+    stages = getattr(mod, "cpu_bound", False)
+    if stages is True:
+        return frozenset(STAGES)
+    if isinstance(stages, str):
+        stages = [stages]
+    if not isinstance(stages, (list, tuple, set, frozenset)):
+        return frozenset()
+    return frozenset(stage for stage in stages if stage in STAGES)
+
+
+def pack(obj: t.Any) -> Packed:
+    """
+    Pickle a result in a worker, moving its large buffers out of band
+
+    Arguments
+    ---------
+    obj: typing.Any
+        The result
+
+    Returns
+    -------
+    tuple[bytes, str | None, list[tuple[int, int]]]
+        The pickle, the shared memory holding the large buffers and their offsets and sizes
+
+    Notes
+    -----
+    Pickle protocol 5 hands ``pickle.PickleBuffer`` objects and numpy arrays to a callback
+    instead of copying them into the pickle. Buffers over ``OUT_OF_BAND`` bytes are
+    written once into a shared memory segment instead of going through the pipe of the
+    pool, the smaller ones stay in the pickle.
+    """
+    large: list[pickle.PickleBuffer] = []
+
+    def keep(buffer: pickle.PickleBuffer) -> bool:
+        if buffer.raw().nbytes < OUT_OF_BAND:
+            return True
+        large.append(buffer)
+        return False
+
+    payload = pickle.dumps(obj, protocol=5, buffer_callback=keep)
+    if not large:
+        return payload, None, []
+    layout: list[tuple[int, int]] = []
+    offset = 0
+    for buffer in large:
+        layout.append((offset, buffer.raw().nbytes))
+        offset += buffer.raw().nbytes
+    segment = SharedMemory(create=True, size=offset)
+    try:
+        for buffer, (start, size) in zip(large, layout):
+            segment.buf[start : start + size] = buffer.raw()
+    finally:
+        segment.close()
+    return payload, segment.name, layout
+
+
+def unpack(packed: Packed) -> t.Any:
+    """
+    Unpickle a result packed by a worker, releasing its shared memory
+
+    Arguments
+    ---------
+    packed: tuple[bytes, str | None, list[tuple[int, int]]]
+        The result of ``pack``
+
+    Returns
+    -------
+    typing.Any
+        The result, its buffers are copied out of the shared memory once
+    """
+    payload, name, layout = packed
+    if name is None:
+        return pickle.loads(payload)
+    segment = SharedMemory(name=name)
+    try:
+        buffers = [bytearray(segment.buf[start : start + size]) for start, size in layout]
+    finally:
+        segment.close()
+        segment.unlink()
+    return pickle.loads(payload, buffers=buffers)
+
+
+def release(future: Future[Packed]) -> None:
+    """
+    Free the shared memory of a result nobody is waiting for anymore
+
+    Arguments
+    ---------
+    future: concurrent.futures.Future[tuple[bytes, str | None, list[tuple[int, int]]]]
+        The call of a request that was cancelled, the segment is unlinked once it is done
+
+    Returns
+    -------
+    None
+    """
+    if future.cancelled() or future.exception() is not None:
+        return
+    name = future.result()[1]
+    if name is None:
+        return
+    try:
+        segment = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
+
+
+def init_worker(
+    root: Path,
+    compiled: Path | None,
+    server: dict[str, Path],
+    pages: dict[str, str],
+    cache: Path | None,
+    globals: dict[str, t.Any],
+) -> None:
+    """
+    Pre-warm a worker, loading the server modules and compiling the pages it runs
+
+    Arguments
+    ---------
+    root: Path
+        The pages directory
+    compiled: Path | None
+        Zip archive written by ``vivid compile``
+    server: dict[str, Path]
+        Server files of the routes run in the pool
+    pages: dict[str, str]
+        Template names of the routes run in the pool
+    cache: Path | None
+        SQLite database of the ``{% cache %}`` blocks shared with the server
+    globals: dict[str, typing.Any]
+        Globals of the templates, like ``bundle_url``
+
+    Returns
+    -------
+    None
+    """
+    loop = asyncio.new_event_loop()
+    templates = TemplateStore(
+        root, compiled, SQLiteCache(cache, SHARED_FRAGMENT_CACHE_SIZE) if cache is not None else None
+    )
+    templates.env.globals.update(globals)
+    modules: dict[str, ModuleType] = {}
+    for route, path in server.items():
+        mod = loop.run_until_complete(load_server(path))
+        if mod:
+            modules[route] = mod
+    state: dict[str, t.Any] = {}
+    loop.run_until_complete(run_lifespan_hooks([], list(modules.values()), "startup", state))
+    for name in pages.values():
+        templates.env.get_template(name)
+    worker.update(loop=loop, templates=templates, modules=modules, pages=pages, state=state)
+
+
+def warm() -> int:
+    """
+    Wait for a worker to be ready
+
+    Arguments
+    ---------
+    None
+
+    Returns
+    -------
+    int
+        The pid of the worker
+    """
+    return os.getpid()
+
+
+def run_load(route: str, message: dict[str, t.Any] | None) -> t.Any:
+    """
+    Run the ``load`` of a route in this worker
+
+    Arguments
+    ---------
+    route: str
+        The route
+    message: dict[str, typing.Any] | None
+        The message received from the client, None for a static load
+
+    Returns
+    -------
+    typing.Any
+        The response of ``load``, without its background tasks
+    """
+    mod = worker["modules"][route]
+    if message is None:
+        coro = get_static_load_data(mod, worker["state"])
+    else:
+        coro = get_load_data(mod, message, worker["state"])
+    data = worker["loop"].run_until_complete(coro)
+    if getattr(data, "background", None):
+        # the tasks are bound to this worker, they can not run after the response is sent
+        console.print(f"[bold yellow]⚠ background tasks of {route} dropped, load runs in a worker[/bold yellow]")
+        data.background = []
+    return data
+
+
+def run_render(route: str, body: dict[str, t.Any]) -> pickle.PickleBuffer:
+    """
+    Render the page of a route in this worker
+
+    Arguments
+    ---------
+    route: str
+        The route
+    body: dict[str, typing.Any]
+        The data of the template
+
+    Returns
+    -------
+    pickle.PickleBuffer
+        The html encoded as utf-8, wrapped so it is pickled out of band when it is large
+
+    Raises
+    ------
+    Exception
+        If rendering the template fails
+    """
+    rendered = render_template(worker["templates"].env.get_template(worker["pages"][route]), body)
+    if isinstance(rendered, Exception):
+        raise rendered
+    return pickle.PickleBuffer(rendered.encode("utf-8"))
+
+
+def load_in_worker(route: str, message: dict[str, t.Any] | None) -> Packed:
+    """
+    Run the ``load`` of a route in a worker
+
+    Arguments
+    ---------
+    route: str
+        The route
+    message: dict[str, typing.Any] | None
+        The message received from the client, None for a static load
+
+    Returns
+    -------
+    tuple[bytes, str | None, list[tuple[int, int]]]
+        The packed response of ``load``
+    """
+    return pack(run_load(route, message))
+
+
+def render_in_worker(route: str, body: dict[str, t.Any]) -> Packed:
+    """
+    Render the page of a route in a worker
+
+    Arguments
+    ---------
+    route: str
+        The route
+    body: dict[str, typing.Any]
+        The data of the template
+
+    Returns
+    -------
+    tuple[bytes, str | None, list[tuple[int, int]]]
+        The packed html, encoded as utf-8
+    """
+    return pack(run_render(route, body))
+
+
+def page_in_worker(route: str, message: dict[str, t.Any] | None, keep_data: bool) -> Packed:
+    """
+    Run the ``load`` of a route and render its page in a worker
+
+    Arguments
+    ---------
+    route: str
+        The route
+    message: dict[str, typing.Any] | None
+        The message received from the client, None for a static load
+    keep_data: bool
+        Whether to send the data back with the html, otherwise it never leaves the worker
+
+    Returns
+    -------
+    tuple[bytes, str | None, list[tuple[int, int]]]
+        The packed response of ``load`` and the html, encoded as utf-8, None when ``load``
+        returned nothing
+    """
+    data = run_load(route, message)
+    if not data:
+        return pack(None)
+    html = run_render(route, data.body)
+    if not keep_data:
+        data.body = {}
+    return pack((data, html))
+
+
+class ProcessPool:
+    """
+    ProcessPool class to run the ``load`` and render of CPU bound routes in other processes
+
+    Arguments
+    ---------
+    root: Path
+        The pages directory
+    pages: dict[str, Path]
+        Dictionary of routes and their corresponding pages
+    server: dict[str, Path]
+        Dictionary of routes and their corresponding server files
+    workers: int | None
+        Number of processes, defaults to the number of CPUs
+    compiled: Path | None
+        Zip archive written by ``vivid compile``
+    cache: Path | None
+        SQLite database shared with the server for the ``{% cache %}`` blocks, each
+        worker keeps its own fragments when not given
+    context: str
+        Start method of the processes, ``spawn`` never inherits the threads and sockets
+        of the server
+
+    Attributes
+    ----------
+    root: Path
+        The pages directory
+    pages: dict[str, Path]
+        Dictionary of routes and their corresponding pages
+    server: dict[str, Path]
+        Dictionary of routes and their corresponding server files
+    workers: int
+        Number of processes
+    compiled: Path | None
+        Zip archive written by ``vivid compile``
+    cache: Path | None
+        SQLite database shared for the ``{% cache %}`` blocks
+    context: str
+        Start method of the processes
+    executor: concurrent.futures.ProcessPoolExecutor | None
+        The pool, created by ``start``
+    stages: dict[str, frozenset[str]]
+        Stages run in the pool of every route exporting ``cpu_bound``
+    submitted: int
+        Number of calls sent to the pool
+
+    Notes
+    -----
+    A route runs in the pool when its server module exports ``cpu_bound = True`` for
+    ``load`` and render, or a list of ``"load"`` and ``"render"``. The data given to the
+    template and returned by ``load`` must be picklable. Workers load their own server
+    modules and run their ``startup`` hooks with their own state, the app hooks and the
+    state of the server are not shared. With ``spawn`` the script starting the app is
+    imported by every worker, it has to call ``App.run`` under
+    ``if __name__ == "__main__"``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        pages: dict[str, Path],
+        server: dict[str, Path],
+        workers: int | None = None,
+        compiled: Path | None = None,
+        cache: Path | None = None,
+        context: str = "spawn",
+    ) -> None:
+        self.root = root.resolve()
+        self.pages = pages
+        self.server = server
+        self.workers = workers or os.cpu_count() or 1
+        self.compiled = compiled
+        self.cache = cache
+        self.context = context
+        self.executor: ProcessPoolExecutor | None = None
+        self.stages: dict[str, frozenset[str]] = {}
+        self.submitted = 0
+
+    async def start(self, modules: dict[str, ModuleType], globals: dict[str, t.Any] | None = None) -> None:
+        """
+        Start the workers and wait until every one of them is warm
+
+        Arguments
+        ---------
+        modules: dict[str, ModuleType]
+            Server modules loaded by the server, keyed by route
+        globals: dict[str, typing.Any] | None
+            Globals of the templates, they must be picklable
+
+        Returns
+        -------
+        None
+        """
+        self.stages = {route: stages_of(mod) for route, mod in modules.items() if stages_of(mod)}
+        if not self.stages:
+            return
+        pages = {
+            route: self.pages[route].resolve().relative_to(self.root).as_posix()
+            for route in self.stages
+            if route in self.pages
+        }
+        self.executor = ProcessPoolExecutor(
+            self.workers,
+            mp_context=multiprocessing.get_context(self.context),
+            initializer=init_worker,
+            initargs=(
+                self.root,
+                self.compiled,
+                {route: self.server[route] for route in self.stages},
+                pages,
+                self.cache,
+                globals or {},
+            ),
+        )
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.executor, warm) for _ in range(self.workers)))
+
+    def runs(self, route: str, stage: str) -> bool:
+        """
+        Check if a stage of a route runs in the pool
+
+        Arguments
+        ---------
+        route: str
+            The route
+        stage: str
+            ``load`` or ``render``
+
+        Returns
+        -------
+        bool
+            Whether the stage is sent to the pool
+        """
+        return self.executor is not None and stage in self.stages.get(route, ())
+
+    async def call(self, func: t.Callable[..., Packed], *args: t.Any) -> t.Any:
+        """
+        Call a function in a worker
+
+        Arguments
+        ---------
+        func: typing.Callable[..., tuple[bytes, str | None, list[tuple[int, int]]]]
+            The function, returning a packed result
+        *args: typing.Any
+            Arguments for the function, they must be picklable
+
+        Returns
+        -------
+        typing.Any
+            The unpacked result
+
+        Notes
+        -----
+        When the request is cancelled while the worker runs, the shared memory of the
+        result is freed as soon as the worker is done instead of being left behind.
+        """
+        assert self.executor is not None
+        self.submitted += 1
+        future = self.executor.submit(func, *args)
+        try:
+            packed = await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            future.add_done_callback(release)
+            raise
+        return unpack(packed)
+
+    async def load(self, route: str, message: dict[str, t.Any] | None) -> t.Any:
+        """
+        Run the ``load`` of a route in a worker
+
+        Arguments
+        ---------
+        route: str
+            The route
+        message: dict[str, typing.Any] | None
+            The message received from the client, None for a static load
+
+        Returns
+        -------
+        typing.Any
+            The response of ``load``
+        """
+        return await self.call(load_in_worker, route, message)
+
+    async def render(self, route: str, body: dict[str, t.Any]) -> str:
+        """
+        Render the page of a route in a worker
+
+        Arguments
+        ---------
+        route: str
+            The route
+        body: dict[str, typing.Any]
+            The data of the template
+
+        Returns
+        -------
+        str
+            The html
+
+        Raises
+        ------
+        Exception
+            If rendering the template fails
+        """
+        html: bytes | memoryview = await self.call(render_in_worker, route, body)
+        return str(html, "utf-8")
+
+    async def page(
+        self, route: str, message: dict[str, t.Any] | None, keep_data: bool = False
+    ) -> tuple[t.Any, str] | None:
+        """
+        Run the ``load`` of a route and render its page in a single call to a worker
+
+        Arguments
+        ---------
+        route: str
+            The route
+        message: dict[str, typing.Any] | None
+            The message received from the client, None for a static load
+        keep_data: bool
+            Whether to send the data back, otherwise the response has an empty body
+
+        Returns
+        -------
+        tuple[typing.Any, str] | None
+            The response of ``load`` and the html, None when ``load`` returned nothing
+
+        Raises
+        ------
+        Exception
+            If ``load`` or rendering the template fails
+        """
+        result = await self.call(page_in_worker, route, message, keep_data)
+        if result is None:
+            return None
+        data, html = result
+        return data, str(html, "utf-8")
+
+    async def close(self) -> None:
+        """
+        Stop the workers, calls in flight are finished and the waiting ones cancelled
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.to_thread(executor.shutdown, True, cancel_futures=True)
+
+    def stats(self) -> dict[str, t.Any]:
+        """
+        Get the statistics of the pool
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        dict[str, typing.Any]
+            Number of workers, stages of the routes run in the pool and calls sent to it
+        """
+        return {
+            "workers": self.workers if self.executor else 0,
+            "routes": {route: sorted(stages) for route, stages in self.stages.items()},
+            "calls": self.submitted,
+        }
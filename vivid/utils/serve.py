@@ -0,0 +1,440 @@
+import mimetypes
+import mmap
+import typing as t
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+
+from vivid.utils.common import get_header
+from vivid.utils.data import etag_matches
+
+__all__: tuple[str, ...] = ("StaticFile", "build_index", "index_stats", "parse_range", "StaticServer")
+
+ENCODINGS: dict[str, str] = {"br": ".br", "gzip": ".gz"}
+CHUNK_SIZE: int = 1024 * 1024
+
+
+@dataclass()
+class StaticFile:
+    """
+    StaticFile class describing a file of the served tree
+
+    Arguments
+    ---------
+    path: Path
+        Path of the file on disk
+    size: int
+        Size of the file in bytes
+    content_type: str
+        Content type of the file
+    etag: str
+        Quoted etag derived from the modification time and the size
+    last_modified: str
+        Modification time formatted for the ``last-modified`` header
+    mtime: int
+        Modification time in seconds
+    variants: dict[str, StaticFile]
+        Precompressed variants of the file keyed by content encoding
+    body: bytes | None
+        Content of the file when it is small enough to be kept in memory
+    """
+
+    path: Path
+    size: int
+    content_type: str
+    etag: str
+    last_modified: str
+    mtime: int
+    variants: dict[str, "StaticFile"] = field(default_factory=dict)
+    body: bytes | None = None
+
+
+def build_index(
+    root: Path, memory_limit: int = 64 * 1024 * 1024, inline_size: int = 64 * 1024
+) -> dict[str, StaticFile]:
+    """
+    Build an in-memory index of a directory tree
+
+    Arguments
+    ---------
+    root: Path
+        The directory to index, usually the output of ``SSG.build``
+    memory_limit: int
+        Total bytes of small files kept in memory
+    inline_size: int
+        Files up to this size are kept in memory while the memory limit allows it
+
+    Returns
+    -------
+    dict[str, StaticFile]
+        Files keyed by url path, html files are also reachable without their suffix
+        and ``index.html`` files by their directory
+    """
+    files: dict[str, StaticFile] = {}
+    variants: list[tuple[str, str, StaticFile]] = []
+    used = 0
+    for path in sorted(root.rglob("*")):
+        if not path.is_file():
+            continue
+        stat = path.stat()
+        url = "/" + path.relative_to(root).as_posix()
+        encoding = next((name for name, suffix in ENCODINGS.items() if url.endswith(suffix)), None)
+        content_type = mimetypes.guess_type(url[: -len(ENCODINGS[encoding])] if encoding else url)[0]
+        if content_type is None:
+            content_type = "application/octet-stream"
+        elif content_type.startswith("text/") or content_type in ("application/javascript", "application/json"):
+            content_type += "; charset=utf-8"
+        file = StaticFile(
+            path=path,
+            size=stat.st_size,
+            content_type=content_type,
+            etag=f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"',
+            last_modified=formatdate(stat.st_mtime, usegmt=True),
+            mtime=int(stat.st_mtime),
+        )
+        if stat.st_size <= inline_size and used + stat.st_size <= memory_limit:
+            file.body = path.read_bytes()
+            used += stat.st_size
+        if encoding:
+            variants.append((url[: -len(ENCODINGS[encoding])], encoding, file))
+        files[url] = file
+    for url, encoding, file in variants:
+        if url in files:
+            files[url].variants[encoding] = file
+    for url, file in list(files.items()):
+        if url.endswith("/index.html"):
+            files.setdefault(url[: -len("index.html")], file)
+            if url != "/index.html":
+                files.setdefault(url[: -len("/index.html")], file)
+        elif url.endswith(".html"):
+            files.setdefault(url[: -len(".html")], file)
+    return files
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parse a single ``range`` header
+
+    Arguments
+    ---------
+    header: str
+        The value of the range header
+    size: int
+        The size of the file
+
+    Returns
+    -------
+    tuple[int, int] | None
+        The first and last byte of the range, ``(0, -1)`` when it can not be satisfied
+        or None when the header should be ignored
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    start, _, end = spec.strip().partition("-")
+    try:
+        if not start:
+            length = int(end)
+            if length <= 0:
+                return (0, -1)
+            return (max(size - length, 0), size - 1)
+        first = int(start)
+        last = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if first >= size or last < first:
+        return (0, -1)
+    return (first, min(last, size - 1))
+
+
+def parse_accept_encoding(header: str) -> dict[str, float]:
+    """
+    Parse an ``accept-encoding`` header
+
+    Arguments
+    ---------
+    header: str
+        The value of the header
+
+    Returns
+    -------
+    dict[str, float]
+        The quality of every listed coding, lowercased, ``*`` included when it is listed
+    """
+    qualities: dict[str, float] = {}
+    for item in header.split(","):
+        coding, *params = (part.strip() for part in item.split(";"))
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    return qualities
+
+
+def pick_encoding(header: str, variants: t.Container[str]) -> str | None:
+    """
+    Pick the precompressed variant to send for an ``accept-encoding`` header
+
+    Arguments
+    ---------
+    header: str
+        The value of the header
+    variants: typing.Container[str]
+        The encodings the file has a precompressed sibling for
+
+    Returns
+    -------
+    str | None
+        The accepted encoding with the highest quality, brotli first on a tie, None to
+        send the file as it is
+    """
+    qualities = parse_accept_encoding(header)
+    best, best_quality = None, 0.0
+    for name in ENCODINGS:
+        quality = qualities.get(name, qualities.get("*", 0.0))
+        if name in variants and quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+class StaticServer:
+    """
+    StaticServer class to serve a built site with conditional and range requests
+
+    Arguments
+    ---------
+    root: Path
+        The directory to serve
+    memory_limit: int
+        Total bytes of small files kept in memory
+
+    Attributes
+    ----------
+    root: Path
+        The directory to serve
+    files: dict[str, StaticFile]
+        The index of the directory built at startup
+
+    Notes
+    -----
+    Small files are answered from memory, bigger ones are sent with the
+    ``http.response.zerocopysend`` extension when the server supports it and from an
+    mmap otherwise. Precompressed ``.br`` and ``.gz`` siblings are picked with
+    ``accept-encoding``.
+    """
+
+    def __init__(self, root: Path, memory_limit: int = 64 * 1024 * 1024) -> None:
+        self.root = root
+        self.files = build_index(root, memory_limit)
+
+    async def __call__(
+        self, scope: dict[str, t.Any], receive: Callable[..., t.Any], send: Callable[..., t.Any]
+    ) -> None:
+        """
+        The main function of the server
+
+        Arguments
+        ---------
+        scope: dict[str, typing.Any]
+            The scope of the request
+        receive: collections.abc.Callable[..., t.Any]
+            The receive function
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                await send({"type": message["type"] + ".complete"})
+                if message["type"] == "lifespan.shutdown":
+                    return
+        if scope["method"] not in ("GET", "HEAD"):
+            await self.send_empty(405, [[b"allow", b"GET, HEAD"]], send)
+            return
+        file = self.files.get(scope["path"])
+        if file is None:
+            not_found = self.files.get("/404.html")
+            if not_found is None:
+                await self.send_empty(404, [], send)
+                return
+            await self.send_file(scope, not_found, 404, [], None, send)
+            return
+        encoding = None
+        if not get_header(scope, "range"):
+            accept_encoding = get_header(scope, "accept-encoding") or ""
+            encoding = pick_encoding(accept_encoding, file.variants)
+        etag = file.etag if encoding is None else f'{file.etag[:-1]}-{encoding}"'
+        headers: list[list[bytes]] = [
+            [b"etag", etag.encode()],
+            [b"last-modified", file.last_modified.encode()],
+            [b"accept-ranges", b"bytes"],
+        ]
+        if file.variants:
+            headers.append([b"vary", b"accept-encoding"])
+        if_none_match = get_header(scope, "if-none-match")
+        if if_none_match is not None:
+            if etag_matches(etag, if_none_match):
+                await self.send_empty(304, headers, send)
+                return
+        else:
+            if_modified_since = get_header(scope, "if-modified-since")
+            if if_modified_since and self.not_modified_since(file, if_modified_since):
+                await self.send_empty(304, headers, send)
+                return
+        if encoding is not None:
+            headers.append([b"content-encoding", encoding.encode()])
+            await self.send_file(scope, file.variants[encoding], 200, headers, None, send, file.content_type)
+            return
+        range_header = get_header(scope, "range")
+        if range_header and get_header(scope, "if-range") in (None, file.etag, file.last_modified):
+            byte_range = parse_range(range_header, file.size)
+            if byte_range is not None:
+                if byte_range[1] < byte_range[0]:
+                    headers.append([b"content-range", f"bytes */{file.size}".encode()])
+                    await self.send_empty(416, headers, send)
+                    return
+                headers.append([b"content-range", f"bytes {byte_range[0]}-{byte_range[1]}/{file.size}".encode()])
+                await self.send_file(scope, file, 206, headers, byte_range, send)
+                return
+        await self.send_file(scope, file, 200, headers, None, send)
+
+    @staticmethod
+    def not_modified_since(file: StaticFile, value: str) -> bool:
+        """
+        Check an ``if-modified-since`` header
+
+        Arguments
+        ---------
+        file: StaticFile
+            The requested file
+        value: str
+            The value of the header
+
+        Returns
+        -------
+        bool
+            Whether the file was not modified since the given date
+        """
+        try:
+            return file.mtime <= int(parsedate_to_datetime(value).timestamp())
+        except (TypeError, ValueError):
+            return False
+
+    @staticmethod
+    async def send_empty(status: int, headers: list[list[bytes]], send: Callable[..., t.Any]) -> None:
+        """
+        Send a response without a body
+
+        Arguments
+        ---------
+        status: int
+            The status code of the response
+        headers: list[list[bytes]]
+            The headers of the response
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+
+        Returns
+        -------
+        None
+        """
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send_file(
+        self,
+        scope: dict[str, t.Any],
+        file: StaticFile,
+        status: int,
+        headers: list[list[bytes]],
+        byte_range: tuple[int, int] | None,
+        send: Callable[..., t.Any],
+        content_type: str | None = None,
+    ) -> None:
+        """
+        Send a file or a range of it
+
+        Arguments
+        ---------
+        scope: dict[str, typing.Any]
+            The scope of the request
+        file: StaticFile
+            The file to send
+        status: int
+            The status code of the response
+        headers: list[list[bytes]]
+            The headers of the response
+        byte_range: tuple[int, int] | None
+            The first and last byte to send or None for the whole file
+        send: collections.abc.Callable[..., t.Any]
+            The send function
+        content_type: str | None
+            Content type overriding the one of the file, used for precompressed variants
+
+        Returns
+        -------
+        None
+        """
+        offset, last = byte_range if byte_range else (0, file.size - 1)
+        count = last - offset + 1
+        headers = headers + [
+            [b"content-type", (content_type or file.content_type).encode()],
+            [b"content-length", str(count).encode()],
+        ]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        if scope["method"] == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+        if file.body is not None:
+            await send({"type": "http.response.body", "body": file.body[offset : offset + count]})
+            return
+        with open(file.path, "rb") as f:
+            if "http.response.zerocopysend" in (scope.get("extensions") or {}):
+                await send({"type": "http.response.zerocopysend", "file": f, "offset": offset, "count": count})
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    end = offset + count
+                    while offset < end:
+                        chunk = min(CHUNK_SIZE, end - offset)
+                        await send(
+                            {
+                                "type": "http.response.body",
+                                "body": bytes(view[offset : offset + chunk]),
+                                "more_body": offset + chunk < end,
+                            }
+                        )
+                        offset += chunk
+                finally:
+                    view.release()
+
+
+def index_stats(files: dict[str, StaticFile]) -> tuple[int, int]:
+    """
+    Count the distinct files of an index and their total size
+
+    Arguments
+    ---------
+    files: dict[str, StaticFile]
+        The index built by ``build_index``
+
+    Returns
+    -------
+    tuple[int, int]
+        The number of files and their total size in bytes
+    """
+    unique = {id(file): file for file in files.values()}
+    return len(unique), sum(file.size for file in unique.values())
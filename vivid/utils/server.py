@@ -0,0 +1,228 @@
+import abc
+import asyncio
+import typing as t
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import uvicorn
+
+__all__: tuple[str, ...] = (
+    "BACKENDS",
+    "HypercornBackend",
+    "ServerBackend",
+    "ServerOptions",
+    "UvicornBackend",
+    "backend_of",
+    "setup_loop",
+)
+
+
+@dataclass()
+class ServerOptions:
+    """
+    ServerOptions class to tune the ASGI server running an app
+
+    Arguments
+    ---------
+    loop: typing.Literal["auto", "asyncio", "uvloop"]
+        Event loop, auto uses uvloop when it is installed
+    http: typing.Literal["auto", "h11", "httptools"]
+        HTTP/1.1 parser of uvicorn, auto uses httptools when it is installed
+    backlog: int
+        Maximum number of connections waiting to be accepted
+    keep_alive: int
+        Seconds an idle keep-alive connection is kept open
+    limit_concurrency: int | None
+        Connections and tasks after which uvicorn answers 503, None for no limit
+    certfile: str | None
+        TLS certificate, browsers only negotiate HTTP/2 over TLS
+    keyfile: str | None
+        TLS private key
+    """
+
+    loop: t.Literal["auto", "asyncio", "uvloop"] = "auto"
+    http: t.Literal["auto", "h11", "httptools"] = "auto"
+    backlog: int = 2048
+    keep_alive: int = 5
+    limit_concurrency: int | None = None
+    certfile: str | None = None
+    keyfile: str | None = None
+
+
+def setup_loop(loop: t.Literal["auto", "asyncio", "uvloop"] = "auto") -> None:
+    """
+    Install the event loop policy, has to run before the event loop is created
+
+    Arguments
+    ---------
+    loop: typing.Literal["auto", "asyncio", "uvloop"]
+        Event loop, auto uses uvloop when it is installed
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    ImportError
+        If uvloop is asked for but not installed
+    """
+    if loop == "asyncio":
+        return
+    try:
+        import uvloop
+    except ImportError:
+        if loop == "uvloop":
+            raise
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+class ServerBackend(abc.ABC):
+    """
+    ServerBackend class to run an ASGI app with a server
+
+    Attributes
+    ----------
+    name: str
+        Name of the backend, as passed to ``App.run(backend=...)``
+    """
+
+    name: str = ""
+
+    @abc.abstractmethod
+    async def serve(
+        self,
+        app: Callable[..., t.Any],
+        host: str,
+        port: int,
+        options: ServerOptions,
+        dev: bool = False,
+        reload_dirs: list[Path] = [],
+    ) -> None:
+        """
+        Serve an app until the server is stopped
+
+        Arguments
+        ---------
+        app: collections.abc.Callable[..., typing.Any]
+            The ASGI app
+        host: str
+            The host to bind
+        port: int
+            The port to bind
+        options: ServerOptions
+            The tuning of the server
+        dev: bool
+            Whether to run in development mode
+        reload_dirs: list[Path]
+            The directories to reload in development mode
+
+        Returns
+        -------
+        None
+        """
+
+
+class UvicornBackend(ServerBackend):
+    """
+    UvicornBackend class to run an app with uvicorn, HTTP/1.1 only
+    """
+
+    name = "uvicorn"
+
+    async def serve(
+        self,
+        app: Callable[..., t.Any],
+        host: str,
+        port: int,
+        options: ServerOptions,
+        dev: bool = False,
+        reload_dirs: list[Path] = [],
+    ) -> None:
+        config = uvicorn.Config(
+            app,
+            host=host,
+            port=port,
+            reload=dev,
+            log_level="critical",
+            reload_dirs=[path.as_posix() for path in reload_dirs],
+            loop=options.loop,
+            http=options.http,
+            backlog=options.backlog,
+            timeout_keep_alive=options.keep_alive,
+            limit_concurrency=options.limit_concurrency,
+            ssl_certfile=options.certfile,
+            ssl_keyfile=options.keyfile,
+        )
+        await uvicorn.Server(config).serve()
+
+
+class HypercornBackend(ServerBackend):
+    """
+    HypercornBackend class to run an app with hypercorn, HTTP/1.1 and HTTP/2
+
+    Notes
+    -----
+    hypercorn is an optional dependency, installed with the ``http2`` extra. HTTP/2 is
+    negotiated over TLS with ``certfile`` and ``keyfile``, or with prior knowledge
+    (h2c) in cleartext. ``http`` and ``limit_concurrency`` only apply to uvicorn, use
+    ``App(concurrency=...)`` to limit requests with any backend.
+    """
+
+    name = "hypercorn"
+
+    async def serve(
+        self,
+        app: Callable[..., t.Any],
+        host: str,
+        port: int,
+        options: ServerOptions,
+        dev: bool = False,
+        reload_dirs: list[Path] = [],
+    ) -> None:
+        try:
+            from hypercorn.asyncio import serve
+            from hypercorn.config import Config
+        except ImportError as e:
+            raise ImportError("the hypercorn backend needs hypercorn, install vivid[http2]") from e
+        config = Config()
+        config.bind = [f"{host}:{port}"]
+        config.backlog = options.backlog
+        config.keep_alive_timeout = options.keep_alive
+        config.certfile = options.certfile
+        config.keyfile = options.keyfile
+        config.accesslog = None
+        config.errorlog = None
+        await serve(app, config)
+
+
+BACKENDS: dict[str, type[ServerBackend]] = {
+    UvicornBackend.name: UvicornBackend,
+    HypercornBackend.name: HypercornBackend,
+}
+
+
+def backend_of(name: str) -> ServerBackend:
+    """
+    Get a server backend by name
+
+    Arguments
+    ---------
+    name: str
+        The name of the backend, ``uvicorn`` or ``hypercorn``
+
+    Returns
+    -------
+    ServerBackend
+        The backend
+
+    Raises
+    ------
+    ValueError
+        If there is no backend with this name
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"unknown server backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    return BACKENDS[name]()
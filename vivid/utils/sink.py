@@ -0,0 +1,343 @@
+import abc
+import gzip
+import io
+import os
+import shutil
+import tarfile
+import time
+import typing as t
+import zipfile
+from pathlib import Path
+from types import TracebackType
+
+__all__: tuple[str, ...] = ("Sink", "DirectorySink", "TarSink", "ZipSink", "sink_of")
+
+TAR_SUFFIXES: dict[str, t.Literal["", "gz", "bz2", "xz"]] = {
+    ".tar": "",
+    ".tar.gz": "gz",
+    ".tgz": "gz",
+    ".tar.bz2": "bz2",
+    ".tar.xz": "xz",
+}
+
+
+def build_time(mtime: float | None = None) -> float:
+    """
+    Get the modification time of the files written by a build
+
+    Arguments
+    ---------
+    mtime: float | None
+        Fixed timestamp, None uses ``SOURCE_DATE_EPOCH`` when it is set or the current time
+
+    Returns
+    -------
+    float
+        The timestamp
+    """
+    if mtime is not None:
+        return mtime
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    return float(epoch) if epoch else time.time()
+
+
+class Sink(abc.ABC):
+    """
+    Sink class to receive the files written by a build
+
+    Arguments
+    ---------
+    mtime: float | None
+        Modification time of every file, None uses ``SOURCE_DATE_EPOCH`` or the current time
+
+    Attributes
+    ----------
+    mtime: float
+        Modification time of every file
+
+    Notes
+    -----
+    Paths are relative to the root of the output and use forward slashes. A sink is a
+    context manager, leaving it closes the output.
+    """
+
+    def __init__(self, mtime: float | None = None) -> None:
+        self.mtime = build_time(mtime)
+
+    @abc.abstractmethod
+    def write(self, path: str, data: bytes) -> None:
+        """
+        Write a file
+
+        Arguments
+        ---------
+        path: str
+            The relative path of the file
+        data: bytes
+            The content of the file
+
+        Returns
+        -------
+        None
+        """
+
+    def copy(self, source: Path, path: str) -> None:
+        """
+        Copy a file
+
+        Arguments
+        ---------
+        source: Path
+            The file to copy
+        path: str
+            The relative path of the copy
+
+        Returns
+        -------
+        None
+        """
+        self.write(path, source.read_bytes())
+
+    def copy_tree(self, source: Path, prefix: str) -> None:
+        """
+        Copy every file of a directory, in sorted order
+
+        Arguments
+        ---------
+        source: Path
+            The directory to copy, nothing is copied when it does not exist
+        prefix: str
+            The relative path of the copy
+
+        Returns
+        -------
+        None
+        """
+        if not source.is_dir():
+            return
+        for file in sorted(source.rglob("*")):
+            if file.is_file():
+                self.copy(file, f"{prefix}/{file.relative_to(source).as_posix()}")
+
+    def close(self) -> None:
+        """
+        Close the output
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        None
+        """
+
+    def __enter__(self) -> "Sink":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+
+class DirectorySink(Sink):
+    """
+    DirectorySink class to write the build to a directory
+
+    Arguments
+    ---------
+    root: Path
+        The output directory
+    mtime: float | None
+        Modification time of every file, None keeps the time of the write
+
+    Attributes
+    ----------
+    root: Path
+        The output directory
+    """
+
+    def __init__(self, root: Path, mtime: float | None = None) -> None:
+        super().__init__(mtime)
+        self.root = root
+        self.fixed = mtime is not None or "SOURCE_DATE_EPOCH" in os.environ
+
+    def write(self, path: str, data: bytes) -> None:
+        file = self.root / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_bytes(data)
+        if self.fixed:
+            os.utime(file, (self.mtime, self.mtime))
+
+    def copy(self, source: Path, path: str) -> None:
+        file = self.root / path
+        file.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(source, file)
+        if self.fixed:
+            os.utime(file, (self.mtime, self.mtime))
+
+
+class TarSink(Sink):
+    """
+    TarSink class to stream the build into a tar archive
+
+    Arguments
+    ---------
+    target: Path
+        The archive to write
+    compression: typing.Literal["", "gz", "bz2", "xz"]
+        Compression of the archive, empty for none
+    mtime: float | None
+        Modification time of every file, None uses ``SOURCE_DATE_EPOCH`` or the current time
+
+    Attributes
+    ----------
+    target: Path
+        The archive to write
+    archive: tarfile.TarFile
+        The open archive
+
+    Notes
+    -----
+    Entries are owned by root with mode 0644 and the gzip header carries no name or
+    time, so the same files written in the same order give a byte identical archive.
+    """
+
+    def __init__(
+        self, target: Path, compression: t.Literal["", "gz", "bz2", "xz"] = "", mtime: float | None = None
+    ) -> None:
+        super().__init__(mtime)
+        self.target = target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.raw: t.BinaryIO | None = None
+        self.gzip: gzip.GzipFile | None = None
+        if compression == "gz":
+            # tarfile would put the archive name and the current time in the gzip header
+            self.raw = open(target, "wb")
+            self.gzip = gzip.GzipFile(filename="", mode="wb", fileobj=self.raw, mtime=int(self.mtime))
+            self.archive = tarfile.open(fileobj=t.cast(t.IO[bytes], self.gzip), mode="w", format=tarfile.GNU_FORMAT)
+        else:
+            self.archive = tarfile.open(target, f"w:{compression}", format=tarfile.GNU_FORMAT)
+
+    def info_of(self, path: str, size: int) -> tarfile.TarInfo:
+        """
+        Create the header of an entry
+
+        Arguments
+        ---------
+        path: str
+            The relative path of the file
+        size: int
+            The size of the file
+
+        Returns
+        -------
+        tarfile.TarInfo
+            The header
+        """
+        info = tarfile.TarInfo(path)
+        info.size = size
+        info.mtime = int(self.mtime)
+        info.mode = 0o644
+        return info
+
+    def write(self, path: str, data: bytes) -> None:
+        self.archive.addfile(self.info_of(path, len(data)), io.BytesIO(data))
+
+    def copy(self, source: Path, path: str) -> None:
+        with open(source, "rb") as f:
+            self.archive.addfile(self.info_of(path, os.fstat(f.fileno()).st_size), f)
+
+    def close(self) -> None:
+        self.archive.close()
+        if self.gzip is not None:
+            self.gzip.close()
+        if self.raw is not None:
+            self.raw.close()
+
+
+class ZipSink(Sink):
+    """
+    ZipSink class to stream the build into a zip archive
+
+    Arguments
+    ---------
+    target: Path
+        The archive to write
+    mtime: float | None
+        Modification time of every file, None uses ``SOURCE_DATE_EPOCH`` or the current time
+
+    Attributes
+    ----------
+    target: Path
+        The archive to write
+    archive: zipfile.ZipFile
+        The open archive
+    """
+
+    def __init__(self, target: Path, mtime: float | None = None) -> None:
+        super().__init__(mtime)
+        self.target = target
+        target.parent.mkdir(parents=True, exist_ok=True)
+        self.archive = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+        # zip timestamps start in 1980 and have no timezone
+        self.date_time = max(time.gmtime(self.mtime)[:6], (1980, 1, 1, 0, 0, 0))
+
+    def info_of(self, path: str) -> zipfile.ZipInfo:
+        """
+        Create the header of an entry
+
+        Arguments
+        ---------
+        path: str
+            The relative path of the file
+
+        Returns
+        -------
+        zipfile.ZipInfo
+            The header
+        """
+        info = zipfile.ZipInfo(path, self.date_time)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info.external_attr = 0o644 << 16
+        return info
+
+    def write(self, path: str, data: bytes) -> None:
+        self.archive.writestr(self.info_of(path), data)
+
+    def copy(self, source: Path, path: str) -> None:
+        with open(source, "rb") as f, self.archive.open(self.info_of(path), "w") as entry:
+            shutil.copyfileobj(f, entry)  # type: ignore[misc]
+
+    def close(self) -> None:
+        self.archive.close()
+
+
+def sink_of(dest: Path, mtime: float | None = None) -> Sink:
+    """
+    Create the sink matching a destination
+
+    Arguments
+    ---------
+    dest: Path
+        The destination, a ``.zip``, ``.tar``, ``.tar.gz``, ``.tgz``, ``.tar.bz2`` or
+        ``.tar.xz`` file is written as an archive, anything else as a directory
+    mtime: float | None
+        Modification time of every file
+
+    Returns
+    -------
+    Sink
+        The sink
+    """
+    name = dest.name.lower()
+    if name.endswith(".zip"):
+        return ZipSink(dest, mtime)
+    for suffix, compression in TAR_SUFFIXES.items():
+        if name.endswith(suffix):
+            return TarSink(dest, compression, mtime)
+    return DirectorySink(dest, mtime)
@@ -0,0 +1,178 @@
+import asyncio
+import contextlib
+import inspect
+import typing as t
+from collections.abc import AsyncGenerator, Callable
+from dataclasses import dataclass
+
+from vivid.utils.data import dumps
+
+__all__: tuple[str, ...] = ("Event", "encode_event", "stream_events")
+
+HEARTBEAT: float = 15.0
+
+
+@dataclass()
+class Event:
+    """
+    Event class to create a server-sent event
+
+    Arguments
+    ---------
+    data: typing.Any
+        Data of the event, non string data is serialized to json
+    event: str | None
+        Name of the event
+    id: str | None
+        Id of the event, sent back by the browser as ``last-event-id`` on reconnect
+    retry: int | None
+        Reconnection delay in milliseconds
+    """
+
+    data: t.Any
+    event: str | None = None
+    id: str | None = None
+    retry: int | None = None
+
+    def encode(self) -> bytes:
+        """
+        Encode the event in the event-stream format
+
+        Arguments
+        ---------
+        None
+
+        Returns
+        -------
+        bytes
+            The encoded event
+        """
+        lines: list[str] = []
+        if self.event is not None:
+            lines.append(f"event: {self.event}")
+        if self.id is not None:
+            lines.append(f"id: {self.id}")
+        if self.retry is not None:
+            lines.append(f"retry: {self.retry}")
+        data = self.data if isinstance(self.data, str) else dumps(self.data).decode("utf-8")
+        lines.extend(f"data: {line}" for line in data.splitlines() or [""])
+        return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+def encode_event(event: t.Any) -> bytes:
+    """
+    Encode a value yielded by an events handler
+
+    Arguments
+    ---------
+    event: typing.Any
+        An Event, raw bytes which are sent as they are, or any other data
+
+    Returns
+    -------
+    bytes
+        The encoded event
+    """
+    if isinstance(event, Event):
+        return event.encode()
+    if isinstance(event, bytes):
+        return event
+    return Event(event).encode()
+
+
+async def stream_events(
+    events: AsyncGenerator[t.Any, None],
+    receive: Callable[..., t.Any],
+    send: Callable[..., t.Any],
+    heartbeat: float = HEARTBEAT,
+) -> None:
+    """
+    Stream the events of an async generator as ``text/event-stream``
+
+    Arguments
+    ---------
+    events: collections.abc.AsyncGenerator[typing.Any, None]
+        The generator returned by the events handler
+    receive: collections.abc.Callable[..., typing.Any]
+        The receive function
+    send: collections.abc.Callable[..., typing.Any]
+        The send function
+    heartbeat: float
+        Seconds without an event after which a comment is sent to keep the connection open
+
+    Returns
+    -------
+    None
+
+    Raises
+    ------
+    TypeError
+        If the handler did not return an async generator, before anything is sent
+    Exception
+        What the generator raised, once the response has been ended
+
+    Notes
+    -----
+    The next event is only pulled from the generator once the previous one was sent, so
+    a slow client slows the generator down instead of buffering events in memory.
+    The generator is closed as soon as the client disconnects.
+    """
+    if not inspect.isasyncgen(events):
+        raise TypeError(f"events handlers must be async generators, got {type(events).__name__}")
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect() -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected.set()
+                return
+
+    watcher = asyncio.create_task(watch_disconnect())
+    disconnect = asyncio.create_task(disconnected.wait())
+    pending: asyncio.Task[t.Any] | None = None
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                [b"content-type", b"text/event-stream"],
+                [b"cache-control", b"no-cache"],
+                [b"x-accel-buffering", b"no"],
+            ],
+        }
+    )
+    try:
+        while not disconnected.is_set():
+            if pending is None:
+                pending = asyncio.ensure_future(events.__anext__())
+            done, _ = await asyncio.wait({pending, disconnect}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED)
+            if disconnect in done:
+                break
+            if pending not in done:
+                await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+                continue
+            task, pending = pending, None
+            try:
+                event = task.result()
+            except StopAsyncIteration:
+                break
+            except Exception:
+                with contextlib.suppress(OSError):
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+                raise
+            await send({"type": "http.response.body", "body": encode_event(event), "more_body": True})
+        if not disconnected.is_set():
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+    except OSError:
+        pass
+    finally:
+        if pending is not None:
+            pending.cancel()
+            try:
+                await pending
+            except (asyncio.CancelledError, StopAsyncIteration):
+                pass
+        await events.aclose()
+        watcher.cancel()
+        disconnect.cancel()
@@ -0,0 +1,304 @@
+import hashlib
+import json
+import os
+import typing as t
+import zipfile
+from collections.abc import Callable, MutableMapping
+from pathlib import Path
+
+import jinja2
+
+from vivid.utils.cache import Cache
+from vivid.utils.fragments import FragmentCacheExtension
+from vivid.utils.hints import find_preloads
+from vivid.utils.http import return_template
+
+__all__: tuple[str, ...] = ("MANIFEST", "PrecompiledLoader", "TemplateStore", "compile_templates")
+
+MANIFEST: str = "vivid-manifest.json"
+
+
+def source_hash(path: Path) -> str:
+    """
+    Hash the source of a template
+
+    Arguments
+    ---------
+    path: Path
+        The path to the template
+
+    Returns
+    -------
+    str
+        The sha256 of the template
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def compile_templates(root: Path, target: Path) -> int:
+    """
+    Precompile every template of a directory into a zip archive
+
+    Arguments
+    ---------
+    root: Path
+        The pages directory
+    target: Path
+        The zip archive to write
+
+    Returns
+    -------
+    int
+        The number of compiled templates
+
+    Notes
+    -----
+    The archive holds the python modules written by jinja's ``compile_templates`` and a
+    manifest with the hash of every source, used to detect stale templates at startup.
+    """
+    env = jinja2.Environment(loader=jinja2.FileSystemLoader(root), extensions=[FragmentCacheExtension])
+    names = env.list_templates(extensions=["html"])
+    target.parent.mkdir(parents=True, exist_ok=True)
+    env.compile_templates(target, zip="deflated", ignore_errors=False, filter_func=lambda name: name in names)
+    with zipfile.ZipFile(target, "a", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(MANIFEST, json.dumps({name: source_hash(root / name) for name in names}))
+    return len(names)
+
+
+class PrecompiledLoader(jinja2.BaseLoader):
+    """
+    PrecompiledLoader class to load templates from a precompiled archive
+
+    Arguments
+    ---------
+    root: Path
+        The pages directory
+    archive: Path
+        The zip archive written by ``compile_templates``
+
+    Attributes
+    ----------
+    source: jinja2.FileSystemLoader
+        Loader used for templates that are stale or missing from the archive
+    compiled: jinja2.ModuleLoader
+        Loader of the precompiled templates
+    manifest: dict[str, str]
+        Hash of the source of every precompiled template
+
+    Notes
+    -----
+    A template is only loaded from the archive when its source still has the hash it
+    was compiled from, otherwise it is compiled from source like without an archive.
+    """
+
+    def __init__(self, root: Path, archive: Path) -> None:
+        self.root = root
+        self.source = jinja2.FileSystemLoader(root)
+        self.compiled = jinja2.ModuleLoader(archive)
+        with zipfile.ZipFile(archive) as zip_ref:
+            self.manifest: dict[str, str] = json.loads(zip_ref.read(MANIFEST))
+
+    def get_source(
+        self, environment: jinja2.Environment, template: str
+    ) -> tuple[str, str | None, Callable[[], bool] | None]:
+        return self.source.get_source(environment, template)
+
+    def list_templates(self) -> list[str]:
+        return self.source.list_templates()
+
+    def is_fresh(self, name: str) -> bool:
+        """
+        Check if the precompiled template matches its source
+
+        Arguments
+        ---------
+        name: str
+            The name of the template
+
+        Returns
+        -------
+        bool
+            Whether the template can be loaded from the archive
+        """
+        try:
+            return self.manifest.get(name) == source_hash(self.root / name)
+        except OSError:
+            return False
+
+    def load(
+        self,
+        environment: jinja2.Environment,
+        name: str,
+        globals: MutableMapping[str, t.Any] | None = None,
+    ) -> jinja2.Template:
+        if self.is_fresh(name):
+            return self.compiled.load(environment, name, globals)
+        return self.source.load(environment, name, globals)
+
+
+class TemplateStore:
+    """
+    TemplateStore class to compile every page once and reuse it
+
+    Arguments
+    ---------
+    root: Path
+        The pages directory
+    compiled: Path | None
+        Zip archive written by ``vivid compile``, loaded instead of the sources when it exists
+    cache: Cache | None
+        Cache of the ``{% cache %}`` blocks, an in-process ``LRUCache`` when not given
+
+    Attributes
+    ----------
+    root: Path
+        The pages directory
+    env: jinja2.Environment
+        The environment used to render every page
+    fragments: Cache
+        Cache of the ``{% cache %}`` blocks of the pages
+    preloads: dict[str, tuple[jinja2.Template, list[bytes]]]
+        Links preloading the assets of every page, with the template they were found in
+    sources: dict[str, tuple[jinja2.Template, str]]
+        Source of every page, with the template it was read for
+    names: dict[Path, str]
+        Template name of every page path
+
+    Notes
+    -----
+    Templates are compiled on first use and kept by the environment, a changed source
+    is recompiled on the next render.
+    """
+
+    def __init__(self, root: Path, compiled: Path | None = None, cache: Cache | None = None) -> None:
+        self.root = root.resolve()
+        loader: jinja2.BaseLoader = jinja2.FileSystemLoader(self.root)
+        if compiled is not None and compiled.is_file():
+            loader = PrecompiledLoader(self.root, compiled)
+        self.env = jinja2.Environment(
+            loader=loader, cache_size=-1, auto_reload=True, extensions=[FragmentCacheExtension]
+        )
+        if cache is not None:
+            self.env.fragment_cache = cache  # type: ignore[attr-defined]
+        self.fragments: Cache = self.env.fragment_cache  # type: ignore[attr-defined]
+        self.preloads: dict[str, tuple[jinja2.Template, list[bytes]]] = {}
+        self.sources: dict[str, tuple[jinja2.Template, str]] = {}
+        self.names: dict[Path, str] = {}
+
+    @classmethod
+    def for_pages(cls, pages: dict[str, Path], compiled: Path | None = None) -> "TemplateStore":
+        """
+        Create a store rooted at the common directory of some pages
+
+        Arguments
+        ---------
+        pages: dict[str, Path]
+            Dictionary of routes and their corresponding pages
+        compiled: Path | None
+            Zip archive written by ``vivid compile``
+
+        Returns
+        -------
+        TemplateStore
+            The store
+        """
+        parents = [str(page.resolve().parent) for page in pages.values()]
+        return cls(Path(os.path.commonpath(parents)) if parents else Path("."), compiled)
+
+    def name_of(self, page: Path) -> str:
+        """
+        Get the template name of a page, resolving its path once
+
+        Arguments
+        ---------
+        page: Path
+            The path to the page
+
+        Returns
+        -------
+        str
+            The name of the template, relative to the root
+        """
+        name = self.names.get(page)
+        if name is None:
+            name = self.names[page] = page.resolve().relative_to(self.root).as_posix()
+        return name
+
+    def get(self, page: Path) -> jinja2.Template:
+        """
+        Get the compiled template of a page
+
+        Arguments
+        ---------
+        page: Path
+            The path to the page
+
+        Returns
+        -------
+        jinja2.Template
+            The compiled template
+        """
+        return self.env.get_template(self.name_of(page))
+
+    def preload(self, page: Path) -> list[bytes]:
+        """
+        Get the links preloading the stylesheets, scripts and static assets of a page
+
+        Arguments
+        ---------
+        page: Path
+            The path to the page
+
+        Returns
+        -------
+        list[bytes]
+            The values of the ``link`` headers
+
+        Notes
+        -----
+        The template is analysed once when it is compiled, a changed source is analysed
+        again with its new compiled template.
+        """
+        name = self.name_of(page)
+        template = self.env.get_template(name)
+        found = self.preloads.get(name)
+        if found is None or found[0] is not template:
+            found = (template, find_preloads(self.env, name))
+            self.preloads[name] = found
+        return found[1]
+
+    def source(self, page: Path) -> str | None:
+        """
+        Get the source of a page
+
+        Arguments
+        ---------
+        page: Path
+            The path to the page
+
+        Returns
+        -------
+        str | None
+            The source or None if the page does not exist
+
+        Notes
+        -----
+        The source is read once when the template is compiled, or loaded from the
+        precompiled archive, and again only with a new compiled template. Pages jinja
+        cannot compile are read from disk every time.
+        """
+        name = self.name_of(page)
+        try:
+            template = self.env.get_template(name)
+        except jinja2.TemplateNotFound:
+            return None
+        except jinja2.TemplateError:
+            return return_template(page)
+        found = self.sources.get(name)
+        if found is None or found[0] is not template:
+            source = return_template(page)
+            if source is None:
+                return None
+            found = (template, source)
+            self.sources[name] = found
+        return found[1]